@@ -1,15 +1,16 @@
 import streamlit as st
 import pandas as pd
-import os
 from datetime import datetime, date, timedelta
 from utils.data_utils import (
     save_food_entry, 
     get_todays_entries, 
     format_entry_for_display,
-    get_entries_by_date_range
+    get_entries_by_date_range,
+    build_journal_frame
 )
 from utils.insight_utils import (
     generate_ai_insights,
+    stream_ai_insights,
     save_insight,
     load_insights,
     format_insight_for_display,
@@ -19,6 +20,7 @@ from utils.oura_utils import (
     parse_oura_csv,
     get_oura_summary_stats,
     generate_oura_insights,
+    stream_oura_insights,
     save_oura_insight,
     get_oura_insights,
     format_oura_insight_for_display,
@@ -34,6 +36,7 @@ from utils.task_utils import (
     delete_task,
     get_task_statistics,
     generate_task_insights,
+    stream_task_insights,
     save_task_insight,
     get_task_insights,
     format_task_for_display,
@@ -50,6 +53,7 @@ from utils.goal_utils import (
     delete_goal,
     get_goal_statistics,
     generate_goal_insights,
+    stream_goal_insights,
     save_goal_insight,
     get_goal_insights,
     format_goal_for_display,
@@ -71,6 +75,7 @@ from utils.meal_utils import (
     search_recipes,
     generate_grocery_list,
     generate_meal_recommendations,
+    stream_meal_recommendations,
     save_meal_insight,
     get_meal_insights,
     format_recipe_for_display,
@@ -87,12 +92,60 @@ from utils.selfcare_utils import (
     delete_selfcare_task,
     get_selfcare_statistics,
     generate_selfcare_insights,
+    stream_selfcare_insights,
     save_selfcare_insight,
     get_selfcare_insights,
     format_selfcare_task_for_display,
     get_selfcare_task_completion_status,
     detect_missed_routines
 )
+from utils.nutrition_utils import (
+    get_daily_nutrition_totals,
+    get_unmatched_foods
+)
+from utils.timing_utils import (
+    compute_daily_meal_timing,
+    compute_meal_gaps,
+    get_meal_timing_summary,
+    get_timing_distribution
+)
+from utils.symptom_utils import (
+    get_symptom_index,
+    get_symptom_counts,
+    get_entries_before_symptom,
+    get_foods_before_symptom
+)
+from utils.experiment_utils import (
+    create_experiment,
+    load_experiments,
+    save_experiment,
+    delete_experiment,
+    refresh_experiment
+)
+from utils.autocomplete_utils import (
+    get_completions,
+    update_autocomplete_index,
+    invalidate_autocomplete_index
+)
+from utils.llm_cache import (
+    get_cache_metrics,
+    clear_llm_cache
+)
+from utils.insight_domains import DOMAIN_LABELS
+from utils.batch_insights import generate_all_insights
+from utils.insight_jobs import enqueue_insight_job, get_job, get_job_queue_metrics
+from utils.llm_scheduler import set_llm_user, get_scheduler_metrics
+from utils.llm_breaker import get_breaker_state
+from utils.llm_client import InsightStreamError
+from utils.llm_telemetry import load_telemetry, summarize_telemetry
+from utils.llm_routing import get_route_table
+from utils.prompt_templates import get_template_table
+from utils.structured_insights import (
+    RECOMMENDATION_TYPES, index_structured_insight, get_trigger_foods, get_recommendations, get_findings
+)
+from utils.local_insights import build_local_insight, is_fallback_insight
+from utils.oura_store import load_oura_data, load_oura_trends, upsert_oura_data, delete_oura_data
+from utils.oura_trends import OURA_ANOMALY_Z, get_latest_trends, get_anomalous_nights
 from utils.user_utils import (
     save_user,
     authenticate_user,
@@ -190,6 +243,9 @@ def main():
         login_page()
         return
     
+    # Queue this session's LLM calls under the user for fair scheduling
+    set_llm_user(st.session_state.username)
+    
     # Main application (only shown if authenticated)
     st.markdown('<h1 class="main-header">🍎 AI Food Journal</h1>', unsafe_allow_html=True)
     st.sidebar.success(f"👤 Welcome, {st.session_state.username}!")
@@ -204,7 +260,7 @@ def main():
     st.sidebar.title("Navigation")
     page = st.sidebar.selectbox(
         "Choose a page",
-        ["Food Journal", "OURA Analysis", "Task Manager", "Goal Tracker", "Meal Planning", "Self-Care", "Analytics", "Settings"]
+        ["Food Journal", "OURA Analysis", "Task Manager", "Goal Tracker", "Meal Planning", "Self-Care", "Elimination Diet", "Analytics", "Settings"]
     )
     
     if page == "Food Journal":
@@ -219,6 +275,8 @@ def main():
         meal_planning_page()
     elif page == "Self-Care":
         selfcare_page()
+    elif page == "Elimination Diet":
+        elimination_diet_page()
     elif page == "Analytics":
         analytics_page()
     elif page == "Settings":
@@ -294,6 +352,130 @@ def login_page():
     # This would show basic app stats, but for now just show a message
     st.info("🔐 Secure multi-user food journal with AI insights. Your data is private and secure.")
 
+def stream_insight(chunks) -> str:
+    """Show an AI response as it streams in and return the full text.
+
+    If the stream breaks off partway, the returned text starts with the
+    error (then the partial text), so callers don't save it as an insight.
+    """
+    received = []
+    
+    def collect():
+        for chunk in chunks:
+            received.append(chunk)
+            yield chunk
+    
+    placeholder = st.empty()
+    try:
+        with placeholder.container():
+            content = st.write_stream(collect())
+    except InsightStreamError as e:
+        content = f"{e}\n\n{''.join(received)}"
+    # The finished text is re-rendered in an insight card by the caller
+    placeholder.empty()
+    return content
+
+def run_ai_insight(domain: str, stream, generate) -> str:
+    """Get a page's AI insight and return its text.
+
+    With structured findings on (Settings), the insight is requested as
+    validated JSON and its findings, triggers and recommendations are
+    indexed for Past Findings; otherwise it is streamed as prose.
+    `stream` and `generate` call the domain's stream_* / generate_* function.
+    """
+    if not st.session_state.get('structured_insights', True):
+        return stream_insight(stream())
+    
+    with st.spinner("Analyzing..."):
+        result = generate()
+    if isinstance(result, str):
+        # Missing key, error or the local fallback: nothing to index
+        return result
+    index_structured_insight(st.session_state.username, domain, result)
+    return result['content']
+
+def render_local_insight(domain: str, data):
+    """Show the instant rule-based summary; the AI buttons below add a deeper review."""
+    insight = build_local_insight(domain, data)
+    if not insight['findings'] and not insight['recommendations']:
+        return
+    st.markdown(f'<div class="insight-card"><strong>⚡ Instant summary ({insight["seconds"] * 1000:.0f} ms, no AI):</strong><br>{insight["content"]}</div>', unsafe_allow_html=True)
+
+def render_trend_chart(oura_df: pd.DataFrame, trends: pd.DataFrame, metric: str, label: str):
+    """Plot a daily OURA metric with its 7- and 30-day rolling means."""
+    if metric not in oura_df.columns or f"{metric}_7d" not in trends.columns:
+        return
+    chart_data = pd.DataFrame({
+        label: oura_df.set_index('date')[metric],
+        '7-day avg': trends.set_index('date')[f"{metric}_7d"],
+        '30-day avg': trends.set_index('date')[f"{metric}_30d"]
+    })
+    if chart_data[label].notna().any():
+        st.line_chart(chart_data)
+        st.caption(f"{label} Over Time")
+
+def render_background_insight_job(domain: str, oura_data=None):
+    """Let the user queue an insight in the background and poll its status.
+
+    The job survives reruns and page changes; the finished insight is saved
+    to the same place as the page's own button saves it.
+    """
+    job_key = f"insight_job_{domain}"
+    
+    if st.button("⏳ Generate in Background", key=f"enqueue_{domain}"):
+        job_id = enqueue_insight_job(st.session_state.username, domain, oura_data=oura_data)
+        if job_id is None:
+            st.info("Nothing to analyze yet.")
+        st.session_state[job_key] = job_id
+    
+    job_id = st.session_state.get(job_key)
+    if not job_id:
+        return
+    
+    job = get_job(job_id)
+    if job is None:
+        return
+    
+    if job['status'] in ('queued', 'running'):
+        st.info(f"Background insight is {job['status']}...")
+        st.button("🔄 Check Status", key=f"poll_{domain}")
+    elif job['status'] == 'done':
+        st.success("✅ Background insight ready and saved!")
+        st.markdown(f'<div class="insight-card"><strong>🤖 AI Analysis:</strong><br>{job["result"]}</div>', unsafe_allow_html=True)
+        del st.session_state[job_key]
+    else:
+        st.error(f"Background insight failed: {job['error']}")
+        del st.session_state[job_key]
+
+def apply_autocomplete_suggestion(widget_key: str, suggestion: str):
+    """Replace the line being typed in a text area with the chosen suggestion."""
+    lines = st.session_state.get(widget_key, '').split('\n')
+    lines[-1] = suggestion
+    st.session_state[widget_key] = '\n'.join(lines) + '\n'
+
+def render_autocomplete_suggestions(field: str, widget_key: str):
+    """Show ranked completions from the user's history under a text area."""
+    current_value = st.session_state.get(widget_key, '')
+    lines = current_value.split('\n')
+    suggestions = get_completions(
+        st.session_state.username,
+        field,
+        lines[-1],
+        k=5,
+        exclude=[line for line in lines[:-1] if line.strip()]
+    )
+    
+    if suggestions:
+        columns = st.columns(len(suggestions))
+        for i, suggestion in enumerate(suggestions):
+            with columns[i]:
+                st.button(
+                    suggestion,
+                    key=f"suggest_{widget_key}_{i}",
+                    on_click=apply_autocomplete_suggestion,
+                    args=(widget_key, suggestion)
+                )
+
 def food_journal_page():
     st.markdown('<h2 class="section-header">📝 Log Your Food & Health</h2>', unsafe_allow_html=True)
     
@@ -312,8 +494,10 @@ def food_journal_page():
         # Food items input
         food_input = st.text_area(
             "Food Items (one per line)",
-            placeholder="Enter each food item on a new line\nExample:\nOatmeal\nBanana\nAlmonds"
+            placeholder="Enter each food item on a new line\nExample:\nOatmeal\nBanana\nAlmonds",
+            key="food_input"
         )
+        render_autocomplete_suggestions("food_items", "food_input")
         
         # Convert food input to list
         food_items = [item.strip() for item in food_input.split('\n') if item.strip()] if food_input else []
@@ -321,8 +505,10 @@ def food_journal_page():
         # Supplements input
         supplements_input = st.text_area(
             "Supplements (one per line)",
-            placeholder="Enter each supplement on a new line\nExample:\nVitamin D\nOmega-3"
+            placeholder="Enter each supplement on a new line\nExample:\nVitamin D\nOmega-3",
+            key="supplements_input"
         )
+        render_autocomplete_suggestions("supplements", "supplements_input")
         
         # Convert supplements input to list
         supplements = [item.strip() for item in supplements_input.split('\n') if item.strip()] if supplements_input else []
@@ -333,8 +519,10 @@ def food_journal_page():
         # Symptoms input
         symptoms_input = st.text_area(
             "Symptoms (one per line)",
-            placeholder="Enter any symptoms you experienced\nExample:\nBloating\nFatigue\nHeadache"
+            placeholder="Enter any symptoms you experienced\nExample:\nBloating\nFatigue\nHeadache",
+            key="symptoms_input"
         )
+        render_autocomplete_suggestions("symptoms", "symptoms_input")
         
         # Convert symptoms input to list
         symptoms = [item.strip() for item in symptoms_input.split('\n') if item.strip()] if symptoms_input else []
@@ -383,6 +571,7 @@ def food_journal_page():
             current_entries = load_user_data(st.session_state.username, "food_journal.json")
             current_entries.append(entry)
             save_user_data(st.session_state.username, "food_journal.json", current_entries)
+            update_autocomplete_index(st.session_state.username, entry)
             
             st.success("✅ Food entry saved successfully!")
             
@@ -420,12 +609,36 @@ def food_journal_page():
                     # Remove entry from user data
                     user_entries.remove(entry)
                     save_user_data(st.session_state.username, "food_journal.json", user_entries)
+                    invalidate_autocomplete_index(st.session_state.username)
                     st.success("✅ Entry deleted!")
                     st.rerun()
         
         # Show count if more than 10 entries
         if len(todays_entries) > 10:
             st.info(f"📊 Showing last 10 of {len(todays_entries)} today's entries")
+        
+        # Today's nutrition totals from the local nutrient table
+        st.markdown('<h4>🥗 Today\'s Nutrition (estimated)</h4>', unsafe_allow_html=True)
+        daily_totals = get_daily_nutrition_totals(todays_entries)
+        
+        if not daily_totals.empty:
+            totals = daily_totals.iloc[0]
+            col1, col2, col3, col4, col5 = st.columns(5)
+            
+            with col1:
+                st.metric("Calories", f"{totals['calories']:.0f}")
+            with col2:
+                st.metric("Protein", f"{totals['protein_g']:.1f} g")
+            with col3:
+                st.metric("Carbs", f"{totals['carbs_g']:.1f} g")
+            with col4:
+                st.metric("Fat", f"{totals['fat_g']:.1f} g")
+            with col5:
+                st.metric("Fiber", f"{totals['fiber_g']:.1f} g")
+        
+        unmatched_foods = get_unmatched_foods(todays_entries)
+        if unmatched_foods:
+            st.caption(f"Not in nutrient database: {', '.join(unmatched_foods)}")
     else:
         st.info("No entries for today yet. Start logging your meals!")
     
@@ -447,27 +660,33 @@ def food_journal_page():
                 recent_entries.append(entry)
     
     if recent_entries:
+        render_local_insight('food', {'entries': recent_entries})
+        
         if st.button("🔍 Generate AI Insights", type="secondary"):
-            with st.spinner("Analyzing your food journal data..."):
-                insight_content = generate_ai_insights(recent_entries)
-                
-                if insight_content and not insight_content.startswith("Error"):
-                    # Save the insight to user-specific file
-                    insight = {
-                        'content': insight_content,
-                        'entries_analyzed': len(recent_entries),
-                        'date_range': f"{start_date} to {end_date}",
-                        'timestamp': datetime.now().isoformat()
-                    }
-                    user_insights = load_user_data(st.session_state.username, "insights.json")
-                    user_insights.append(insight)
-                    save_user_data(st.session_state.username, "insights.json", user_insights)
-                    st.success("✅ Insights generated and saved!")
+            insight_content = run_ai_insight(
+                'food', lambda: stream_ai_insights(recent_entries),
+                lambda: generate_ai_insights(recent_entries, structured=True)
+            )
                 
-                st.markdown(f'<div class="insight-card"><strong>🤖 AI Analysis:</strong><br>{insight_content}</div>', unsafe_allow_html=True)
+            if insight_content and not insight_content.startswith("Error") and not is_fallback_insight(insight_content):
+                # Save the insight to user-specific file
+                insight = {
+                    'content': insight_content,
+                    'entries_analyzed': len(recent_entries),
+                    'date_range': f"{start_date} to {end_date}",
+                    'timestamp': datetime.now().isoformat()
+                }
+                user_insights = load_user_data(st.session_state.username, "insights.json")
+                user_insights.append(insight)
+                save_user_data(st.session_state.username, "insights.json", user_insights)
+                st.success("✅ Insights generated and saved!")
+                
+            st.markdown(f'<div class="insight-card"><strong>🤖 AI Analysis:</strong><br>{insight_content}</div>', unsafe_allow_html=True)
         else:
             st.info("Add some entries to generate AI insights!")
         
+        render_background_insight_job('food')
+        
         # Display past insights
         st.markdown('<h4>📊 Recent Insights</h4>', unsafe_allow_html=True)
     
@@ -518,6 +737,7 @@ def food_journal_page():
                     # Remove entry from user data
                     user_entries.remove(entry)
                     save_user_data(st.session_state.username, "food_journal.json", user_entries)
+                    invalidate_autocomplete_index(st.session_state.username)
                     st.success("✅ Entry deleted!")
                     st.rerun()
         
@@ -526,6 +746,45 @@ def food_journal_page():
             st.info(f"📊 Showing last 10 of {len(user_entries)} total entries")
     else:
         st.info("No entries found. Start logging your meals!")
+    
+    # Symptom look-back section
+    st.markdown('<h3 class="section-header">🔎 What Did I Eat Before This Symptom?</h3>', unsafe_allow_html=True)
+    
+    symptom_index = get_symptom_index(st.session_state.username, user_entries)
+    symptom_counts = get_symptom_counts(symptom_index)
+    
+    if symptom_counts:
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            selected_symptom = st.selectbox(
+                "Symptom",
+                [symptom for symptom, _ in symptom_counts],
+                format_func=lambda symptom: f"{symptom} ({dict(symptom_counts)[symptom]} times)"
+            )
+        
+        with col2:
+            lookback_hours = st.slider("Look-back window (hours)", min_value=1, max_value=72, value=24)
+        
+        # Foods that show up most often before this symptom
+        top_foods = get_foods_before_symptom(symptom_index, selected_symptom, lookback_hours)
+        if top_foods:
+            st.markdown(f"**🍽️ Foods most often eaten within {lookback_hours}h before {selected_symptom}**")
+            top_foods_df = pd.DataFrame(top_foods)
+            top_foods_df['share'] = (top_foods_df['share'] * 100).round(0).astype(int).astype(str) + '%'
+            st.dataframe(top_foods_df, use_container_width=True)
+        
+        # Individual occurrences (latest 10)
+        occurrences = get_entries_before_symptom(symptom_index, selected_symptom, lookback_hours)
+        for occurrence in occurrences[:10]:
+            with st.expander(f"⚠️ {selected_symptom} on {occurrence['time'].strftime('%b %d, %Y at %I:%M %p')} ({len(occurrence['window'])} entries)"):
+                for entry in occurrence['window']:
+                    st.markdown(f'<div class="entry-card">{format_entry_for_display(entry)}</div>', unsafe_allow_html=True)
+        
+        if len(occurrences) > 10:
+            st.info(f"📊 Showing last 10 of {len(occurrences)} occurrences")
+    else:
+        st.info("No symptoms logged yet. Symptoms you record will show up here with the meals before them.")
 
 def oura_analysis_page():
     st.markdown('<h2 class="section-header">📊 OURA Sleep & Activity Analysis</h2>', unsafe_allow_html=True)
@@ -539,36 +798,29 @@ def oura_analysis_page():
         help="Upload your OURA ring data export (CSV format)"
     )
     
-    # Initialize session state for OURA data
-    if 'oura_data' not in st.session_state:
-        st.session_state.oura_data = None
-    if 'oura_stats' not in st.session_state:
-        st.session_state.oura_stats = None
-    
-    if uploaded_file is not None:
+    # Each upload is merged into the stored history once, not on every rerun
+    if uploaded_file is not None and st.session_state.get('oura_upload_id') != uploaded_file.file_id:
         try:
-            # Save uploaded file temporarily
-            with open("temp_oura.csv", "wb") as f:
-                f.write(uploaded_file.getbuffer())
-            
-            # Parse OURA data
-            oura_df = parse_oura_csv("temp_oura.csv")
-            st.session_state.oura_data = oura_df
-            st.session_state.oura_stats = get_oura_summary_stats(oura_df)
+            # Parse OURA data straight from the upload's in-memory buffer
+            counts = upsert_oura_data(st.session_state.username, parse_oura_csv(uploaded_file))
+            st.session_state.oura_upload_id = uploaded_file.file_id
             
-            # Clean up temp file
-            os.remove("temp_oura.csv")
-            
-            st.success(f"✅ Successfully loaded {len(oura_df)} days of OURA data!")
+            st.success(f"✅ Saved your OURA data: {counts['added']} new days, {counts['updated']} updated, "
+                       f"{counts['unchanged']} unchanged.")
             
         except Exception as e:
             st.error(f"❌ Error parsing OURA file: {str(e)}")
             st.info("Please ensure your CSV file contains OURA ring data with columns like 'Date', 'Sleep Score', 'Readiness Score', etc.")
     
+    # Stored OURA history and its rolling trends (shared cache; no upload needed after the first)
+    oura_df = load_oura_data(st.session_state.username)
+    trends = load_oura_trends(st.session_state.username)
+    
     # Display OURA data if available
-    if st.session_state.oura_data is not None:
-        oura_df = st.session_state.oura_data
-        stats = st.session_state.oura_stats
+    if oura_df is not None and not oura_df.empty:
+        stats = get_oura_summary_stats(oura_df)
+        st.caption(f"{len(oura_df)} days stored, {oura_df['date'].min():%Y-%m-%d} to {oura_df['date'].max():%Y-%m-%d}. "
+                   "Upload a newer export to add days.")
         
         # Summary statistics
         st.subheader("📈 Summary Statistics")
@@ -591,7 +843,7 @@ def oura_analysis_page():
             if 'best_sleep_score' in stats:
                 st.metric("Best Sleep Score", f"{stats['best_sleep_score']:.1f}")
             if 'total_steps' in stats:
-                st.metric("Total Steps", f"{stats['total_steps']:,}")
+                st.metric("Total Steps", f"{stats['total_steps']:,.0f}")
         
         with col4:
             if 'worst_sleep_score' in stats:
@@ -599,6 +851,30 @@ def oura_analysis_page():
             if 'total_sleep_hours' in stats:
                 st.metric("Total Sleep Hours", f"{stats['total_sleep_hours']:.1f}")
         
+        # Rolling trends: last 7 days against the last 30
+        st.subheader("📉 Rolling Trends")
+        latest = get_latest_trends(trends)
+        trend_labels = {'sleep_score': "Sleep Score", 'sleep_hours': "Sleep Hours",
+                        'readiness_score': "Readiness", 'hrv': "HRV"}
+        trend_columns = st.columns(len(trend_labels))
+        for column, (metric, label) in zip(trend_columns, trend_labels.items()):
+            values = latest.get(metric, {})
+            if 'avg_7d' in values and 'avg_30d' in values:
+                with column:
+                    st.metric(f"{label} (7-day avg)", f"{values['avg_7d']:.1f}",
+                              f"{values['avg_7d'] - values['avg_30d']:+.1f} vs 30-day")
+        
+        anomalies = get_anomalous_nights(trends, days=90)
+        if anomalies:
+            st.warning(f"⚠️ {len(anomalies)} unusual night(s) in the last 90 days "
+                       f"(a metric more than {OURA_ANOMALY_Z:g} standard deviations from its previous 30 days):")
+            st.dataframe(pd.DataFrame([
+                {'date': night['date'], 'metric': metric, 'z-score': values['z'], 'change vs night before': values['change']}
+                for night in anomalies for metric, values in night['metrics'].items()
+            ]), use_container_width=True, hide_index=True)
+        else:
+            st.caption("No unusual nights in the last 90 days.")
+        
         # Data table
         st.subheader("📋 OURA Data Table")
         
@@ -618,11 +894,7 @@ def oura_analysis_page():
         tab1, tab2, tab3 = st.tabs(["Sleep Trends", "Activity Patterns", "Correlation Analysis"])
         
         with tab1:
-            if 'sleep_score' in oura_df.columns and 'date' in oura_df.columns:
-                chart_data = oura_df[['date', 'sleep_score']].dropna()
-                if not chart_data.empty:
-                    st.line_chart(chart_data.set_index('date'))
-                    st.caption("Sleep Score Over Time")
+            render_trend_chart(oura_df, trends, 'sleep_score', "Sleep Score")
         
         with tab2:
             if 'activity_score' in oura_df.columns and 'date' in oura_df.columns:
@@ -632,11 +904,7 @@ def oura_analysis_page():
                     st.caption("Activity Score Over Time")
         
         with tab3:
-            if 'readiness_score' in oura_df.columns and 'date' in oura_df.columns:
-                chart_data = oura_df[['date', 'readiness_score']].dropna()
-                if not chart_data.empty:
-                    st.line_chart(chart_data.set_index('date'))
-                    st.caption("Readiness Score Over Time")
+            render_trend_chart(oura_df, trends, 'readiness_score', "Readiness Score")
         
         # AI Insights Generation
         st.subheader("🤖 AI Insights: Sleep & Food Correlation")
@@ -648,19 +916,25 @@ def oura_analysis_page():
         if food_entries:
             st.info(f"Found {len(food_entries)} food journal entries for correlation analysis.")
             
+            render_local_insight('oura', {'oura_data': oura_df, 'food_entries': food_entries, 'oura_trends': trends})
+            
             if st.button("🔍 Generate OURA + Food Insights", type="secondary"):
-                with st.spinner("Analyzing sleep patterns and food correlations..."):
-                    insight_content = generate_oura_insights(oura_df, food_entries)
+                insight_content = run_ai_insight(
+                    'oura', lambda: stream_oura_insights(oura_df, food_entries, trends),
+                    lambda: generate_oura_insights(oura_df, food_entries, trends, structured=True)
+                )
                     
-                    if insight_content and not insight_content.startswith("Error"):
-                        # Save the insight
-                        save_oura_insight(insight_content, len(oura_df), len(food_entries))
-                        st.success("✅ OURA insights generated and saved!")
+                if insight_content and not insight_content.startswith("Error") and not is_fallback_insight(insight_content):
+                    # Save the insight
+                    save_oura_insight(insight_content, len(oura_df), len(food_entries))
+                    st.success("✅ OURA insights generated and saved!")
                     
-                    st.markdown(f'<div class="insight-card"><strong>🤖 OURA Analysis:</strong><br>{insight_content}</div>', unsafe_allow_html=True)
+                st.markdown(f'<div class="insight-card"><strong>🤖 OURA Analysis:</strong><br>{insight_content}</div>', unsafe_allow_html=True)
         else:
             st.warning("No food journal entries found. Add some food entries to enable correlation analysis.")
         
+        render_background_insight_job('oura')
+        
         # Display past OURA insights
         st.subheader("📊 Previous OURA Insights")
         
@@ -670,6 +944,13 @@ def oura_analysis_page():
                 st.markdown(f'<div class="insight-card"><strong>📊 OURA Analysis:</strong><br>{format_oura_insight_for_display(insight)}</div>', unsafe_allow_html=True)
         else:
             st.info("No OURA insights generated yet. Generate your first insight!")
+        
+        with st.expander("🗑️ Delete stored OURA data"):
+            st.caption("Removes your saved OURA history; insights generated from it are kept.")
+            if st.button("Delete OURA data", key="delete_oura_data"):
+                delete_oura_data(st.session_state.username)
+                st.session_state.pop('oura_upload_id', None)
+                st.rerun()
     
     else:
         st.info("📁 Please upload your OURA CSV file to begin analysis.")
@@ -955,19 +1236,25 @@ def task_manager_page():
     all_tasks = load_tasks()
     
     if all_tasks:
+        render_local_insight('tasks', {'tasks': all_tasks})
+        
         if st.button("🔍 Generate Task Insights", type="secondary"):
-            with st.spinner("Analyzing your task patterns..."):
-                insight_content = generate_task_insights(all_tasks)
+            insight_content = run_ai_insight(
+                'tasks', lambda: stream_task_insights(all_tasks),
+                lambda: generate_task_insights(all_tasks, structured=True)
+            )
                 
-                if insight_content and not insight_content.startswith("Error"):
-                    # Save the insight
-                    save_task_insight(insight_content, len(all_tasks))
-                    st.success("✅ Task insights generated and saved!")
+            if insight_content and not insight_content.startswith("Error") and not is_fallback_insight(insight_content):
+                # Save the insight
+                save_task_insight(insight_content, len(all_tasks))
+                st.success("✅ Task insights generated and saved!")
                 
-                st.markdown(f'<div class="insight-card"><strong>🤖 Task Analysis:</strong><br>{insight_content}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="insight-card"><strong>🤖 Task Analysis:</strong><br>{insight_content}</div>', unsafe_allow_html=True)
     else:
         st.info("Add some tasks to generate AI insights!")
     
+    render_background_insight_job('tasks')
+    
     # Display past task insights
     st.subheader("📊 Previous Task Insights")
     
@@ -1292,19 +1579,25 @@ def goal_tracker_page():
     all_goals = load_goals()
     
     if all_goals:
+        render_local_insight('goals', {'goals': all_goals})
+        
         if st.button("🔍 Generate Goal Insights", type="secondary"):
-            with st.spinner("Analyzing your goal patterns..."):
-                insight_content = generate_goal_insights(all_goals)
+            insight_content = run_ai_insight(
+                'goals', lambda: stream_goal_insights(all_goals),
+                lambda: generate_goal_insights(all_goals, structured=True)
+            )
                 
-                if insight_content and not insight_content.startswith("Error"):
-                    # Save the insight
-                    save_goal_insight(insight_content, len(all_goals))
-                    st.success("✅ Goal insights generated and saved!")
+            if insight_content and not insight_content.startswith("Error") and not is_fallback_insight(insight_content):
+                # Save the insight
+                save_goal_insight(insight_content, len(all_goals))
+                st.success("✅ Goal insights generated and saved!")
                 
-                st.markdown(f'<div class="insight-card"><strong>🤖 Goal Analysis:</strong><br>{insight_content}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="insight-card"><strong>🤖 Goal Analysis:</strong><br>{insight_content}</div>', unsafe_allow_html=True)
     else:
         st.info("Add some goals to generate AI insights!")
     
+    render_background_insight_job('goals')
+    
     # Display past goal insights
     st.subheader("📊 Previous Goal Insights")
     
@@ -1563,19 +1856,25 @@ def meal_planning_page():
             if current_symptoms:
                 symptoms_list = [s.strip() for s in current_symptoms.split(',')]
             
+            render_local_insight('meals', {'food_entries': food_entries, 'symptoms': symptoms_list})
+            
             if st.button("🔍 Generate Meal Recommendations", type="secondary"):
-                with st.spinner("Analyzing your food patterns and generating recommendations..."):
-                    recommendations = generate_meal_recommendations(food_entries, symptoms_list)
+                recommendations = run_ai_insight(
+                    'meals', lambda: stream_meal_recommendations(food_entries, symptoms_list),
+                    lambda: generate_meal_recommendations(food_entries, symptoms_list, structured=True)
+                )
                     
-                    if recommendations and not recommendations.startswith("Error"):
-                        # Save the insight
-                        save_meal_insight(recommendations, len(food_entries))
-                        st.success("✅ Meal recommendations generated and saved!")
+                if recommendations and not recommendations.startswith("Error") and not is_fallback_insight(recommendations):
+                    # Save the insight
+                    save_meal_insight(recommendations, len(food_entries))
+                    st.success("✅ Meal recommendations generated and saved!")
                     
-                    st.markdown(f'<div class="insight-card"><strong>🤖 Meal Recommendations:</strong><br>{recommendations}</div>', unsafe_allow_html=True)
+                st.markdown(f'<div class="insight-card"><strong>🤖 Meal Recommendations:</strong><br>{recommendations}</div>', unsafe_allow_html=True)
         else:
             st.info("No food journal entries found. Log some meals first to get personalized recommendations!")
         
+        render_background_insight_job('meals')
+        
         # Display past meal insights
         st.subheader("📊 Previous Meal Insights")
         
@@ -1959,19 +2258,25 @@ def selfcare_page():
     all_tasks = load_selfcare_tasks()
     
     if all_tasks:
+        render_local_insight('selfcare', {'tasks': all_tasks})
+        
         if st.button("🔍 Generate Self-Care Insights", type="secondary"):
-            with st.spinner("Analyzing your self-care patterns..."):
-                insight_content = generate_selfcare_insights(all_tasks)
+            insight_content = run_ai_insight(
+                'selfcare', lambda: stream_selfcare_insights(all_tasks),
+                lambda: generate_selfcare_insights(all_tasks, structured=True)
+            )
                 
-                if insight_content and not insight_content.startswith("Error"):
-                    # Save the insight
-                    save_selfcare_insight(insight_content, len(all_tasks))
-                    st.success("✅ Self-care insights generated and saved!")
+            if insight_content and not insight_content.startswith("Error") and not is_fallback_insight(insight_content):
+                # Save the insight
+                save_selfcare_insight(insight_content, len(all_tasks))
+                st.success("✅ Self-care insights generated and saved!")
                 
-                st.markdown(f'<div class="insight-card"><strong>🤖 Self-Care Analysis:</strong><br>{insight_content}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="insight-card"><strong>🤖 Self-Care Analysis:</strong><br>{insight_content}</div>', unsafe_allow_html=True)
     else:
         st.info("Add some self-care tasks to generate AI insights!")
     
+    render_background_insight_job('selfcare')
+    
     # Display past self-care insights
     st.subheader("📊 Previous Self-Care Insights")
     
@@ -1984,9 +2289,205 @@ def selfcare_page():
     else:
         st.info("No self-care insights generated yet. Generate your first insight!")
 
+def elimination_diet_page():
+    st.markdown('<h2 class="section-header">🧪 Elimination Diet Experiments</h2>', unsafe_allow_html=True)
+    
+    # Experiment creation form
+    st.subheader("➕ Start New Experiment")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        experiment_name = st.text_input(
+            "Experiment Name",
+            placeholder="e.g., No dairy for 3 weeks"
+        )
+        
+        foods_removed_input = st.text_area(
+            "Foods Removed (one per line)",
+            placeholder="Enter each food you are cutting out\nExample:\nMilk\nCheese"
+        )
+        
+        target_symptoms_input = st.text_area(
+            "Target Symptoms (one per line, empty = all symptoms)",
+            placeholder="Example:\nBloating\nFatigue"
+        )
+    
+    with col2:
+        experiment_start = st.date_input("Start Date", value=date.today(), key="experiment_start")
+        experiment_end = st.date_input("End Date", value=date.today() + timedelta(days=21), key="experiment_end")
+        baseline_days = st.number_input(
+            "Baseline Days (before start)",
+            min_value=3,
+            max_value=180,
+            value=21,
+            help="Days before the start date used as the comparison period"
+        )
+    
+    if st.button("💾 Start Experiment", type="primary"):
+        foods_removed = [item.strip() for item in foods_removed_input.split('\n') if item.strip()]
+        target_symptoms = [item.strip() for item in target_symptoms_input.split('\n') if item.strip()]
+        
+        if not experiment_name:
+            st.error("Please enter an experiment name.")
+        elif not foods_removed:
+            st.error("Please enter at least one food to remove.")
+        elif experiment_end < experiment_start:
+            st.error("End date must be on or after the start date.")
+        else:
+            experiment = create_experiment(
+                experiment_name,
+                foods_removed,
+                target_symptoms,
+                experiment_start,
+                experiment_end,
+                int(baseline_days)
+            )
+            save_experiment(st.session_state.username, experiment)
+            st.success("✅ Experiment started!")
+            st.rerun()
+    
+    # Experiment results
+    st.subheader("📊 Your Experiments")
+    
+    experiments = load_experiments(st.session_state.username)
+    user_entries = load_user_data(st.session_state.username, "food_journal.json")
+    
+    if experiments:
+        for experiment in reversed(experiments):
+            # Only recompute when new entries landed in the experiment window
+            if refresh_experiment(experiment, user_entries):
+                save_experiment(st.session_state.username, experiment)
+            
+            result = experiment['result']
+            symptoms_label = ', '.join(experiment['target_symptoms']) or 'all symptoms'
+            
+            with st.expander(f"🧪 {experiment['name']} ({experiment['start_date']} to {experiment['end_date']})", expanded=True):
+                st.caption(f"Removed: {', '.join(experiment['foods_removed'])} • Tracking: {symptoms_label} • Baseline: {experiment['baseline_days']} days")
+                
+                if result.get('status') == 'ok':
+                    col1, col2, col3, col4 = st.columns(4)
+                    
+                    with col1:
+                        st.metric("Before (symptoms/day)", f"{result['baseline_rate']:.2f}")
+                    
+                    with col2:
+                        percent_change = result['percent_change']
+                        st.metric(
+                            "During (symptoms/day)",
+                            f"{result['experiment_rate']:.2f}",
+                            delta=f"{percent_change:.0f}%" if percent_change is not None else None,
+                            delta_color="inverse"
+                        )
+                    
+                    with col3:
+                        st.metric("p-value", f"{result['p_value']:.3f}")
+                    
+                    with col4:
+                        ci_low, ci_high = result['confidence_interval']
+                        st.metric("95% CI of change", f"{ci_low:+.2f} to {ci_high:+.2f}")
+                    
+                    if result['p_value'] < 0.05:
+                        st.success("✅ The change in symptoms is statistically significant.")
+                    else:
+                        st.info("ℹ️ No significant change yet. Keep logging to gather more data.")
+                else:
+                    st.warning("Not enough logged days yet. Log meals during both the baseline and experiment periods.")
+                
+                st.caption(f"Logged days: {result['baseline_days_logged']} baseline, {result['experiment_days_logged']} experiment • Slip-ups: {result['violations']}")
+                
+                if st.button("🗑️ Delete", key=f"delete_experiment_{experiment['id']}"):
+                    delete_experiment(st.session_state.username, experiment['id'])
+                    st.success("Experiment deleted!")
+                    st.rerun()
+    else:
+        st.info("No experiments yet. Start one above to see whether cutting a food changes your symptoms!")
+
+def render_batch_insight_result(result):
+    """Show one domain's result from the generate-all action."""
+    label = DOMAIN_LABELS[result['domain']]
+    if result['status'] == 'ok':
+        if result['mode'] == 'incremental':
+            label = f"{label}, update from {result['new_records']} new records"
+        st.markdown(f'<div class="insight-card"><strong>🤖 {label} ({result["seconds"]:.1f}s):</strong><br>{result["content"]}</div>', unsafe_allow_html=True)
+    elif result['status'] == 'skipped':
+        st.caption(f"{label}: {result['content']}")
+    elif result['status'] == 'unchanged':
+        st.caption(f"{label}: nothing new since the last insight.")
+    elif result['status'] == 'local':
+        st.markdown(f'<div class="insight-card"><strong>⚡ {label}, instant summary (AI unavailable):</strong><br>{result["content"]}</div>', unsafe_allow_html=True)
+    else:
+        st.error(f"{label}: {result['content']}")
+
+def render_past_findings(username: str):
+    """Trigger foods, recommendations and findings from past structured insights."""
+    st.subheader("🔎 Past Findings")
+    
+    trigger_foods = get_trigger_foods(username)
+    if not trigger_foods and not get_findings(username, limit=1):
+        st.info("Generate structured insights to collect searchable findings here.")
+        return
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("**Trigger foods named in past insights**")
+        if trigger_foods:
+            triggers_df = pd.DataFrame(trigger_foods)
+            triggers_df['symptoms'] = triggers_df['symptoms'].str.join(', ')
+            st.dataframe(triggers_df, use_container_width=True, hide_index=True)
+        else:
+            st.caption("No trigger foods yet.")
+    
+    with col2:
+        rec_type = st.selectbox("Recommendation type", ["All"] + RECOMMENDATION_TYPES, key="past_rec_type")
+        recommendations = get_recommendations(username, rec_type=None if rec_type == "All" else rec_type)
+        for recommendation in recommendations[:10]:
+            st.markdown(f"- {recommendation['text']} *({recommendation['type'].replace('_', ' ')}, "
+                        f"given {recommendation['times_given']}x)*")
+        if not recommendations:
+            st.caption("No recommendations of this type yet.")
+    
+    search = st.text_input("Search findings", key="past_findings_search")
+    for finding in get_findings(username, search=search or None, limit=10):
+        st.markdown(f"- **{finding['title']}** ({DOMAIN_LABELS.get(finding['domain'], finding['domain'])}): "
+                    f"{finding['detail']}")
+
 def analytics_page():
     st.markdown('<h2 class="section-header">📊 Analytics & Trends</h2>', unsafe_allow_html=True)
     
+    # Refresh every domain's insight in one go
+    st.subheader("⚡ Generate All Insights")
+    st.caption("Runs the food, OURA, task, goal, meal and self-care analyses at the same time and saves each one.")
+    
+    incremental = st.checkbox(
+        "Only analyze what's new since the last insight",
+        value=True,
+        help="Sends new records plus a summary of the previous analysis instead of all data"
+    )
+    
+    structured = st.checkbox(
+        "Structured findings (searchable below)",
+        value=True,
+        help="Asks for findings, triggers and recommendations as validated JSON and indexes them"
+    )
+    
+    if st.button("🔍 Generate All Insights", type="secondary"):
+        start = datetime.now()
+        with st.spinner("Generating insights across all areas..."):
+            results = generate_all_insights(
+                st.session_state.username,
+                incremental=incremental,
+                on_result=render_batch_insight_result,
+                structured=structured
+            )
+        
+        generated = sum(1 for r in results.values() if r['status'] == 'ok')
+        elapsed = (datetime.now() - start).total_seconds()
+        st.success(f"✅ Generated and saved {generated} insights in {elapsed:.1f}s")
+    
+    render_past_findings(st.session_state.username)
+    
     # Date range selector with preset options
     st.subheader("📅 Select Date Range for Analysis")
     
@@ -2112,6 +2613,77 @@ def analytics_page():
                 else:
                     st.markdown("No symptoms recorded in this period")
         
+        # Daily nutrition totals
+        st.subheader("🥗 Daily Nutrition (estimated)")
+        daily_totals = get_daily_nutrition_totals(entries)
+        
+        if not daily_totals.empty:
+            col1, col2, col3, col4 = st.columns(4)
+            
+            with col1:
+                st.metric("Avg Calories/Day", f"{daily_totals['calories'].mean():.0f}")
+            with col2:
+                st.metric("Avg Protein/Day", f"{daily_totals['protein_g'].mean():.1f} g")
+            with col3:
+                st.metric("Avg Carbs/Day", f"{daily_totals['carbs_g'].mean():.1f} g")
+            with col4:
+                st.metric("Avg Fat/Day", f"{daily_totals['fat_g'].mean():.1f} g")
+            
+            chart_data = daily_totals.set_index('date')
+            st.line_chart(chart_data[['calories']])
+            st.caption("Estimated Calories Per Day")
+            st.bar_chart(chart_data[['protein_g', 'carbs_g', 'fat_g']])
+            st.caption("Estimated Macros Per Day (g)")
+            
+            unmatched_foods = get_unmatched_foods(entries)
+            if unmatched_foods:
+                st.caption(f"{len(unmatched_foods)} foods not in the nutrient database: {', '.join(unmatched_foods[:10])}")
+        
+        # Meal timing and fasting windows
+        st.subheader("⏰ Meal Timing & Fasting Windows")
+        journal_frame = build_journal_frame(entries)
+        daily_timing = compute_daily_meal_timing(journal_frame)
+        timing_summary = get_meal_timing_summary(entries)
+        
+        if not daily_timing.empty:
+            col1, col2, col3, col4 = st.columns(4)
+            
+            with col1:
+                st.metric("🌅 Avg First Meal", timing_summary['avg_first_meal'])
+                st.metric("🌙 Avg Last Meal", timing_summary['avg_last_meal'])
+            
+            with col2:
+                st.metric("🕐 Avg Eating Window", f"{timing_summary['avg_eating_window_hours']:.1f} h")
+                fast_hours = timing_summary['avg_overnight_fast_hours']
+                st.metric("😴 Avg Overnight Fast", f"{fast_hours:.1f} h" if fast_hours is not None else "N/A")
+            
+            with col3:
+                gap_hours = timing_summary['median_meal_gap_hours']
+                st.metric("↔️ Median Meal Gap", f"{gap_hours:.1f} h" if gap_hours is not None else "N/A")
+                st.metric("⚡ Gaps Under 2h", timing_summary['short_meal_gaps'])
+            
+            with col4:
+                st.metric("🌃 Late Meals (after 20:00)", timing_summary['late_meals_total'])
+                st.metric("📅 Days With Late Meals", timing_summary['days_with_late_meals'])
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                fast_distribution = get_timing_distribution(daily_timing['overnight_fast_hours'].to_numpy())
+                if not fast_distribution.empty:
+                    st.bar_chart(fast_distribution.set_index('hours'))
+                    st.caption("Overnight Fast Distribution (hours)")
+            
+            with col2:
+                gap_distribution = get_timing_distribution(compute_meal_gaps(journal_frame))
+                if not gap_distribution.empty:
+                    st.bar_chart(gap_distribution.set_index('hours'))
+                    st.caption("Inter-Meal Gap Distribution (hours)")
+            
+            timing_chart = daily_timing[['date', 'first_meal', 'last_meal']].set_index('date') / 60
+            st.line_chart(timing_chart)
+            st.caption("First and Last Meal Time Per Day (hour of day)")
+        
         # Meal type distribution
         st.subheader("📊 Meal Type Distribution")
         if meal_types:
@@ -2174,6 +2746,108 @@ def settings_page():
     else:
         st.warning("⚠️ GROQ API key not configured. AI features will be limited.")
     
+    # Kept outside the widget key so it survives switching pages
+    st.session_state.structured_insights = st.checkbox(
+        "Structured findings for page insights",
+        value=st.session_state.get('structured_insights', True),
+        help="Page insights are requested as validated JSON and their findings, triggers and "
+             "recommendations are indexed (searchable under Analytics). Off streams the text instead."
+    )
+    
+    st.markdown("---")
+    
+    st.subheader("⚡ AI Response Cache")
+    
+    cache_metrics = get_cache_metrics()
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Hit Rate", f"{cache_metrics['hit_rate']:.1f}%")
+    
+    with col2:
+        st.metric("Hits / Misses", f"{cache_metrics['hits']} / {cache_metrics['misses']}")
+    
+    with col3:
+        st.metric("Bytes Saved", f"{cache_metrics['bytes_saved'] / 1024:.1f} KB")
+    
+    with col4:
+        st.metric("Cached Responses", f"{cache_metrics['entries']} ({cache_metrics['total_bytes'] / 1024:.1f} KB)")
+    
+    if st.button("🧹 Clear AI Response Cache"):
+        clear_llm_cache()
+        st.success("✅ Cache cleared!")
+        st.rerun()
+    
+    st.markdown("---")
+    
+    st.subheader("🚦 AI Request Scheduler")
+    
+    scheduler_metrics = get_scheduler_metrics()
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("In Flight", f"{scheduler_metrics['inflight']} / {scheduler_metrics['max_inflight']}")
+    
+    with col2:
+        st.metric("Waiting", f"{scheduler_metrics['waiting']} ({scheduler_metrics['waiting_users']} users)")
+    
+    with col3:
+        st.metric("Retries / Rate Limited", f"{scheduler_metrics['retries']} / {scheduler_metrics['rate_limited']}")
+    
+    with col4:
+        st.metric("Avg Queue Wait", f"{scheduler_metrics['avg_wait_seconds']:.2f}s")
+    
+    breaker = get_breaker_state()
+    if breaker['state'] == 'open':
+        st.warning(f"⚡ Circuit breaker open: AI calls paused for {breaker['retry_in_seconds']:.0f}s more; "
+                   "pages show instant summaries meanwhile.")
+    else:
+        st.caption(f"Circuit breaker {breaker['state'].replace('_', '-')}: {breaker['trips']} trips, "
+                   f"{breaker['rejected']} calls served locally, {breaker['slow_calls']} slow calls.")
+    
+    st.markdown("---")
+    
+    st.subheader("📈 AI Call Telemetry (last 24 hours)")
+    
+    telemetry = summarize_telemetry(load_telemetry(since=datetime.now() - timedelta(hours=24)))
+    if telemetry:
+        telemetry_df = pd.DataFrame.from_dict(telemetry, orient='index')
+        telemetry_df.index.name = 'domain'
+        st.dataframe(telemetry_df.round(1), use_container_width=True)
+    else:
+        st.info("No AI calls recorded yet.")
+    
+    with st.expander("🧭 Model Routes"):
+        st.dataframe(pd.DataFrame(get_route_table()), use_container_width=True, hide_index=True)
+    
+    with st.expander("🧩 Prompt Templates"):
+        st.caption("Each prompt starts with this static text, so providers can cache it across requests.")
+        st.dataframe(pd.DataFrame(get_template_table()), use_container_width=True, hide_index=True)
+    
+    st.markdown("---")
+    
+    st.subheader("⏳ Background Insight Queue")
+    
+    queue_metrics = get_job_queue_metrics()
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Queued", queue_metrics['depth'])
+    
+    with col2:
+        st.metric("Running", f"{queue_metrics['running']} / {queue_metrics['workers']} workers")
+    
+    with col3:
+        st.metric("Queue Wait p50 / p95", f"{queue_metrics['wait_p50']:.1f}s / {queue_metrics['wait_p95']:.1f}s")
+    
+    with col4:
+        st.metric("Run Time p50 / p95", f"{queue_metrics['run_p50']:.1f}s / {queue_metrics['run_p95']:.1f}s")
+    
+    st.caption(f"Completed: {queue_metrics['done']} • Failed: {queue_metrics['failed']}")
+    
     st.markdown("---")
     
     st.subheader("📊 User Statistics")
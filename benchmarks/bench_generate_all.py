@@ -0,0 +1,98 @@
+"""Wall-clock time of generating every domain's insight: sequential vs concurrent.
+
+Runs in a scratch directory with synthetic data for all six domains:
+    python -m benchmarks.bench_generate_all --latency-ms 500
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Responses must come from the stub, not the cache, and the rate limit
+# would otherwise throttle the second (concurrent) round
+os.environ['LLM_CACHE_DISABLED'] = '1'
+os.environ.setdefault('LLM_RATE_LIMIT_RPM', '0')
+
+import pandas as pd
+
+from benchmarks.stub_server import start_stub_server
+from utils.llm_client import complete_chat, close_llm_client
+from utils.user_utils import save_user_data
+from utils.insight_domains import INSIGHT_DOMAINS, load_domain_data, build_domain_prompt
+from utils.batch_insights import generate_all_insights
+
+USERNAME = "bench"
+
+def write_synthetic_data() -> pd.DataFrame:
+    """Write journal, task, goal and self-care files; return an OURA frame."""
+    now = datetime.now()
+    entries = [
+        {
+            'timestamp': (now - timedelta(days=day, hours=hour)).isoformat(),
+            'food_items': ['oatmeal', 'coffee'],
+            'supplements': ['magnesium'],
+            'symptoms': ['bloating'] if day % 3 == 0 else []
+        }
+        for day in range(20) for hour in (2, 8, 13)
+    ]
+    save_user_data(USERNAME, "food_journal.json", entries)
+    with open("food_journal.json", 'w') as f:
+        json.dump(entries, f)
+
+    tasks = [{'id': str(i), 'title': f"Task {i}", 'priority': 'High', 'category': 'Work',
+              'completed': i % 2 == 0, 'due_date': now.date().isoformat()} for i in range(10)]
+    with open("tasks.json", 'w') as f:
+        json.dump(tasks, f)
+
+    goals = [{'id': str(i), 'title': f"Goal {i}", 'type': 'Daily', 'category': 'Health',
+              'completed': False, 'target_date': now.date().isoformat()} for i in range(5)]
+    with open("goals.json", 'w') as f:
+        json.dump(goals, f)
+
+    selfcare = [{'id': str(i), 'title': f"Routine {i}", 'category': 'Wellness', 'frequency': 'Daily',
+                 'start_date': now.date().isoformat(), 'completions': []} for i in range(5)]
+    with open("selfcare_tasks.json", 'w') as f:
+        json.dump(selfcare, f)
+
+    return pd.DataFrame({
+        'date': pd.date_range(end=now.date(), periods=20),
+        'sleep_score': range(60, 80),
+        'readiness_score': range(70, 90),
+        'activity_score': range(50, 70)
+    })
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency_ms=args.latency_ms)
+    os.environ['LLM_BASE_URL'] = base_url
+    os.environ['GROQ_API_KEY'] = 'stub'
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        oura_data = write_synthetic_data()
+
+        start = time.perf_counter()
+        for domain in INSIGHT_DOMAINS:
+            complete_chat(**build_domain_prompt(domain, load_domain_data(USERNAME, domain, oura_data=oura_data)))
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = generate_all_insights(USERNAME, oura_data=oura_data)
+        concurrent = time.perf_counter() - start
+
+    slowest = max(r['seconds'] for r in results.values())
+    print(f"{len(INSIGHT_DOMAINS)} domains, stub latency {args.latency_ms:.0f} ms")
+    print(f"sequential   {sequential * 1000:8.1f} ms")
+    print(f"concurrent   {concurrent * 1000:8.1f} ms   (slowest single call {slowest * 1000:.1f} ms, "
+          f"{sum(r['status'] == 'ok' for r in results.values())} saved)")
+
+    close_llm_client()
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
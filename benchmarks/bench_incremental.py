@@ -0,0 +1,58 @@
+"""Prompt size per day: full re-analysis vs incremental delta insights.
+
+Simulates a user logging three meals a day and generating a food insight
+every day (the LLM response is a fixed stub text, nothing is sent):
+    python -m benchmarks.bench_incremental --days 30
+"""
+import argparse
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+from benchmarks.bench_prompt_tokens import FOODS, SYMPTOMS
+from benchmarks.stub_server import DEFAULT_RESPONSE_TEXT
+from utils.prompt_utils import estimate_tokens
+from utils.user_utils import load_user_data, save_user_data
+from utils.insight_domains import load_domain_data, build_domain_prompt, save_domain_insight
+from utils.incremental_insights import plan_domain_insight, build_insight_metadata
+
+USERNAME = "bench"
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    start = datetime.now() - timedelta(days=args.days)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        print(f"{'day':>4}{'entries':>9}{'full tokens':>13}{'incremental tokens':>20}{'mode':>13}{'records sent':>14}")
+
+        for day in range(args.days):
+            entries = load_user_data(USERNAME, "food_journal.json")
+            for hour in (8, 13, 19):
+                entries.append({
+                    'timestamp': (start + timedelta(days=day)).replace(hour=hour).isoformat(),
+                    'food_items': rng.sample(FOODS, rng.randint(1, 4)),
+                    'supplements': [],
+                    'symptoms': rng.sample(SYMPTOMS, 1) if rng.random() < 0.3 else []
+                })
+            save_user_data(USERNAME, "food_journal.json", entries)
+
+            data = load_domain_data(USERNAME, 'food')
+            full_tokens = estimate_tokens(build_domain_prompt('food', data)['user_prompt'])
+            plan = plan_domain_insight(USERNAME, 'food', data)
+            plan_tokens = estimate_tokens(plan['request']['user_prompt'])
+
+            save_domain_insight(USERNAME, 'food', DEFAULT_RESPONSE_TEXT, data,
+                                build_insight_metadata('food', data, DEFAULT_RESPONSE_TEXT, plan))
+
+            if day < 3 or day % 5 == 4 or day == args.days - 1:
+                print(f"{day + 1:>4}{len(data['entries']):>9}{full_tokens:>13,}{plan_tokens:>20,}"
+                      f"{plan['mode']:>13}{plan['new_records']:>14}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Latency baseline for every generate_* function at several data sizes, against the stub server.
+
+Reports p50/p95 latency of sequential calls, prompt bytes and concurrent
+throughput. Responses come from the stub (the response cache is off):
+    python -m benchmarks.bench_insights --runs 10 --latency-ms 200 --tokens-per-second 500
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+
+# Measure the LLM path itself, not the cache or the rate limiter
+os.environ['LLM_CACHE_DISABLED'] = '1'
+os.environ.setdefault('LLM_RATE_LIMIT_RPM', '0')
+os.environ.setdefault('LLM_MAX_INFLIGHT', '64')
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.stub_server import start_stub_server
+from benchmarks.bench_prompt_tokens import make_entries, make_tasks, make_goals, make_routines
+from utils.llm_client import close_llm_client
+from utils.insight_utils import generate_ai_insights, build_ai_insight_prompt
+from utils.oura_utils import generate_oura_insights, build_oura_insight_prompt
+from utils.task_utils import generate_task_insights, build_task_insight_prompt
+from utils.goal_utils import generate_goal_insights, build_goal_insight_prompt
+from utils.meal_utils import generate_meal_recommendations, build_meal_recommendation_prompt
+from utils.selfcare_utils import generate_selfcare_insights, build_selfcare_insight_prompt
+
+# Data sizes: small, medium, large
+SIZES = {
+    'small': {'days': 7, 'tasks': 20, 'goals': 10, 'routines': 5},
+    'medium': {'days': 30, 'tasks': 200, 'goals': 50, 'routines': 20},
+    'large': {'days': 180, 'tasks': 2000, 'goals': 300, 'routines': 100}
+}
+
+def make_oura(days: int, rng: random.Random) -> pd.DataFrame:
+    return pd.DataFrame({
+        'date': pd.date_range(end=datetime.now().date() - timedelta(days=1), periods=days),
+        'sleep_score': [rng.randint(55, 95) for _ in range(days)],
+        'sleep_hours': [round(rng.uniform(5, 9), 1) for _ in range(days)],
+        'readiness_score': [rng.randint(50, 95) for _ in range(days)],
+        'activity_score': [rng.randint(40, 95) for _ in range(days)]
+    })
+
+def make_cases(size: Dict[str, int], rng: random.Random) -> List[Tuple[str, Callable[[], str], Dict[str, Any]]]:
+    """(name, call, request) for every generate_* function at one data size."""
+    entries = make_entries(size['days'], rng)
+    oura = make_oura(size['days'], rng)
+    tasks = make_tasks(size['tasks'], rng)
+    goals = make_goals(size['goals'], rng)
+    routines = make_routines(size['routines'], rng)
+
+    return [
+        ('generate_ai_insights', lambda: generate_ai_insights(entries), build_ai_insight_prompt(entries)),
+        ('generate_oura_insights', lambda: generate_oura_insights(oura, entries), build_oura_insight_prompt(oura, entries)),
+        ('generate_task_insights', lambda: generate_task_insights(tasks), build_task_insight_prompt(tasks)),
+        ('generate_goal_insights', lambda: generate_goal_insights(goals), build_goal_insight_prompt(goals)),
+        ('generate_meal_recommendations', lambda: generate_meal_recommendations(entries, ['bloating']),
+         build_meal_recommendation_prompt(entries, ['bloating'])),
+        ('generate_selfcare_insights', lambda: generate_selfcare_insights(routines), build_selfcare_insight_prompt(routines))
+    ]
+
+def measure(call: Callable[[], str], runs: int, concurrency: int) -> Dict[str, float]:
+    """Sequential latency percentiles (ms) and concurrent throughput (calls/s)."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = call()
+        timings.append((time.perf_counter() - start) * 1000)
+        if result.startswith("Error"):
+            raise RuntimeError(result)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda _: call(), range(runs * concurrency)))
+    throughput = runs * concurrency / (time.perf_counter() - start)
+
+    return {
+        'p50': float(np.percentile(timings, 50)),
+        'p95': float(np.percentile(timings, 95)),
+        'throughput': throughput
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--tokens-per-second", type=float, default=500.0)
+    parser.add_argument("--response-tokens", type=int, default=150)
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES), choices=list(SIZES))
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(
+        latency_ms=args.latency_ms,
+        token_delay_ms=1000 / args.tokens_per_second,
+        response_tokens=args.response_tokens
+    )
+    os.environ['LLM_BASE_URL'] = base_url
+    os.environ['GROQ_API_KEY'] = 'stub'
+
+    print(f"stub: {args.latency_ms:.0f} ms to first token, {args.tokens_per_second:.0f} tokens/s, "
+          f"{args.response_tokens} response tokens; {args.runs} sequential runs, "
+          f"throughput at concurrency {args.concurrency}")
+    print(f"{'function':<32}{'size':<8}{'prompt bytes':>13}{'p50 ms':>10}{'p95 ms':>10}{'calls/s':>10}")
+
+    rng = random.Random(0)
+    for size_name in args.sizes:
+        for name, call, request in make_cases(SIZES[size_name], rng):
+            prompt_bytes = len(request['system_prompt'].encode('utf-8')) + len(request['user_prompt'].encode('utf-8'))
+            stats = measure(call, args.runs, args.concurrency)
+            print(f"{name:<32}{size_name:<8}{prompt_bytes:>13,}{stats['p50']:>10.1f}{stats['p95']:>10.1f}"
+                  f"{stats['throughput']:>10.2f}")
+
+    close_llm_client()
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
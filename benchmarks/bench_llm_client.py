@@ -0,0 +1,76 @@
+"""Per-call overhead of a fresh LLM client per call vs the shared pooled client.
+
+    python -m benchmarks.bench_llm_client --calls 200
+"""
+import argparse
+import os
+import statistics
+import time
+from typing import Callable, List
+
+import openai
+
+from benchmarks.stub_server import start_stub_server
+from utils.llm_client import get_llm_client, close_llm_client
+
+MESSAGES = [
+    {"role": "system", "content": "You are a benchmark."},
+    {"role": "user", "content": "Say hello."}
+]
+
+def time_calls(call: Callable[[], None], calls: int) -> List[float]:
+    """Time each call in milliseconds."""
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def report(label: str, timings: List[float], connections: int) -> None:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<28} mean {statistics.mean(timings):7.2f} ms   p50 {statistics.median(timings):7.2f} ms   "
+          f"p95 {p95:7.2f} ms   connections {connections}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency_ms=args.latency_ms)
+    os.environ['LLM_BASE_URL'] = base_url
+    os.environ['GROQ_API_KEY'] = 'stub'
+
+    def per_call_client() -> None:
+        # What every generate_* function used to do
+        client = openai.OpenAI(api_key='stub', base_url=base_url)
+        client.chat.completions.create(model="llama3-70b-8192", messages=MESSAGES, max_tokens=100)
+        client.close()
+
+    def shared_client() -> None:
+        get_llm_client().chat.completions.create(model="llama3-70b-8192", messages=MESSAGES, max_tokens=100)
+
+    # Warm up imports and the server
+    per_call_client()
+    shared_client()
+
+    server.state.connections = 0
+    before = time_calls(per_call_client, args.calls)
+    before_connections = server.state.connections
+
+    server.state.connections = 0
+    after = time_calls(shared_client, args.calls)
+    after_connections = server.state.connections
+
+    print(f"{args.calls} calls against {base_url} (stub latency {args.latency_ms:.0f} ms)")
+    report("new client per call", before, before_connections)
+    report("shared pooled client", after, after_connections)
+    print(f"per-call overhead saved: {statistics.mean(before) - statistics.mean(after):.2f} ms")
+
+    close_llm_client()
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""LLM scheduler against a stub that injects 429s: success rate, retries and per-user fairness.
+
+One heavy user bursts many calls while two light users make a few; all
+start at the same time.
+    python -m benchmarks.bench_llm_scheduler --error-rate 0.3 --retry-after 0.2
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+from typing import Dict, List
+
+# Scheduler limits are read at import time; keep the run short and contended
+os.environ.setdefault('LLM_MAX_INFLIGHT', '3')
+os.environ.setdefault('LLM_RATE_LIMIT_RPM', '600')
+os.environ.setdefault('LLM_RATE_LIMIT_BURST', '5')
+os.environ.setdefault('LLM_BACKOFF_BASE_SECONDS', '0.1')
+os.environ['LLM_CACHE_DISABLED'] = '1'
+
+import openai
+
+from benchmarks.stub_server import start_stub_server
+from utils.llm_client import complete_chat, close_llm_client
+from utils.llm_scheduler import set_llm_user, get_scheduler_metrics
+
+USERS = {'heavy': 24, 'light-1': 3, 'light-2': 3}
+
+def run_users(call_for_user) -> Dict[str, List]:
+    """Start every user's calls at once; collect (seconds to finish, ok) per call."""
+    results = {user: [] for user in USERS}
+    start = time.perf_counter()
+
+    def worker(user: str, index: int) -> None:
+        ok = True
+        try:
+            call_for_user(user, index)
+        except Exception:
+            ok = False
+        results[user].append((time.perf_counter() - start, ok))
+
+    threads = [threading.Thread(target=worker, args=(user, i)) for user, count in USERS.items() for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def report(label: str, results: Dict[str, List]) -> None:
+    print(label)
+    for user, calls in results.items():
+        finished = [seconds for seconds, _ in calls]
+        failed = sum(1 for _, ok in calls if not ok)
+        print(f"  {user:<8} calls {len(calls):>3}   failed {failed:>3}   "
+              f"mean finish {statistics.mean(finished):6.2f}s   last finish {max(finished):6.2f}s")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--error-rate", type=float, default=0.3)
+    parser.add_argument("--retry-after", type=float, default=0.2)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency_ms=args.latency_ms, error_rate=args.error_rate,
+                                         retry_after=args.retry_after)
+    os.environ['LLM_BASE_URL'] = base_url
+    os.environ['GROQ_API_KEY'] = 'stub'
+
+    print(f"stub latency {args.latency_ms:.0f} ms, {args.error_rate:.0%} of requests get 429 "
+          f"(Retry-After {args.retry_after}s); max in flight {os.environ['LLM_MAX_INFLIGHT']}")
+
+    # Before: every call goes straight out, errors surface immediately
+    direct = openai.OpenAI(api_key='stub', base_url=base_url, max_retries=0)
+
+    def unscheduled(user: str, index: int) -> None:
+        direct.chat.completions.create(model="stub", messages=[{"role": "user", "content": f"{user} {index}"}])
+
+    report("unscheduled (no retries, no limits)", run_users(unscheduled))
+
+    def scheduled(user: str, index: int) -> None:
+        set_llm_user(user)
+        complete_chat("You are a benchmark.", f"{user} {index}", max_tokens=50)
+
+    server.state.errors = 0
+    report("scheduled", run_users(scheduled))
+
+    metrics = get_scheduler_metrics()
+    print(f"  injected 429s {server.state.errors}, retries {metrics['retries']}, "
+          f"failures {metrics['failures']}, avg queue wait {metrics['avg_wait_seconds']:.2f}s")
+
+    close_llm_client()
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Build time of the rule-based local insights per domain and data size (target: under 50 ms).
+
+    python -m benchmarks.bench_local_insights --runs 20
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from benchmarks.bench_insights import SIZES, make_oura
+from benchmarks.bench_prompt_tokens import make_entries, make_tasks, make_goals, make_routines
+from utils.local_insights import build_local_insight
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'domain':<10}{'size':<8}{'records':>9}{'p50 ms':>9}{'p95 ms':>9}{'findings':>10}{'recs':>6}")
+
+    for size_name, size in SIZES.items():
+        entries = make_entries(size['days'], rng)
+        cases = {
+            'food': {'entries': entries},
+            'meals': {'food_entries': entries, 'symptoms': ['bloating']},
+            'oura': {'oura_data': make_oura(size['days'], rng), 'food_entries': entries},
+            'tasks': {'tasks': make_tasks(size['tasks'], rng)},
+            'goals': {'goals': make_goals(size['goals'], rng)},
+            'selfcare': {'tasks': make_routines(size['routines'], rng)}
+        }
+
+        for domain, data in cases.items():
+            records = sum(len(value) for value in data.values() if hasattr(value, '__len__') and not isinstance(value, str))
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                insight = build_local_insight(domain, data)
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"{domain:<10}{size_name:<8}{records:>9,}{np.percentile(timings, 50):>9.1f}"
+                  f"{np.percentile(timings, 95):>9.1f}{len(insight['findings']):>10}{len(insight['recommendations']):>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Parse time and peak memory of parse_oura_csv on a multi-year OURA export.
+
+Compares the previous approach (write the upload to a temp file, untyped
+read_csv of every column, to_numeric afterwards) with parsing the upload
+buffer directly:
+    python -m benchmarks.bench_oura_parse --years 5 --extra-columns 40 --runs 5
+"""
+import argparse
+import io
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+from utils.oura_utils import OURA_COLUMN_MAPPING, OURA_CSV_ENGINE, parse_oura_csv
+
+def make_export(years: int, extra_columns: int, rng: random.Random) -> bytes:
+    """An OURA-style export: every mapped column plus unmapped ones, one row per day."""
+    days = int(years * 365.25)
+    start = date.today() - timedelta(days=days)
+    columns = {'Date': [(start + timedelta(days=i)).isoformat() for i in range(days)]}
+    for name in OURA_COLUMN_MAPPING:
+        if name == 'Date':
+            continue
+        if name == 'Activity Steps':
+            columns[name] = [rng.randint(2000, 20000) for _ in range(days)]
+        elif name in ('Sleep Duration', 'Sleep In Bed'):
+            columns[name] = [rng.randint(300, 560) for _ in range(days)]
+        else:
+            columns[name] = [round(rng.uniform(40, 100), 1) for _ in range(days)]
+    # Real exports carry many more columns than are analyzed
+    for i in range(extra_columns):
+        columns[f"Extra Metric {i}"] = [round(rng.uniform(0, 1000), 3) for _ in range(days)]
+    return pd.DataFrame(columns).to_csv(index=False).encode('utf-8')
+
+def legacy_parse(buffer: memoryview) -> pd.DataFrame:
+    """The old upload path: temp file, untyped read of all columns, then conversions."""
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "temp_oura.csv")
+        with open(path, "wb") as f:
+            f.write(buffer)
+        df = pd.read_csv(path)
+    existing_columns = {col: OURA_COLUMN_MAPPING[col] for col in df.columns if col in OURA_COLUMN_MAPPING}
+    df = df.rename(columns=existing_columns)
+    df['date'] = pd.to_datetime(df['date'])
+    for col in ['sleep_score', 'sleep_duration', 'sleep_efficiency', 'sleep_latency', 'readiness_score',
+                'activity_score', 'activity_calories', 'activity_steps', 'avg_heart_rate', 'hrv']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df['sleep_hours'] = df['sleep_duration'] / 60
+    return df
+
+def measure(parse: Callable[[], pd.DataFrame], runs: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        parse()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    df = parse()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'p50': float(np.percentile(timings, 50)),
+        'peak_mb': peak / 1024 / 1024,
+        'frame_mb': df.memory_usage(deep=True).sum() / 1024 / 1024
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument("--extra-columns", type=int, default=40)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    data = make_export(args.years, args.extra_columns, random.Random(0))
+    # A Streamlit upload is a BytesIO over the received bytes
+    upload = io.BytesIO(data)
+    buffer = upload.getbuffer()
+    print(f"export: {args.years:g} years, {len(OURA_COLUMN_MAPPING) + args.extra_columns} columns, "
+          f"{len(data) / 1024 / 1024:.1f} MB; parse_oura_csv engine: {OURA_CSV_ENGINE}")
+    print(f"{'parser':<26}{'p50 ms':>9}{'peak MB':>10}{'frame MB':>10}")
+
+    cases = {
+        'temp file + untyped': lambda: legacy_parse(buffer),
+        'getbuffer(), typed': lambda: parse_oura_csv(buffer),
+        'bytes, typed': lambda: parse_oura_csv(data),
+        'upload object, typed': lambda: parse_oura_csv(upload)
+    }
+    for name, parse in cases.items():
+        stats = measure(parse, args.runs)
+        print(f"{name:<26}{stats['p50']:>9.1f}{stats['peak_mb']:>10.2f}{stats['frame_mb']:>10.2f}")
+
+if __name__ == "__main__":
+    main()
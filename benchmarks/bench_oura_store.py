@@ -0,0 +1,70 @@
+"""Upsert and load time of the per-user OURA store, and its size on disk.
+
+Runs in a temporary directory, so no real user data is touched:
+    python -m benchmarks.bench_oura_store --years 5 --runs 5
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import Callable
+
+import numpy as np
+
+from benchmarks.bench_oura_parse import make_export
+from utils import oura_store
+from utils.oura_utils import parse_oura_csv
+
+def p50_ms(run: Callable[[], object], runs: int, setup: Callable[[], object] = lambda: None) -> float:
+    timings = []
+    for _ in range(runs):
+        setup()
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.percentile(timings, 50))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    data = make_export(args.years, 0, random.Random(0))
+    # The next export: the same history plus two weeks, with one stored night re-scored
+    update = parse_oura_csv(data)
+    history = update.iloc[:-14].copy()
+    update.loc[update.index[-15], 'sleep_score'] += 1
+
+    workdir = tempfile.mkdtemp()
+    os.chdir(workdir)
+    username = "bench"
+    path = oura_store.get_oura_store_path(username)
+
+    def first_upload():
+        oura_store.delete_oura_data(username)
+        return oura_store.upsert_oura_data(username, history)
+
+    def cold_load():
+        oura_store._cache.clear()
+        return oura_store.load_oura_data(username)
+
+    def new_days():
+        return oura_store.upsert_oura_data(username, update)
+
+    print(f"history: {len(history)} days, next export {len(data) / 1024:.0f} KB")
+    print(f"{'operation':<28}{'p50 ms':>9}  result")
+    print(f"{'first upload':<28}{p50_ms(first_upload, args.runs):>9.2f}  {first_upload()}")
+    print(f"{'load (cold)':<28}{p50_ms(cold_load, args.runs):>9.2f}")
+    print(f"{'load (cached)':<28}{p50_ms(lambda: oura_store.load_oura_data(username), args.runs):>9.3f}")
+    unchanged = p50_ms(lambda: oura_store.upsert_oura_data(username, history), args.runs)
+    print(f"{'re-upload, unchanged':<28}{unchanged:>9.2f}  {oura_store.upsert_oura_data(username, history)}")
+    print(f"{'re-upload, +14 days':<28}{p50_ms(new_days, args.runs, first_upload):>9.2f}  "
+          f"{(first_upload(), new_days())[1]}")
+    print(f"store: {os.path.getsize(path) / 1024:.0f} KB, frame in memory "
+          f"{oura_store.load_oura_data(username).memory_usage(deep=True).sum() / 1024:.0f} KB")
+    oura_store.delete_oura_data(username)
+
+if __name__ == "__main__":
+    main()
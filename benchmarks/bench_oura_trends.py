@@ -0,0 +1,77 @@
+"""Time to compute OURA rolling trends over years of nights, in full and incrementally.
+
+Compares compute_oura_trends with a per-night loop and with update_oura_trends
+after two new weeks are upserted, and checks that all three agree:
+    python -m benchmarks.bench_oura_trends --runs 5
+"""
+import argparse
+import random
+import time
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_oura_parse import make_export
+from utils.oura_trends import (
+    OURA_ANOMALY_MIN_NIGHTS, OURA_LONG_WINDOW_DAYS, OURA_SHORT_WINDOW_DAYS, TREND_METRICS,
+    compute_oura_trends, update_oura_trends
+)
+from utils.oura_utils import parse_oura_csv
+
+NEW_DAYS = 14
+
+def loop_trends(oura_data: pd.DataFrame) -> pd.DataFrame:
+    """Per-night slices of the window before each night (how it is done without rolling windows)."""
+    dates = oura_data['date']
+    rows = []
+    for night in dates:
+        row = {'date': night}
+        short = oura_data[(dates > night - pd.Timedelta(days=OURA_SHORT_WINDOW_DAYS)) & (dates <= night)]
+        long = oura_data[(dates > night - pd.Timedelta(days=OURA_LONG_WINDOW_DAYS)) & (dates <= night)]
+        baseline = oura_data[(dates >= night - pd.Timedelta(days=OURA_LONG_WINDOW_DAYS)) & (dates < night)]
+        for metric in TREND_METRICS:
+            if metric not in oura_data.columns:
+                continue
+            row[f"{metric}_7d"] = short[metric].mean()
+            row[f"{metric}_30d"] = long[metric].mean()
+            if baseline[metric].count() >= OURA_ANOMALY_MIN_NIGHTS and baseline[metric].std() > 0:
+                row[f"{metric}_z"] = (long[metric].iloc[-1] - baseline[metric].mean()) / baseline[metric].std()
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+def p50_ms(run: Callable[[], object], runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.percentile(timings, 50))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'years':<7}{'nights':>8}{'loop ms':>10}{'full ms':>10}{'+{} days ms'.format(NEW_DAYS):>14}{'anomalies':>11}")
+    for years in (1, 5, 10):
+        oura_data = parse_oura_csv(make_export(years, 0, random.Random(0)))
+        history = oura_data.iloc[:-NEW_DAYS]
+        previous = compute_oura_trends(history)
+        since = oura_data['date'].iloc[-NEW_DAYS]
+
+        trends = compute_oura_trends(oura_data)
+        pd.testing.assert_frame_equal(update_oura_trends(previous, oura_data, since), trends)
+        # The loop is slow, so it runs once on the smallest history only
+        loop = p50_ms(lambda: loop_trends(oura_data), 1) if years == 1 else float('nan')
+        if years == 1:
+            expected = loop_trends(oura_data)
+            for column in ('sleep_score_7d', 'sleep_score_30d', 'sleep_score_z'):
+                np.testing.assert_allclose(trends[column], expected[column], rtol=1e-4)
+
+        full = p50_ms(lambda: compute_oura_trends(oura_data), args.runs)
+        incremental = p50_ms(lambda: update_oura_trends(previous, oura_data, since), args.runs)
+        print(f"{years:<7}{len(oura_data):>8,}{loop:>10.1f}{full:>10.2f}{incremental:>14.2f}{int(trends['anomaly'].sum()):>11}")
+
+if __name__ == "__main__":
+    main()
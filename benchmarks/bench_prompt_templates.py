@@ -0,0 +1,55 @@
+"""Prompt-build time and prompt size per domain, and how much of each prompt is a cacheable static prefix.
+
+    python -m benchmarks.bench_prompt_templates --runs 20
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from benchmarks.bench_insights import SIZES, make_oura
+from benchmarks.bench_prompt_tokens import make_entries, make_tasks, make_goals, make_routines
+from utils.insight_domains import build_domain_prompt
+from utils.prompt_templates import get_static_prefix
+from utils.prompt_utils import estimate_tokens
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'domain':<10}{'size':<8}{'build p50 ms':>13}{'build p95 ms':>13}{'prompt bytes':>13}"
+          f"{'est tokens':>11}{'prefix bytes':>13}{'prefix %':>9}")
+
+    for size_name, size in SIZES.items():
+        entries = make_entries(size['days'], rng)
+        cases = {
+            'food': {'entries': entries},
+            'oura': {'oura_data': make_oura(size['days'], rng), 'food_entries': entries},
+            'tasks': {'tasks': make_tasks(size['tasks'], rng)},
+            'goals': {'goals': make_goals(size['goals'], rng)},
+            'meals': {'food_entries': entries, 'symptoms': ['bloating']},
+            'selfcare': {'tasks': make_routines(size['routines'], rng)}
+        }
+
+        for domain, data in cases.items():
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                request = build_domain_prompt(domain, data)
+                timings.append((time.perf_counter() - start) * 1000)
+
+            prompt = request['system_prompt'] + request['user_prompt']
+            prefix = get_static_prefix(domain)
+            # The static prefix must be byte-identical at the start of every request
+            assert prompt.startswith(prefix), f"{domain} prompt does not start with its template prefix"
+            prompt_bytes = len(prompt.encode('utf-8'))
+            prefix_bytes = len(prefix.encode('utf-8'))
+            print(f"{domain:<10}{size_name:<8}{np.percentile(timings, 50):>13.2f}{np.percentile(timings, 95):>13.2f}"
+                  f"{prompt_bytes:>13,}{estimate_tokens(prompt):>11,}{prefix_bytes:>13,}"
+                  f"{100 * prefix_bytes / prompt_bytes:>8.0f}%")
+
+if __name__ == "__main__":
+    main()
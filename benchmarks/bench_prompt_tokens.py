@@ -0,0 +1,113 @@
+"""Estimated prompt tokens before and after budgeted compaction, on synthetic data.
+
+"After" is the user prompt from the current build_*_prompt functions. "Before"
+is the same prompt with its data section replaced by the previous one: every
+raw row as json.dumps(indent=2).
+
+    python -m benchmarks.bench_prompt_tokens
+"""
+import json
+import random
+from datetime import datetime, timedelta
+from typing import List, Dict, Any
+
+from utils.prompt_utils import PROMPT_DATA_TOKEN_BUDGET, estimate_tokens
+from utils.insight_utils import build_ai_insight_prompt
+from utils.task_utils import build_task_insight_prompt
+from utils.goal_utils import build_goal_insight_prompt
+from utils.selfcare_utils import build_selfcare_insight_prompt
+
+FOODS = ['oatmeal', 'coffee', 'eggs', 'toast', 'banana', 'yogurt', 'chicken salad', 'rice', 'pasta',
+         'salmon', 'broccoli', 'apple', 'cheese', 'bread', 'beans', 'tofu', 'pizza', 'ice cream']
+SYMPTOMS = ['bloating', 'headache', 'fatigue', 'gas', 'heartburn']
+
+def make_entries(days: int, rng: random.Random) -> List[Dict[str, Any]]:
+    now = datetime.now()
+    entries = []
+    for day in range(days, 0, -1):
+        for hour, meal_type in ((8, 'Breakfast'), (13, 'Lunch'), (19, 'Dinner')):
+            entries.append({
+                'timestamp': (now - timedelta(days=day)).replace(hour=hour, minute=rng.randint(0, 59)).isoformat(),
+                'meal_type': meal_type,
+                'food_items': rng.sample(FOODS, rng.randint(1, 4)),
+                'supplements': ['vitamin d'] if hour == 8 else [],
+                'symptoms': rng.sample(SYMPTOMS, 1) if rng.random() < 0.3 else []
+            })
+    return entries
+
+def make_tasks(count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    now = datetime.now()
+    return [{
+        'title': f"Task number {i}",
+        'category': rng.choice(['Work', 'Health', 'Personal']),
+        'priority': rng.choice(['High', 'Medium', 'Low']),
+        'due_date': (now + timedelta(days=rng.randint(-30, 30))).date().isoformat(),
+        'completed': rng.random() < 0.6,
+        'created_at': (now - timedelta(days=count - i)).isoformat()
+    } for i in range(count)]
+
+def make_goals(count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    now = datetime.now()
+    return [{
+        'title': f"Goal number {i}",
+        'description': "Keep up the habit every day",
+        'timeframe': rng.choice(['Daily', 'Weekly', 'Monthly']),
+        'deadline': (now + timedelta(days=rng.randint(-30, 30))).date().isoformat(),
+        'completed': rng.random() < 0.5,
+        'created_at': (now - timedelta(days=count - i)).isoformat()
+    } for i in range(count)]
+
+def make_routines(count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    now = datetime.now()
+    return [{
+        'title': f"Routine {i}",
+        'category': rng.choice(['Grooming', 'Cleaning', 'Health', 'Wellness']),
+        'frequency': rng.choice(['Daily', 'Weekly', 'Monthly']),
+        'scheduled_time': '08:00',
+        'start_date': (now - timedelta(days=60)).date().isoformat(),
+        'completions': [(now - timedelta(days=d)).date().isoformat() for d in range(rng.randint(0, 30))],
+        'created_at': (now - timedelta(days=count - i)).isoformat()
+    } for i in range(count)]
+
+def legacy_tokens(rows: List[Dict[str, Any]], fields: List[str]) -> int:
+    """Tokens of the old data section: all rows, indent=2."""
+    return estimate_tokens(json.dumps([{f: row.get(f) for f in fields} for row in rows], indent=2))
+
+def main() -> None:
+    rng = random.Random(0)
+    print(f"data token budget {PROMPT_DATA_TOKEN_BUDGET}; estimated tokens of the whole user prompt")
+    print(f"{'dataset':<28}{'before':>10}{'after':>10}{'reduction':>11}")
+
+    def row(label: str, legacy_data: int, prompt: str) -> None:
+        # The compact data section is the prompt's single longest line
+        after = estimate_tokens(prompt)
+        before = after - estimate_tokens(max(prompt.splitlines(), key=len)) + legacy_data
+        print(f"{label:<28}{before:>10,}{after:>10,}{(1 - after / before) * 100:>10.0f}%")
+
+    food_fields = ['timestamp', 'meal_type', 'food_items', 'supplements', 'symptoms']
+    for days in (7, 30, 90, 365):
+        entries = make_entries(days, rng)
+        row(f"food journal, {days} days", legacy_tokens(entries, food_fields),
+            build_ai_insight_prompt(entries)['user_prompt'])
+
+    task_fields = ['title', 'category', 'priority', 'due_date', 'completed', 'created_at']
+    for count in (50, 500, 2000):
+        tasks = make_tasks(count, rng)
+        row(f"tasks, {count}", legacy_tokens(tasks, task_fields),
+            build_task_insight_prompt(tasks)['user_prompt'])
+
+    goal_fields = ['title', 'description', 'timeframe', 'deadline', 'completed', 'created_at']
+    for count in (20, 200):
+        goals = make_goals(count, rng)
+        row(f"goals, {count}", legacy_tokens(goals, goal_fields),
+            build_goal_insight_prompt(goals)['user_prompt'])
+
+    routine_fields = ['title', 'category', 'frequency', 'scheduled_time', 'completions_count']
+    for count in (10, 100):
+        routines = make_routines(count, rng)
+        legacy_routines = [dict(r, completions_count=len(r['completions'])) for r in routines]
+        row(f"self-care routines, {count}", legacy_tokens(legacy_routines, routine_fields),
+            build_selfcare_insight_prompt(routines)['user_prompt'])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Time to first token and total time: blocking generate_* vs streaming stream_*.
+
+    python -m benchmarks.bench_streaming --runs 5 --latency-ms 300 --token-delay-ms 20
+"""
+import argparse
+import os
+import statistics
+import time
+from typing import Callable, Iterator, List, Tuple
+
+# Responses must come from the stub, not the cache
+os.environ['LLM_CACHE_DISABLED'] = '1'
+
+from benchmarks.stub_server import start_stub_server
+from utils.llm_client import close_llm_client
+from utils.insight_utils import generate_ai_insights, stream_ai_insights
+
+ENTRIES = [
+    {
+        'timestamp': f"2024-01-{day:02d}T{hour:02d}:30:00",
+        'food_items': ['oatmeal', 'coffee'] if hour < 12 else ['pasta', 'bread'],
+        'supplements': ['vitamin d'],
+        'symptoms': ['bloating'] if day % 3 == 0 else []
+    }
+    for day in range(1, 29) for hour in (8, 13, 19)
+]
+
+def time_blocking(call: Callable[[], str]) -> Tuple[float, float]:
+    """(ttft_ms, total_ms) for a blocking call: nothing is shown until it returns."""
+    start = time.perf_counter()
+    call()
+    total = (time.perf_counter() - start) * 1000
+    return total, total
+
+def time_streaming(call: Callable[[], Iterator[str]]) -> Tuple[float, float]:
+    """(ttft_ms, total_ms) for a streaming call."""
+    start = time.perf_counter()
+    ttft = None
+    for _ in call():
+        if ttft is None:
+            ttft = (time.perf_counter() - start) * 1000
+    total = (time.perf_counter() - start) * 1000
+    return ttft, total
+
+def report(label: str, results: List[Tuple[float, float]]) -> None:
+    ttfts = [r[0] for r in results]
+    totals = [r[1] for r in results]
+    print(f"{label:<22} TTFT p50 {statistics.median(ttfts):8.1f} ms   "
+          f"total p50 {statistics.median(totals):8.1f} ms")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--token-delay-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency_ms=args.latency_ms, token_delay_ms=args.token_delay_ms)
+    os.environ['LLM_BASE_URL'] = base_url
+    os.environ['GROQ_API_KEY'] = 'stub'
+
+    # Warm up the connection pool
+    generate_ai_insights(ENTRIES)
+
+    blocking = [time_blocking(lambda: generate_ai_insights(ENTRIES)) for _ in range(args.runs)]
+    streaming = [time_streaming(lambda: stream_ai_insights(ENTRIES)) for _ in range(args.runs)]
+
+    print(f"{args.runs} runs, stub latency {args.latency_ms:.0f} ms, {args.token_delay_ms:.0f} ms per token")
+    report("generate_ai_insights", blocking)
+    report("stream_ai_insights", streaming)
+
+    close_llm_client()
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
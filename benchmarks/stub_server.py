@@ -0,0 +1,276 @@
+"""Local OpenAI-compatible stub server for benchmarking the LLM paths.
+
+Implements POST /chat/completions, streaming (SSE) and non-streaming, with
+configurable time to first token, token rate, response length and error
+injection; JSON mode (response_format json_object) returns a fixed
+structured insight. Run standalone:
+    python -m benchmarks.stub_server --port 8700 --latency-ms 200 --tokens-per-second 250 \
+        --response-tokens 300 --error-rate 0.05 --retry-after 1
+
+Then point the app at it:
+    LLM_BASE_URL=http://127.0.0.1:8700/v1 GROQ_API_KEY=stub streamlit run app.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple
+
+def make_response_text(tokens: int) -> str:
+    """Build a response of roughly `tokens` word-sized tokens."""
+    words = ("Insight", "pattern", "sleep", "meal", "symptom", "trend", "recommendation", "habit")
+    lines = []
+    for i in range(0, tokens, 10):
+        lines.append("- " + " ".join(words[(i + j) % len(words)] for j in range(min(10, tokens - i))))
+    return "\n".join(lines)
+
+DEFAULT_RESPONSE_TEXT = (
+    "Here are your insights:\n"
+    "- Pattern: symptoms tend to follow late meals.\n"
+    "- Recommendation: keep a 12 hour overnight fast.\n"
+)
+
+# Returned when the request asks for response_format json_object
+JSON_RESPONSE_TEXT = json.dumps({
+    "findings": [{"title": "Late meals", "detail": "Symptoms tend to follow meals after 8pm."}],
+    "triggers": [{"food": "Coffee", "symptom": "Bloating", "evidence": "4 of 6 coffee days"}],
+    "recommendations": [{"type": "meal_timing", "text": "Keep a 12 hour overnight fast."}],
+    "confidence": 0.7
+})
+
+class StubState:
+    """Configuration and counters shared by all request handlers."""
+
+    def __init__(self, latency_ms: float = 0.0, token_delay_ms: float = 0.0,
+                 response_text: str = DEFAULT_RESPONSE_TEXT, error_rate: float = 0.0,
+                 error_status: int = 429, retry_after: Optional[float] = None, seed: int = 0,
+                 model_latency_ms: Optional[Dict[str, float]] = None):
+        self.latency_ms = latency_ms
+        # Per-model time to first token, e.g. to make one model time out
+        self.model_latency_ms = model_latency_ms or {}
+        self.token_delay_ms = token_delay_ms
+        self.response_text = response_text
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.errors = 0
+        self.request_bytes = 0
+
+    def should_fail(self) -> bool:
+        """Decide whether to inject an error into this request."""
+        with self.lock:
+            fail = self.random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+            return fail
+
+    def count_request(self, size: int = 0) -> None:
+        with self.lock:
+            self.requests += 1
+            self.request_bytes += size
+
+    def count_connection(self) -> None:
+        with self.lock:
+            self.connections += 1
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can reuse keep-alive connections
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; avoid Nagle/delayed-ACK stalls
+    disable_nagle_algorithm = True
+    state: StubState = None
+
+    def setup(self) -> None:
+        super().setup()
+        self.state.count_connection()
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        self.state.count_request(length)
+        time.sleep(self.state.model_latency_ms.get(request.get("model"), self.state.latency_ms) / 1000)
+
+        if self.state.should_fail():
+            headers = {}
+            if self.state.retry_after is not None:
+                headers["Retry-After"] = f"{self.state.retry_after:g}"
+            self._send_json(self.state.error_status, {
+                "error": {"message": "Injected error", "type": "rate_limit_exceeded"
+                          if self.state.error_status == 429 else "server_error"}
+            }, headers)
+            return
+
+        if request.get("stream"):
+            self._stream_completion(request)
+            return
+
+        json_mode = (request.get("response_format") or {}).get("type") == "json_object"
+        text = JSON_RESPONSE_TEXT if json_mode else self.state.response_text
+
+        # Non-streaming responses still take the full generation time
+        tokens = self._split_tokens(text)
+        time.sleep(self.state.token_delay_ms * len(tokens) / 1000)
+
+        self._send_json(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop"
+            }],
+            "usage": self._usage(request, text)
+        })
+
+    @staticmethod
+    def _usage(request: Dict[str, Any], text: str) -> Dict[str, int]:
+        """Approximate token usage (4 characters per token)."""
+        prompt_chars = sum(len(m.get("content") or "") for m in request.get("messages", []))
+        return {
+            "prompt_tokens": prompt_chars // 4,
+            "completion_tokens": len(text) // 4,
+            "total_tokens": prompt_chars // 4 + len(text) // 4
+        }
+
+    @staticmethod
+    def _split_tokens(text: str) -> list:
+        """Split text into word-sized pseudo tokens (keeping whitespace)."""
+        tokens = []
+        for word in text.split(" "):
+            tokens.append(word + " ")
+        tokens[-1] = tokens[-1][:-1]
+        return [token for token in tokens if token]
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _stream_completion(self, request: Dict[str, Any]) -> None:
+        """Send the response as server-sent events over chunked encoding."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        tokens = self._split_tokens(self.state.response_text)
+
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.state.token_delay_ms / 1000)
+            delta = {"role": "assistant", "content": token} if i == 0 else {"content": token}
+            event = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": request.get("model", "stub"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": None}]
+            }
+            self._write_chunk(f"data: {json.dumps(event)}\n\n".encode())
+
+        final = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": request.get("model", "stub"),
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+        }
+        self._write_chunk(f"data: {json.dumps(final)}\n\n".encode())
+
+        if (request.get("stream_options") or {}).get("include_usage"):
+            usage = dict(final, choices=[], usage=self._usage(request, self.state.response_text))
+            self._write_chunk(f"data: {json.dumps(usage)}\n\n".encode())
+
+        self._write_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+def start_stub_server(port: int = 0, latency_ms: float = 0.0, token_delay_ms: float = 0.0,
+                      error_rate: float = 0.0, error_status: int = 429,
+                      retry_after: Optional[float] = None,
+                      response_tokens: Optional[int] = None,
+                      model_latency_ms: Optional[Dict[str, float]] = None) -> Tuple[ThreadingHTTPServer, str]:
+    """Start the stub server on a background thread; returns (server, base_url).
+
+    latency_ms is the delay before the first token; token_delay_ms the delay
+    between tokens. A fraction error_rate of requests fail with error_status,
+    with a Retry-After header if retry_after is set. response_tokens sets the
+    response length (default: a short fixed text). model_latency_ms overrides
+    latency_ms for the named models.
+    """
+    response_text = make_response_text(response_tokens) if response_tokens else DEFAULT_RESPONSE_TEXT
+    state = StubState(latency_ms=latency_ms, token_delay_ms=token_delay_ms, response_text=response_text,
+                      error_rate=error_rate, error_status=error_status, retry_after=retry_after,
+                      model_latency_ms=model_latency_ms)
+    handler = type("BoundStubHandler", (StubHandler,), {"state": state})
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.state = state
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub server")
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--token-delay-ms", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float, default=None,
+                        help="Token rate; overrides --token-delay-ms")
+    parser.add_argument("--response-tokens", type=int, default=None)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument("--retry-after", type=float, default=None)
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=MS",
+                        help="Time to first token for one model; repeatable")
+    args = parser.parse_args()
+
+    model_latency_ms = {}
+    for item in args.model_latency:
+        model, _, ms = item.partition("=")
+        model_latency_ms[model] = float(ms)
+
+    token_delay_ms = 1000 / args.tokens_per_second if args.tokens_per_second else args.token_delay_ms
+    server, base_url = start_stub_server(args.port, args.latency_ms, token_delay_ms, args.error_rate,
+                                         args.error_status, args.retry_after, args.response_tokens,
+                                         model_latency_ms)
+    print(f"Stub server listening at {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import bisect
+import heapq
+import threading
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from utils.user_utils import load_user_data
+
+# Entry fields that get completions
+AUTOCOMPLETE_FIELDS = ['food_items', 'supplements', 'symptoms']
+
+# Recency weighting: a use counts half as much after this many days
+RECENCY_HALF_LIFE_DAYS = 30.0
+
+# Per-user indexes, shared process-wide and updated in place on save
+_indexes: Dict[str, Dict[str, Dict[str, Any]]] = {}
+_index_lock = threading.Lock()
+
+def _new_field_index() -> Dict[str, Any]:
+    """Create an empty index for one field."""
+    return {
+        'keys': [],        # sorted lowercase keys, searched with bisect
+        'display': {},     # key -> most recently used spelling
+        'counts': {},      # key -> number of uses
+        'last_used': {}    # key -> epoch seconds of the latest use
+    }
+
+def _entry_time(entry: Dict[str, Any]) -> float:
+    """Get the epoch time of an entry (falls back to now)."""
+    try:
+        return datetime.fromisoformat(entry['timestamp']).timestamp()
+    except (KeyError, ValueError, TypeError):
+        return time.time()
+
+def _add_item(field_index: Dict[str, Any], item: str, used_at: float) -> None:
+    """Record one use of an item in a field index."""
+    display = item.strip()
+    key = display.lower()
+    if not key:
+        return
+
+    if key not in field_index['counts']:
+        bisect.insort(field_index['keys'], key)
+        field_index['counts'][key] = 0
+        field_index['last_used'][key] = used_at
+
+    field_index['counts'][key] += 1
+    if used_at >= field_index['last_used'][key]:
+        field_index['last_used'][key] = used_at
+        field_index['display'][key] = display
+
+def build_autocomplete_index(entries: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Build prefix indexes for all autocomplete fields from journal history."""
+    index = {field: _new_field_index() for field in AUTOCOMPLETE_FIELDS}
+
+    for entry in entries:
+        used_at = _entry_time(entry)
+        for field in AUTOCOMPLETE_FIELDS:
+            for item in entry.get(field, []):
+                _add_item(index[field], item, used_at)
+
+    return index
+
+def get_autocomplete_index(username: str) -> Dict[str, Dict[str, Any]]:
+    """Get a user's index, building it from their journal on first use."""
+    index = _indexes.get(username)
+    if index is None:
+        entries = load_user_data(username, "food_journal.json")
+        with _index_lock:
+            index = _indexes.get(username)
+            if index is None:
+                index = build_autocomplete_index(entries)
+                _indexes[username] = index
+    return index
+
+def update_autocomplete_index(username: str, entry: Dict[str, Any]) -> None:
+    """Incrementally add a newly saved entry to a user's index."""
+    index = get_autocomplete_index(username)
+    used_at = _entry_time(entry)
+
+    with _index_lock:
+        for field in AUTOCOMPLETE_FIELDS:
+            for item in entry.get(field, []):
+                _add_item(index[field], item, used_at)
+
+def invalidate_autocomplete_index(username: str) -> None:
+    """Drop a user's index so it is rebuilt (e.g. after entries are deleted)."""
+    with _index_lock:
+        _indexes.pop(username, None)
+
+def get_completions(username: str, field: str, prefix: str, k: int = 5,
+                    exclude: Optional[List[str]] = None) -> List[str]:
+    """Get the top-k completions for a prefix, ranked by frequency and recency."""
+    field_index = get_autocomplete_index(username).get(field)
+    if not field_index:
+        return []
+
+    keys = field_index['keys']
+    prefix = prefix.strip().lower()
+
+    # All keys sharing the prefix form one contiguous slice of the sorted list
+    lo = bisect.bisect_left(keys, prefix)
+    hi = bisect.bisect_left(keys, prefix + '\uffff', lo)
+
+    excluded = {item.strip().lower() for item in exclude} if exclude else set()
+    now = time.time()
+    counts = field_index['counts']
+    last_used = field_index['last_used']
+
+    def score(key: str) -> float:
+        age_days = max(now - last_used[key], 0.0) / 86400
+        return counts[key] * 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+
+    candidates = (key for key in keys[lo:hi] if key != prefix and key not in excluded)
+    top_keys = heapq.nlargest(k, candidates, key=score)
+
+    return [field_index['display'][key] for key in top_keys]
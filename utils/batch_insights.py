@@ -0,0 +1,219 @@
+import argparse
+import asyncio
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Callable
+
+from utils.user_utils import load_users
+from utils.llm_client import LLM_MAX_CONCURRENCY, create_async_llm_client, acomplete_chat
+from utils.llm_breaker import LLMUnavailableError
+from utils.llm_scheduler import set_llm_user
+from utils.insight_domains import INSIGHT_DOMAINS, load_domain_data, save_domain_insight
+from utils.incremental_insights import plan_domain_insight, build_insight_metadata
+from utils.structured_insights import acomplete_structured_insight
+from utils.local_insights import build_local_insight
+
+# Users processed at once by the nightly batch (overridable through environment variables)
+BATCH_USER_WORKERS = int(os.getenv('BATCH_USER_WORKERS', '4'))
+
+def _local_result(domain: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """A domain result carrying the rule-based local summary (not saved)."""
+    local = build_local_insight(domain, data)
+    return {'domain': domain, 'status': 'local', 'mode': 'local',
+            'content': local['content'], 'seconds': local['seconds']}
+
+async def _generate_domain_insight(client, semaphore: asyncio.Semaphore, username: str,
+                                   domain: str, data: Dict[str, Any], plan: Dict[str, Any],
+                                   structured: bool = False) -> Dict[str, Any]:
+    """Generate and save one domain's insight, waiting for a concurrency slot."""
+    start = time.perf_counter()
+    structured_fields = None
+    async with semaphore:
+        try:
+            if structured:
+                structured_fields = await acomplete_structured_insight(client, plan['request'])
+                content = structured_fields.pop('content')
+            else:
+                content = await acomplete_chat(client, **plan['request'])
+        except LLMUnavailableError:
+            return _local_result(domain, data)
+        except Exception as e:
+            return {
+                'domain': domain,
+                'status': 'error',
+                'mode': plan['mode'],
+                'content': f"Error generating insights: {str(e)}",
+                'seconds': time.perf_counter() - start
+            }
+
+    # Summaries and JSON file writes are blocking; run them off the event loop
+    metadata = await asyncio.to_thread(build_insight_metadata, domain, data, content, plan)
+    if structured_fields is not None:
+        metadata['structured'] = structured_fields
+    await asyncio.to_thread(save_domain_insight, username, domain, content, data, metadata)
+    return {
+        'domain': domain,
+        'status': 'ok',
+        'mode': plan['mode'],
+        'new_records': plan['new_records'],
+        'content': content,
+        'seconds': time.perf_counter() - start
+    }
+
+async def agenerate_all_insights(username: str, domains: Optional[List[str]] = None,
+                                 oura_data: Any = None, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                                 incremental: bool = True,
+                                 on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+                                 structured: bool = False) -> Dict[str, Dict[str, Any]]:
+    """Generate insights for several domains concurrently and save each as it completes.
+
+    At most `max_concurrency` LLM calls run at once. `on_result` is called with
+    each domain's result in completion order. Domains without data are
+    reported as skipped.
+
+    With `incremental`, a domain that already has an insight only sends the
+    records added since it plus that insight's rolling summary; if nothing
+    is new the previous insight is returned as 'unchanged'.
+
+    With `structured`, insights are requested as schema-validated JSON and
+    their findings, triggers and recommendations are indexed for querying.
+
+    Without an API key, or while the circuit breaker has AI calls paused,
+    domains get the rule-based local summary instead, reported as 'local'
+    and not saved.
+    """
+    domains = domains or INSIGHT_DOMAINS
+    results = {}
+    set_llm_user(username)
+
+    client = create_async_llm_client()
+    if client is None:
+        for domain in domains:
+            data = load_domain_data(username, domain, oura_data=oura_data)
+            if data is None:
+                result = {'domain': domain, 'status': 'skipped', 'content': "No data to analyze.", 'seconds': 0.0}
+            else:
+                result = _local_result(domain, data)
+            results[domain] = result
+            if on_result:
+                on_result(result)
+        return results
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+    tasks = []
+    for domain in domains:
+        data = load_domain_data(username, domain, oura_data=oura_data)
+        if data is None:
+            result = {'domain': domain, 'status': 'skipped', 'content': "No data to analyze.", 'seconds': 0.0}
+            results[domain] = result
+            if on_result:
+                on_result(result)
+            continue
+        
+        plan = plan_domain_insight(username, domain, data, incremental=incremental)
+        if plan['mode'] == 'unchanged':
+            result = {'domain': domain, 'status': 'unchanged', 'mode': 'unchanged',
+                      'content': plan['previous']['content'], 'seconds': 0.0}
+            results[domain] = result
+            if on_result:
+                on_result(result)
+            continue
+        tasks.append(asyncio.create_task(_generate_domain_insight(client, semaphore, username, domain, data, plan,
+                                                                  structured)))
+
+    try:
+        for finished in asyncio.as_completed(tasks):
+            result = await finished
+            results[result['domain']] = result
+            if on_result:
+                on_result(result)
+    finally:
+        await client.close()
+
+    return results
+
+def generate_all_insights(username: str, domains: Optional[List[str]] = None,
+                          oura_data: Any = None, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                          incremental: bool = True,
+                          on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+                          structured: bool = False) -> Dict[str, Dict[str, Any]]:
+    """Blocking wrapper around agenerate_all_insights for callers without an event loop."""
+    return asyncio.run(agenerate_all_insights(
+        username,
+        domains=domains,
+        oura_data=oura_data,
+        max_concurrency=max_concurrency,
+        incremental=incremental,
+        on_result=on_result,
+        structured=structured
+    ))
+
+def run_batch(usernames: Optional[List[str]] = None, domains: Optional[List[str]] = None,
+              user_workers: int = BATCH_USER_WORKERS, max_concurrency: int = LLM_MAX_CONCURRENCY,
+              incremental: bool = True, structured: bool = False,
+              on_user: Optional[Callable[[str, Dict[str, Dict[str, Any]]], None]] = None) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Precompute insights for many users, `user_workers` users at a time.
+
+    Each user's domains are planned against their last insight, so only
+    domains with new data reach the LLM; the global scheduler still bounds
+    in-flight calls across all users. `on_user` is called with each user's
+    results as they finish.
+    """
+    usernames = usernames if usernames is not None else list(load_users())
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, user_workers), thread_name_prefix="batch-insights") as pool:
+        futures = {
+            pool.submit(generate_all_insights, username, domains=domains,
+                        max_concurrency=max_concurrency, incremental=incremental,
+                        structured=structured): username
+            for username in usernames
+        }
+        for future in as_completed(futures):
+            username = futures[future]
+            try:
+                results[username] = future.result()
+            except Exception as e:
+                results[username] = {'*': {'domain': '*', 'status': 'error', 'content': str(e), 'seconds': 0.0}}
+            if on_user:
+                on_user(username, results[username])
+
+    return results
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Nightly entry point: python -m utils.batch_insights [--users ...] [--domains ...]"""
+    parser = argparse.ArgumentParser(description="Precompute insights for every user whose data changed.")
+    parser.add_argument("--users", nargs="+", help="only these users (default: everyone in users.json)")
+    parser.add_argument("--domains", nargs="+", choices=INSIGHT_DOMAINS, help="only these domains")
+    parser.add_argument("--user-workers", type=int, default=BATCH_USER_WORKERS)
+    parser.add_argument("--max-concurrency", type=int, default=LLM_MAX_CONCURRENCY,
+                        help="parallel domain calls per user")
+    parser.add_argument("--full", action="store_true", help="re-analyze all data instead of deltas")
+    parser.add_argument("--structured", action="store_true", help="store indexed findings, triggers and recommendations")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    totals = Counter()
+
+    def report(username: str, user_results: Dict[str, Dict[str, Any]]) -> None:
+        statuses = Counter(result['status'] for result in user_results.values())
+        totals.update(statuses)
+        summary = ", ".join(f"{status} {count}" for status, count in sorted(statuses.items()))
+        print(f"{username}: {summary}", flush=True)
+        for result in user_results.values():
+            if result['status'] == 'error':
+                print(f"  {result['domain']}: {result['content']}", flush=True)
+
+    run_batch(args.users, args.domains, user_workers=args.user_workers,
+              max_concurrency=args.max_concurrency, incremental=not args.full,
+              structured=args.structured, on_user=report)
+
+    summary = ", ".join(f"{status} {count}" for status, count in sorted(totals.items())) or "no users"
+    print(f"done in {time.perf_counter() - start:.1f}s: {summary}")
+    # Local summaries are not saved, so a run without an API key still fails
+    return 1 if totals['error'] or totals['local'] else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
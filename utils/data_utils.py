@@ -3,6 +3,8 @@ import os
 from datetime import datetime, date
 from typing import List, Dict, Any
 
+import pandas as pd
+
 # File paths
 FOOD_JOURNAL_FILE = "food_journal.json"
 INSIGHTS_FILE = "insights.json"
@@ -101,3 +103,45 @@ def format_entry_for_display(entry: Dict[str, Any]) -> str:
         display_parts.append(f"📝 {entry['notes']}")
     
     return " | ".join(display_parts)
+
+def build_journal_frame(entries: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Build a columnar (one row per entry) DataFrame of journal entries.
+
+    'meal_minutes' is minutes after midnight of the actual meal time (meal_time if
+    set, otherwise the logging timestamp); 'date' is the entry's calendar day and
+    'entry_index' is the entry's position in the input list.
+    """
+    columns = ['entry_index', 'timestamp', 'date', 'meal_minutes', 'meal_type', 'food_items', 'supplements', 'symptoms']
+    dated_positions = [i for i, entry in enumerate(entries) if entry.get('timestamp')]
+    dated_entries = [entries[i] for i in dated_positions]
+
+    if not dated_entries:
+        return pd.DataFrame(columns=columns)
+
+    timestamps = pd.to_datetime(
+        pd.Series([entry['timestamp'] for entry in dated_entries]),
+        format='ISO8601',
+        errors='coerce'
+    )
+
+    # Parse all meal times at once; unparseable or missing ones fall back to the timestamp
+    meal_times = pd.to_datetime(
+        pd.Series([entry.get('meal_time') or None for entry in dated_entries], dtype='object'),
+        format='%H:%M',
+        errors='coerce'
+    )
+    meal_minutes = (meal_times.dt.hour * 60 + meal_times.dt.minute).astype('float64')
+    fallback_minutes = (timestamps.dt.hour * 60 + timestamps.dt.minute).astype('float64')
+
+    df = pd.DataFrame({
+        'entry_index': dated_positions,
+        'timestamp': timestamps,
+        'date': timestamps.dt.normalize(),
+        'meal_minutes': meal_minutes.fillna(fallback_minutes),
+        'meal_type': [entry.get('meal_type', 'Unknown') for entry in dated_entries],
+        'food_items': [entry.get('food_items', []) for entry in dated_entries],
+        'supplements': [entry.get('supplements', []) for entry in dated_entries],
+        'symptoms': [entry.get('symptoms', []) for entry in dated_entries]
+    })
+
+    return df.dropna(subset=['timestamp']).reset_index(drop=True)
@@ -0,0 +1,214 @@
+from datetime import datetime, date, timedelta
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from utils.user_utils import load_user_data, save_user_data
+from utils.nutrition_utils import parse_food_quantity
+
+EXPERIMENTS_FILE = "experiments.json"
+
+# Resampling sizes for the permutation test and bootstrap confidence interval
+N_PERMUTATIONS = 5000
+N_BOOTSTRAP = 2000
+
+def create_experiment(name: str, foods_removed: List[str], target_symptoms: List[str],
+                      start_date: date, end_date: date, baseline_days: Optional[int] = None) -> Dict[str, Any]:
+    """Create an elimination-diet experiment.
+
+    The baseline period is the `baseline_days` before the start date (defaults to
+    the length of the experiment).
+    """
+    if baseline_days is None:
+        baseline_days = (end_date - start_date).days + 1
+
+    return {
+        'id': f"exp_{datetime.now().strftime('%Y%m%d%H%M%S%f')}",
+        'name': name,
+        'foods_removed': foods_removed,
+        'target_symptoms': target_symptoms,
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'baseline_days': baseline_days,
+        'created_at': datetime.now().isoformat(),
+        'daily_counts': {},
+        'entries_seen': 0,
+        'watermark': None,
+        'result': None
+    }
+
+def load_experiments(username: str) -> List[Dict[str, Any]]:
+    """Load all experiments for a user."""
+    return load_user_data(username, EXPERIMENTS_FILE)
+
+def save_experiment(username: str, experiment: Dict[str, Any]) -> None:
+    """Insert or replace an experiment in the user's experiment file."""
+    experiments = load_experiments(username)
+    experiments = [e for e in experiments if e.get('id') != experiment['id']]
+    experiments.append(experiment)
+    save_user_data(username, EXPERIMENTS_FILE, experiments)
+
+def delete_experiment(username: str, experiment_id: str) -> bool:
+    """Delete an experiment."""
+    experiments = load_experiments(username)
+    remaining = [e for e in experiments if e.get('id') != experiment_id]
+    if len(remaining) == len(experiments):
+        return False
+    save_user_data(username, EXPERIMENTS_FILE, remaining)
+    return True
+
+def get_experiment_window(experiment: Dict[str, Any]) -> Dict[str, date]:
+    """Get the baseline and experiment date boundaries."""
+    start = date.fromisoformat(experiment['start_date'])
+    end = date.fromisoformat(experiment['end_date'])
+    return {
+        'baseline_start': start - timedelta(days=experiment['baseline_days']),
+        'start': start,
+        'end': end
+    }
+
+def _window_entries(experiment: Dict[str, Any], entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Get the entries whose date falls in the baseline or experiment period."""
+    window = get_experiment_window(experiment)
+    in_window = []
+    for entry in entries:
+        if 'timestamp' not in entry:
+            continue
+        entry_date = datetime.fromisoformat(entry['timestamp']).date()
+        if window['baseline_start'] <= entry_date <= window['end']:
+            in_window.append(entry)
+    return in_window
+
+def _add_entry_counts(experiment: Dict[str, Any], entry: Dict[str, Any]) -> None:
+    """Add one entry's symptom and violation counts to its day."""
+    targets = {s.strip().lower() for s in experiment.get('target_symptoms', []) if s.strip()}
+    # Whole food items, quantities stripped: removing "milk" flags "2 milk", not "oat milk"
+    removed = {parse_food_quantity(f)[1] for f in experiment.get('foods_removed', []) if f.strip()}
+
+    symptoms = {s.strip().lower() for s in entry.get('symptoms', []) if s.strip()}
+    matched_symptoms = len(symptoms & targets) if targets else len(symptoms)
+    foods = {parse_food_quantity(f)[1] for f in entry.get('food_items', [])}
+    violation = bool(foods & removed)
+
+    day = datetime.fromisoformat(entry['timestamp']).date().isoformat()
+    counts = experiment['daily_counts'].setdefault(day, {'entries': 0, 'symptoms': 0, 'violations': 0})
+    counts['entries'] += 1
+    counts['symptoms'] += matched_symptoms
+    counts['violations'] += int(violation)
+
+def update_experiment_counts(experiment: Dict[str, Any], entries: List[Dict[str, Any]]) -> bool:
+    """Fold new journal entries into the experiment's per-day counts.
+
+    Only entries logged after the watermark are processed; if previously counted
+    entries were deleted the counts are rebuilt. Returns True if anything changed.
+    """
+    in_window = _window_entries(experiment, entries)
+    watermark = experiment.get('watermark')
+
+    already_counted = [e for e in in_window if watermark and e['timestamp'] <= watermark]
+    rebuilt = len(already_counted) != experiment.get('entries_seen', 0)
+    if rebuilt:
+        # Entries were removed or back-filled: rebuild from scratch
+        experiment['daily_counts'] = {}
+        experiment['entries_seen'] = 0
+        experiment['watermark'] = None
+        already_counted = []
+        new_entries = in_window
+    else:
+        new_entries = [e for e in in_window if not watermark or e['timestamp'] > watermark]
+
+    # A rebuild changed the counts even when no entries are left to add
+    if not new_entries and not rebuilt and experiment.get('result') is not None:
+        return False
+
+    for entry in new_entries:
+        _add_entry_counts(experiment, entry)
+
+    experiment['entries_seen'] = experiment.get('entries_seen', 0) + len(new_entries)
+    if new_entries:
+        experiment['watermark'] = max(e['timestamp'] for e in new_entries + already_counted)
+    return True
+
+def _daily_rates(experiment: Dict[str, Any], first_day: date, last_day: date) -> np.ndarray:
+    """Get symptom counts for each logged day in a date range."""
+    rates = []
+    for day, counts in experiment['daily_counts'].items():
+        if first_day <= date.fromisoformat(day) <= last_day and counts['entries'] > 0:
+            rates.append(counts['symptoms'])
+    return np.asarray(rates, dtype=float)
+
+def permutation_test(baseline: np.ndarray, treatment: np.ndarray,
+                     n_permutations: int = N_PERMUTATIONS, seed: int = 0) -> float:
+    """Two-sided permutation test p-value for a difference in means (vectorized)."""
+    rng = np.random.default_rng(seed)
+    combined = np.concatenate([baseline, treatment])
+    n_baseline = baseline.size
+
+    observed = abs(treatment.mean() - baseline.mean())
+
+    # Each row is one random relabelling of the pooled days
+    permutations = rng.random((n_permutations, combined.size)).argsort(axis=1)
+    shuffled = combined[permutations]
+    diffs = np.abs(shuffled[:, n_baseline:].mean(axis=1) - shuffled[:, :n_baseline].mean(axis=1))
+
+    return float((np.count_nonzero(diffs >= observed - 1e-12) + 1) / (n_permutations + 1))
+
+def bootstrap_difference_ci(baseline: np.ndarray, treatment: np.ndarray,
+                            n_bootstrap: int = N_BOOTSTRAP, confidence: float = 0.95,
+                            seed: int = 0) -> List[float]:
+    """Bootstrap confidence interval for (treatment mean - baseline mean)."""
+    rng = np.random.default_rng(seed)
+    baseline_means = baseline[rng.integers(0, baseline.size, (n_bootstrap, baseline.size))].mean(axis=1)
+    treatment_means = treatment[rng.integers(0, treatment.size, (n_bootstrap, treatment.size))].mean(axis=1)
+
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(treatment_means - baseline_means, [alpha, 1 - alpha])
+    return [float(low), float(high)]
+
+def compute_experiment_stats(experiment: Dict[str, Any]) -> Dict[str, Any]:
+    """Compute before/after symptom rates, permutation p-value and bootstrap CI."""
+    window = get_experiment_window(experiment)
+    today = date.today()
+
+    baseline = _daily_rates(experiment, window['baseline_start'], window['start'] - timedelta(days=1))
+    treatment = _daily_rates(experiment, window['start'], min(window['end'], today))
+
+    violations = sum(
+        counts['violations'] for day, counts in experiment['daily_counts'].items()
+        if window['start'] <= date.fromisoformat(day) <= window['end']
+    )
+
+    stats = {
+        'baseline_days_logged': int(baseline.size),
+        'experiment_days_logged': int(treatment.size),
+        'violations': int(violations),
+        'computed_at': datetime.now().isoformat()
+    }
+
+    if baseline.size == 0 or treatment.size == 0:
+        stats['status'] = 'insufficient_data'
+        return stats
+
+    baseline_rate = float(baseline.mean())
+    treatment_rate = float(treatment.mean())
+
+    stats.update({
+        'status': 'ok',
+        'baseline_rate': baseline_rate,
+        'experiment_rate': treatment_rate,
+        'difference': treatment_rate - baseline_rate,
+        'percent_change': ((treatment_rate - baseline_rate) / baseline_rate * 100) if baseline_rate else None,
+        'p_value': permutation_test(baseline, treatment),
+        'confidence_interval': bootstrap_difference_ci(baseline, treatment)
+    })
+    return stats
+
+def refresh_experiment(experiment: Dict[str, Any], entries: List[Dict[str, Any]]) -> bool:
+    """Update counts with new entries and recompute stats if needed.
+
+    Returns True if the experiment changed and should be saved.
+    """
+    if update_experiment_counts(experiment, entries) or experiment.get('result') is None:
+        experiment['result'] = compute_experiment_stats(experiment)
+        return True
+    return False
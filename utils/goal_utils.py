@@ -1,10 +1,13 @@
 import json
 import os
 from datetime import datetime, date, timedelta
-from typing import List, Dict, Any, Optional
-import openai
+from typing import List, Dict, Any, Optional, Iterator, Union
 from dotenv import load_dotenv
 
+from utils.llm_client import generate_insight, stream_insight
+from utils.prompt_utils import PROMPT_DATA_TOKEN_BUDGET, build_budgeted_data, drop_empty, completion_by, count_overdue
+from utils.prompt_templates import render_prompt
+
 # Load environment variables
 load_dotenv()
 
@@ -181,24 +184,26 @@ def get_goal_statistics() -> Dict[str, Any]:
         'monthly_goals': monthly_goals
     }
 
-def generate_goal_insights(goals: List[Dict[str, Any]]) -> str:
-    """Generate AI insights for goal management using GROQ."""
-    if not goals:
-        return "No goals found to analyze."
-    
-    # Set up GROQ client
-    api_key = os.getenv('GROQ_API_KEY')
-    if not api_key:
-        return "GROQ API key not found. Please set GROQ_API_KEY environment variable."
-    
-    client = openai.OpenAI(
-        api_key=api_key,
-        base_url="https://api.groq.com/openai/v1"
-    )
-    
+def summarize_goals(goals: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregate goals for a prompt: completion overall and by timeframe."""
+    completed = len([g for g in goals if g.get('completed', False)])
+    return {
+        'total_goals': len(goals),
+        'completed_goals': completed,
+        'completion_rate': round(completed / len(goals) * 100, 1) if goals else 0.0,
+        'overdue_goals': count_overdue(goals, 'deadline'),
+        'completed_by_timeframe': completion_by(goals, 'timeframe')
+    }
+
+def build_goal_insight_prompt(goals: List[Dict[str, Any]], token_budget: int = PROMPT_DATA_TOKEN_BUDGET) -> Dict[str, Any]:
+    """Build the chat request (prompts and sampling settings) for goal insights.
+
+    The data section is aggregates over all goals plus as many recently
+    created goals as fit in `token_budget` tokens.
+    """
     # Prepare goal data for analysis
     goal_analysis = []
-    for goal in goals:
+    for goal in sorted(goals, key=lambda g: g.get('created_at', '')):
         goal_entry = {
             'title': goal.get('title', 'Unknown'),
             'description': goal.get('description', ''),
@@ -207,48 +212,36 @@ def generate_goal_insights(goals: List[Dict[str, Any]]) -> str:
             'completed': goal.get('completed', False),
             'created_at': goal.get('created_at', 'Unknown')
         }
-        goal_analysis.append(goal_entry)
+        goal_analysis.append(drop_empty(goal_entry))
     
-    # Create prompt for GROQ
-    prompt = f"""
-    Analyze the following goal management data and provide motivational insights and recommendations:
-
-    GOAL DATA:
-    {json.dumps(goal_analysis, indent=2)}
+    data = build_budgeted_data(summarize_goals(goals), goal_analysis, token_budget)
+    
+    return render_prompt('goals', [('GOAL DATA', data)])
 
-    Please provide insights on:
-    1. Goal completion patterns and success rates
-    2. Timeframe effectiveness (Daily, Weekly, Monthly goals)
-    3. Motivational analysis based on goal types and completion
-    4. Detection of missing or recurring goals
-    5. Recommendations for better goal setting and achievement
-    6. Strategies for improving goal completion rates
-    7. Work-life balance insights based on goal distribution
-    8. Motivational messages and encouragement
+def generate_goal_insights(goals: List[Dict[str, Any]], structured: bool = False) -> Union[str, Dict[str, Any]]:
+    """Generate AI insights for goal management using GROQ.
 
-    Focus on actionable insights, motivational content, and specific recommendations.
-    Format your response in a clear, structured way with bullet points for key findings.
-    Include encouraging and motivational language.
+    With `structured`, returns the validated findings, triggers, recommendations
+    and confidence (rendered markdown in 'content') instead of free text.
     """
+    if not goals:
+        return "No goals found to analyze."
     
-    try:
-        response = client.chat.completions.create(
-            model="llama3-70b-8192",  # Using GROQ's Llama model
-            messages=[
-                {"role": "system", "content": "You are a motivational coach and goal-setting expert analyzing goal data to provide encouraging insights and actionable advice for better goal achievement."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=1200,
-            temperature=0.8
-        )
-        
-        return response.choices[0].message.content
+    return generate_insight('goals', lambda: build_goal_insight_prompt(goals), {'goals': goals}, structured=structured)
+
+def stream_goal_insights(goals: List[Dict[str, Any]]) -> Iterator[str]:
+    """Stream goal insights as they are generated (same request as generate_goal_insights)."""
+    if not goals:
+        yield "No goals found to analyze."
+        return
     
-    except Exception as e:
-        return f"Error generating insights: {str(e)}"
+    yield from stream_insight('goals', lambda: build_goal_insight_prompt(goals), {'goals': goals})
 
-def save_goal_insight(insight_content: str, goals_analyzed: int) -> None:
-    """Save goal insight to JSON file."""
+def save_goal_insight(insight_content: str, goals_analyzed: int, metadata: Optional[Dict[str, Any]] = None) -> None:
+    """Save goal insight to JSON file.
+
+    `metadata` (e.g. the username and incremental-analysis state) is stored with the insight.
+    """
     insight = {
         'content': insight_content,
         'source': 'goal_tracking',
@@ -256,6 +249,8 @@ def save_goal_insight(insight_content: str, goals_analyzed: int) -> None:
         'goals_analyzed': goals_analyzed,
         'analysis_type': 'Goal Management & Motivation'
     }
+    if metadata:
+        insight.update(metadata)
     
     # Load existing insights
     insights_file = "insights.json"
@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+from typing import List, Dict, Any, Optional, Union
+
+import pandas as pd
+
+from utils.prompt_utils import compact_json, estimate_tokens, summarize_food_entries
+from utils.oura_utils import get_oura_summary_stats
+from utils.task_utils import summarize_tasks
+from utils.goal_utils import summarize_goals
+from utils.selfcare_utils import summarize_selfcare_tasks
+from utils.insight_domains import build_domain_prompt, get_domain_insights
+from utils.prompt_templates import INCREMENTAL_INSTRUCTIONS, add_prompt_section
+
+# After this many incremental updates in a row the next insight re-reads everything
+INCREMENTAL_FULL_REFRESH_RUNS = int(os.getenv('INCREMENTAL_FULL_REFRESH_RUNS', '7'))
+
+# Size of the previous findings kept in the rolling summary
+SUMMARY_FINDINGS_TOKENS = 300
+
+# Where each domain keeps its record list in the loaded data
+_RECORD_KEYS = {
+    'food': 'entries',
+    'meals': 'food_entries',
+    'tasks': 'tasks',
+    'goals': 'goals',
+    'selfcare': 'tasks'
+}
+
+def get_record_time(domain: str, record: Dict[str, Any]) -> str:
+    """Get when a record was last added or changed, as an ISO string."""
+    if domain in ('food', 'meals'):
+        return record.get('timestamp', '')
+
+    times = [record.get('created_at') or '']
+    if domain in ('tasks', 'goals'):
+        times.append(record.get('completed_at') or '')
+    elif domain == 'selfcare':
+        times.extend(c.get('timestamp', '') for c in record.get('completions', []))
+    return max(times)
+
+def get_data_watermark(domain: str, data: Dict[str, Any]) -> Optional[Union[str, Dict[str, Optional[str]]]]:
+    """Get the newest record time in a domain's data.
+
+    OURA insights get one watermark per source, {'oura': ..., 'food': ...}:
+    OURA nights are dates at midnight, so a night uploaded after a food
+    entry of the same day would sort before a shared watermark and be
+    left out of the next delta.
+    """
+    if domain == 'oura':
+        dates = data['oura_data']['date'].dropna()
+        food_times = [t for t in (entry.get('timestamp', '') for entry in data['food_entries']) if t]
+        if dates.empty and not food_times:
+            return None
+        return {
+            'oura': pd.Timestamp(dates.max()).isoformat() if not dates.empty else None,
+            'food': max(food_times) if food_times else None
+        }
+
+    times = [get_record_time(domain, record) for record in data[_RECORD_KEYS[domain]]]
+    times = [t for t in times if t]
+    return max(times) if times else None
+
+def select_new_data(domain: str, data: Dict[str, Any],
+                    watermark: Union[str, Dict[str, Optional[str]]]) -> Optional[Dict[str, Any]]:
+    """Restrict a domain's data to records added or changed after the watermark.
+
+    Returns None if nothing is new (or, for OURA, if the watermark is the
+    older single string, so the next insight re-reads everything).
+    """
+    if domain == 'oura':
+        if not isinstance(watermark, dict):
+            return None
+        oura_data = data['oura_data']
+        new_oura = oura_data
+        if watermark.get('oura'):
+            new_oura = oura_data[pd.to_datetime(oura_data['date']) > pd.Timestamp(watermark['oura'])]
+        new_food = [e for e in data['food_entries'] if e.get('timestamp', '') > (watermark.get('food') or '')]
+        if new_oura.empty and not new_food:
+            return None
+        return dict(data, oura_data=new_oura, food_entries=new_food)
+
+    key = _RECORD_KEYS[domain]
+    new_records = [r for r in data[key] if get_record_time(domain, r) > watermark]
+    if not new_records:
+        return None
+    return dict(data, **{key: new_records})
+
+def get_data_fingerprint(domain: str, data: Dict[str, Any]) -> str:
+    """Hash a domain's data, so edits without a newer timestamp are noticed too."""
+    digest = hashlib.sha256()
+    if domain == 'oura':
+        digest.update(pd.util.hash_pandas_object(data['oura_data'], index=False).values.tobytes())
+        digest.update(compact_json(data['food_entries']).encode('utf-8'))
+    else:
+        digest.update(compact_json(data[_RECORD_KEYS[domain]]).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def count_records(domain: str, data: Dict[str, Any]) -> int:
+    """Count the records a domain's insight is built from."""
+    if domain == 'oura':
+        return len(data['oura_data']) + len(data['food_entries'])
+    return len(data[_RECORD_KEYS[domain]])
+
+def summarize_domain_data(domain: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Compute the aggregates kept in the rolling summary (JSON-safe)."""
+    if domain in ('food', 'meals'):
+        aggregates = summarize_food_entries(data[_RECORD_KEYS[domain]])
+    elif domain == 'oura':
+        aggregates = {
+            'oura': get_oura_summary_stats(data['oura_data']),
+            'food': summarize_food_entries(data['food_entries'])
+        }
+    elif domain == 'tasks':
+        aggregates = summarize_tasks(data['tasks'])
+    elif domain == 'goals':
+        aggregates = summarize_goals(data['goals'])
+    else:
+        aggregates = summarize_selfcare_tasks(data['tasks'])
+
+    # Round-trip to turn numpy numbers and timestamps into plain JSON values
+    return json.loads(compact_json(aggregates))
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep whole lines from the start of text up to about max_tokens tokens."""
+    kept = []
+    used = 0
+    for line in text.strip().splitlines():
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            kept.append("...")
+            break
+        kept.append(line)
+        used += cost
+    return '\n'.join(kept)
+
+def get_incremental_state(insights: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Get the latest of a user's domain insights that carries a rolling summary."""
+    for insight in reversed(insights):
+        if insight.get('watermark') and insight.get('rolling_summary'):
+            return insight
+    return None
+
+def plan_domain_insight(username: str, domain: str, data: Dict[str, Any],
+                        incremental: bool = True) -> Dict[str, Any]:
+    """Decide how to generate a domain's insight and build the request.
+
+    Returns a plan with 'mode' ('full', 'incremental' or 'unchanged'),
+    'request' (None when unchanged), 'new_records', 'runs' (incremental
+    updates since the last full analysis) and 'previous' (the insight the
+    summary came from, if any).
+
+    Data identical to what the latest insight was built from is 'unchanged'
+    even without a rolling summary; data that changed without any newer
+    record time (an edit) gets a full analysis.
+    """
+    insights = get_domain_insights(username, domain) if incremental else []
+    fingerprint = get_data_fingerprint(domain, data)
+    if insights and insights[-1].get('data_fingerprint') == fingerprint:
+        previous = insights[-1]
+        return {'mode': 'unchanged', 'request': None, 'new_records': 0,
+                'runs': previous.get('incremental_runs', 0), 'previous': previous}
+
+    previous = get_incremental_state(insights)
+    runs = previous.get('incremental_runs', 0) if previous else 0
+    new_data = select_new_data(domain, data, previous['watermark']) if previous else None
+
+    if new_data is None or runs >= INCREMENTAL_FULL_REFRESH_RUNS:
+        return {
+            'mode': 'full',
+            'request': build_domain_prompt(domain, data),
+            'new_records': count_records(domain, data),
+            'runs': 0,
+            'previous': previous
+        }
+
+    # The update note goes in the system prompt so the user prompt keeps the
+    # template's static prefix; the previous summary follows the new data
+    request = build_domain_prompt(domain, new_data)
+    request = add_prompt_section(request, 'PREVIOUS ANALYSIS SUMMARY', compact_json(
+        dict(previous['rolling_summary'], watermark=previous['watermark'])
+    ))
+    request['system_prompt'] += INCREMENTAL_INSTRUCTIONS
+
+    return {
+        'mode': 'incremental',
+        'request': request,
+        'new_records': count_records(domain, new_data),
+        'runs': runs + 1,
+        'previous': previous
+    }
+
+def build_insight_metadata(domain: str, data: Dict[str, Any], content: str,
+                           plan: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the rolling summary and watermark to store with a new insight."""
+    return {
+        'analysis_mode': plan['mode'],
+        'incremental_runs': plan['runs'],
+        'records_sent': plan['new_records'],
+        'watermark': get_data_watermark(domain, data),
+        'data_fingerprint': get_data_fingerprint(domain, data),
+        'rolling_summary': {
+            'aggregates': summarize_domain_data(domain, data),
+            'findings': truncate_to_tokens(content, SUMMARY_FINDINGS_TOKENS)
+        }
+    }
@@ -0,0 +1,168 @@
+import threading
+from datetime import datetime, date, timedelta
+from typing import List, Dict, Any, Optional
+
+from utils.user_utils import load_user_data, save_user_data
+from utils.data_utils import load_food_entries
+from utils.structured_insights import index_structured_insight
+from utils.insight_utils import build_ai_insight_prompt
+from utils.oura_utils import build_oura_insight_prompt, save_oura_insight, get_oura_insights
+from utils.oura_store import load_oura_data, load_oura_trends
+from utils.oura_trends import compute_oura_trends
+from utils.task_utils import load_tasks, build_task_insight_prompt, save_task_insight, get_task_insights
+from utils.goal_utils import load_goals, build_goal_insight_prompt, save_goal_insight, get_goal_insights
+from utils.meal_utils import build_meal_recommendation_prompt, save_meal_insight, get_meal_insights
+from utils.selfcare_utils import (
+    load_selfcare_tasks,
+    build_selfcare_insight_prompt,
+    save_selfcare_insight,
+    get_selfcare_insights
+)
+
+# Insight domains in the order they are shown
+INSIGHT_DOMAINS = ['food', 'oura', 'tasks', 'goals', 'meals', 'selfcare']
+
+DOMAIN_LABELS = {
+    'food': 'Food Journal',
+    'oura': 'OURA Sleep & Food',
+    'tasks': 'Tasks',
+    'goals': 'Goals',
+    'meals': 'Meal Recommendations',
+    'selfcare': 'Self-Care'
+}
+
+# Days of journal entries the food insight looks at
+FOOD_INSIGHT_DAYS = 30
+
+# Insight stores are read-modify-write JSON files; one save at a time
+_save_lock = threading.Lock()
+
+def get_recent_entries(entries: List[Dict[str, Any]], days: int = FOOD_INSIGHT_DAYS) -> List[Dict[str, Any]]:
+    """Get journal entries from the last `days` days."""
+    start = date.today() - timedelta(days=days)
+    recent = []
+    for entry in entries:
+        if 'timestamp' in entry:
+            entry_date = datetime.fromisoformat(entry['timestamp']).date()
+            if start <= entry_date <= date.today():
+                recent.append(entry)
+    return recent
+
+def load_domain_data(username: str, domain: str, oura_data: Any = None) -> Optional[Dict[str, Any]]:
+    """Load what a domain's insight is generated from (the same data its page uses).
+
+    Returns None if the domain has nothing to analyze. OURA data and its
+    rolling trends come from the user's OURA store unless `oura_data` is
+    passed in.
+    """
+    if domain == 'food':
+        entries = get_recent_entries(load_user_data(username, "food_journal.json"))
+        return {'entries': entries} if entries else None
+
+    if domain == 'oura':
+        trends = None
+        if oura_data is None:
+            oura_data = load_oura_data(username)
+            trends = load_oura_trends(username)
+        if oura_data is None or len(oura_data) == 0:
+            return None
+        if trends is None:
+            trends = compute_oura_trends(oura_data)
+        return {'oura_data': oura_data, 'oura_trends': trends, 'food_entries': load_food_entries()}
+
+    if domain == 'tasks':
+        tasks = load_tasks()
+        return {'tasks': tasks} if tasks else None
+
+    if domain == 'goals':
+        goals = load_goals()
+        return {'goals': goals} if goals else None
+
+    if domain == 'meals':
+        food_entries = load_food_entries()
+        return {'food_entries': food_entries, 'symptoms': []} if food_entries else None
+
+    if domain == 'selfcare':
+        tasks = load_selfcare_tasks()
+        return {'tasks': tasks} if tasks else None
+
+    raise ValueError(f"Unknown insight domain: {domain}")
+
+def build_domain_prompt(domain: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the LLM request for a domain from its loaded data."""
+    if domain == 'food':
+        return build_ai_insight_prompt(data['entries'])
+    if domain == 'oura':
+        return build_oura_insight_prompt(data['oura_data'], data['food_entries'], trends=data.get('oura_trends'))
+    if domain == 'tasks':
+        return build_task_insight_prompt(data['tasks'])
+    if domain == 'goals':
+        return build_goal_insight_prompt(data['goals'])
+    if domain == 'meals':
+        return build_meal_recommendation_prompt(data['food_entries'], data['symptoms'])
+    if domain == 'selfcare':
+        return build_selfcare_insight_prompt(data['tasks'])
+
+    raise ValueError(f"Unknown insight domain: {domain}")
+
+def save_domain_insight(username: str, domain: str, content: str, data: Dict[str, Any],
+                        metadata: Optional[Dict[str, Any]] = None) -> None:
+    """Persist a generated insight where the domain's page reads it from.
+
+    The username and any `metadata` are stored with the insight. Structured
+    fields (metadata['structured']) are also added to the queryable index.
+    """
+    metadata = dict(metadata or {}, username=username)
+
+    with _save_lock:
+        _save_domain_insight(username, domain, content, data, metadata)
+
+    if metadata.get('structured'):
+        index_structured_insight(username, domain, metadata['structured'])
+
+def _save_domain_insight(username: str, domain: str, content: str, data: Dict[str, Any],
+                         metadata: Dict[str, Any]) -> None:
+    if domain == 'food':
+        insight = {
+            'content': content,
+            'entries_analyzed': len(data['entries']),
+            'date_range': f"{(date.today() - timedelta(days=FOOD_INSIGHT_DAYS)).isoformat()} to {date.today().isoformat()}",
+            'timestamp': datetime.now().isoformat()
+        }
+        insight.update(metadata)
+        user_insights = load_user_data(username, "insights.json")
+        user_insights.append(insight)
+        save_user_data(username, "insights.json", user_insights)
+    elif domain == 'oura':
+        save_oura_insight(content, len(data['oura_data']), len(data['food_entries']), metadata)
+    elif domain == 'tasks':
+        save_task_insight(content, len(data['tasks']), metadata)
+    elif domain == 'goals':
+        save_goal_insight(content, len(data['goals']), metadata)
+    elif domain == 'meals':
+        save_meal_insight(content, len(data['food_entries']), metadata)
+    elif domain == 'selfcare':
+        save_selfcare_insight(content, len(data['tasks']), metadata)
+    else:
+        raise ValueError(f"Unknown insight domain: {domain}")
+
+def get_domain_insights(username: str, domain: str) -> List[Dict[str, Any]]:
+    """Get a user's saved insights for a domain, oldest first.
+
+    Insights in the shared store saved before usernames were recorded are
+    not attributed to anyone.
+    """
+    if domain == 'food':
+        return load_user_data(username, "insights.json")
+
+    getters = {
+        'oura': get_oura_insights,
+        'tasks': get_task_insights,
+        'goals': get_goal_insights,
+        'meals': get_meal_insights,
+        'selfcare': get_selfcare_insights
+    }
+    if domain not in getters:
+        raise ValueError(f"Unknown insight domain: {domain}")
+
+    return [insight for insight in getters[domain]() if insight.get('username') == username]
@@ -0,0 +1,247 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from utils.user_utils import USER_DATA_DIR, ensure_user_data_dir
+from utils.llm_client import complete_chat
+from utils.llm_scheduler import set_llm_user
+from utils.insight_domains import load_domain_data, build_domain_prompt, save_domain_insight
+from utils.incremental_insights import build_insight_metadata, count_records
+
+# Queue settings (overridable through environment variables)
+INSIGHT_JOBS_FILE = os.path.join(USER_DATA_DIR, "insight_jobs.sqlite")
+INSIGHT_JOB_WORKERS = int(os.getenv('INSIGHT_JOB_WORKERS', '4'))
+# Queued/running jobs whose owning process has not touched them for this long
+# are marked as interrupted (the owner heartbeats every quarter of it)
+INSIGHT_JOB_STALE_SECONDS = float(os.getenv('INSIGHT_JOB_STALE_SECONDS', '60'))
+# Finished and failed jobs (with their results) kept per user; older ones are deleted
+INSIGHT_JOB_KEEP_PER_USER = int(os.getenv('INSIGHT_JOB_KEEP_PER_USER', '50'))
+
+# Finished jobs used for the latency metrics
+METRICS_WINDOW = 200
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+# Process-wide worker pool, started on first enqueue
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_enqueue_lock = threading.Lock()
+_heartbeat_thread: Optional[threading.Thread] = None
+
+# Identifies this process's jobs (a PID alone is reused across container restarts)
+_OWNER = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+def _connect() -> sqlite3.Connection:
+    """Open a connection to the job database, creating the schema once."""
+    global _schema_ready
+
+    ensure_user_data_dir()
+    conn = sqlite3.connect(INSIGHT_JOBS_FILE, timeout=10)
+    conn.row_factory = sqlite3.Row
+
+    if not _schema_ready:
+        with _schema_lock:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    username TEXT NOT NULL,
+                    domain TEXT NOT NULL,
+                    data_version TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    owner TEXT,
+                    heartbeat_at REAL,
+                    UNIQUE (username, domain, data_version)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_user ON jobs (username, created_at)")
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (('owner', 'TEXT'), ('heartbeat_at', 'REAL')):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            conn.commit()
+            _schema_ready = True
+
+    return conn
+
+def _reap_stale_jobs(conn: sqlite3.Connection) -> None:
+    """Mark queued/running jobs whose owning process stopped heartbeating as interrupted.
+
+    Their data only lived in that process, so they can never finish.
+    """
+    now = time.time()
+    conn.execute(
+        "UPDATE jobs SET status = 'error', error = 'Interrupted by a restart', finished_at = ? "
+        "WHERE status IN ('queued', 'running') AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+        (now, now - INSIGHT_JOB_STALE_SECONDS)
+    )
+    conn.commit()
+
+def _prune_finished_jobs(conn: sqlite3.Connection, username: str) -> None:
+    """Delete a user's finished and failed jobs beyond the newest INSIGHT_JOB_KEEP_PER_USER."""
+    conn.execute(
+        "DELETE FROM jobs WHERE username = ? AND status IN ('done', 'error') AND id NOT IN ("
+        "SELECT id FROM jobs WHERE username = ? AND status IN ('done', 'error') "
+        "ORDER BY created_at DESC LIMIT ?)",
+        (username, username, INSIGHT_JOB_KEEP_PER_USER)
+    )
+    conn.commit()
+
+def _heartbeat() -> None:
+    """Keep this process's unfinished jobs from being reaped by other processes."""
+    while True:
+        time.sleep(INSIGHT_JOB_STALE_SECONDS / 4)
+        try:
+            with closing(_connect()) as conn:
+                conn.execute(
+                    "UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status IN ('queued', 'running')",
+                    (time.time(), _OWNER)
+                )
+                conn.commit()
+        except sqlite3.Error:
+            # A locked database skips one beat; the stale window allows for a few
+            pass
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get the shared worker pool."""
+    global _executor, _heartbeat_thread
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=INSIGHT_JOB_WORKERS, thread_name_prefix="insight-job")
+                _heartbeat_thread = threading.Thread(target=_heartbeat, name="insight-job-heartbeat", daemon=True)
+                _heartbeat_thread.start()
+    return _executor
+
+def get_data_version(request: Dict[str, Any]) -> str:
+    """Hash an LLM request; identical data gives an identical version."""
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+def _run_job(job_id: str, username: str, domain: str, request: Dict[str, Any], data: Dict[str, Any]) -> None:
+    """Worker body: call the LLM, save the insight and record the outcome."""
+    set_llm_user(username)
+    with closing(_connect()) as conn:
+        now = time.time()
+        conn.execute("UPDATE jobs SET status = 'running', started_at = ?, heartbeat_at = ? WHERE id = ?",
+                     (now, now, job_id))
+        conn.commit()
+
+    try:
+        content = complete_chat(**request)
+        # Jobs run full analyses; the rolling summary lets later updates be incremental
+        plan = {'mode': 'full', 'runs': 0, 'new_records': count_records(domain, data)}
+        save_domain_insight(username, domain, content, data, build_insight_metadata(domain, data, content, plan))
+        status, result, error = 'done', content, None
+    except Exception as e:
+        status, result, error = 'error', None, str(e)
+
+    with closing(_connect()) as conn:
+        conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+            (status, result, error, time.time(), job_id)
+        )
+        conn.commit()
+
+def enqueue_insight_job(username: str, domain: str, oura_data: Any = None) -> Optional[str]:
+    """Queue insight generation for a domain and return the job id.
+
+    A job for the same user, domain and data version is reused instead of
+    queuing a duplicate (failed jobs are retried). Returns None if the
+    domain has no data to analyze.
+    """
+    data = load_domain_data(username, domain, oura_data=oura_data)
+    if data is None:
+        return None
+
+    request = build_domain_prompt(domain, data)
+    data_version = get_data_version(request)
+
+    with _enqueue_lock, closing(_connect()) as conn:
+        _reap_stale_jobs(conn)
+        _prune_finished_jobs(conn, username)
+        existing = conn.execute(
+            "SELECT id, status FROM jobs WHERE username = ? AND domain = ? AND data_version = ?",
+            (username, domain, data_version)
+        ).fetchone()
+        if existing is not None and existing['status'] != 'error':
+            return existing['id']
+        if existing is not None:
+            conn.execute("DELETE FROM jobs WHERE id = ?", (existing['id'],))
+
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn.execute(
+            "INSERT INTO jobs (id, username, domain, data_version, status, created_at, owner, heartbeat_at) "
+            "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+            (job_id, username, domain, data_version, now, _OWNER, now)
+        )
+        conn.commit()
+
+    _get_executor().submit(_run_job, job_id, username, domain, request, data)
+    return job_id
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Get a job's status and result."""
+    with closing(_connect()) as conn:
+        _reap_stale_jobs(conn)
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return dict(row) if row is not None else None
+
+def get_user_jobs(username: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """Get a user's most recent jobs, newest first."""
+    with closing(_connect()) as conn:
+        rows = conn.execute(
+            "SELECT * FROM jobs WHERE username = ? ORDER BY created_at DESC LIMIT ?",
+            (username, limit)
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+def get_job_queue_metrics() -> Dict[str, Any]:
+    """Get queue depth, job counts and wait/run latency percentiles (seconds)."""
+    with closing(_connect()) as conn:
+        _reap_stale_jobs(conn)
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        finished = conn.execute(
+            "SELECT started_at - created_at, finished_at - started_at FROM jobs "
+            "WHERE status = 'done' ORDER BY finished_at DESC LIMIT ?",
+            (METRICS_WINDOW,)
+        ).fetchall()
+
+    metrics = {
+        'depth': counts.get('queued', 0),
+        'running': counts.get('running', 0),
+        'done': counts.get('done', 0),
+        'failed': counts.get('error', 0),
+        'workers': INSIGHT_JOB_WORKERS
+    }
+
+    if finished:
+        waits = np.array([row[0] for row in finished])
+        runs = np.array([row[1] for row in finished])
+        metrics.update({
+            'wait_p50': float(np.percentile(waits, 50)),
+            'wait_p95': float(np.percentile(waits, 95)),
+            'run_p50': float(np.percentile(runs, 50)),
+            'run_p95': float(np.percentile(runs, 95))
+        })
+    else:
+        metrics.update({'wait_p50': 0.0, 'wait_p95': 0.0, 'run_p50': 0.0, 'run_p95': 0.0})
+
+    return metrics
@@ -1,10 +1,13 @@
 import json
 import os
 from datetime import datetime
-from typing import List, Dict, Any
-import openai
+from typing import List, Dict, Any, Iterator, Union
 from dotenv import load_dotenv
 
+from utils.llm_client import generate_insight, stream_insight
+from utils.prompt_utils import PROMPT_DATA_TOKEN_BUDGET, build_budgeted_data, drop_empty, summarize_food_entries
+from utils.prompt_templates import render_prompt
+
 # Load environment variables
 load_dotenv()
 
@@ -38,74 +41,54 @@ def load_insights() -> List[Dict[str, Any]]:
     except (json.JSONDecodeError, FileNotFoundError):
         return []
 
-def generate_ai_insights(entries: List[Dict[str, Any]]) -> str:
-    """Generate AI insights using GROQ based on food journal entries."""
-    if not entries:
-        return "No entries found to analyze."
-    
-    # Set up GROQ client
-    api_key = os.getenv('GROQ_API_KEY')
-    if not api_key:
-        return "GROQ API key not found. Please set GROQ_API_KEY environment variable."
+def build_ai_insight_prompt(entries: List[Dict[str, Any]], token_budget: int = PROMPT_DATA_TOKEN_BUDGET) -> Dict[str, Any]:
+    """Build the chat request (prompts and sampling settings) for food journal insights.
 
-    client = openai.OpenAI(
-        api_key=api_key,
-        base_url="https://api.groq.com/openai/v1"
-    )
-    
+    The data section is aggregates over all entries plus as many recent
+    entries as fit in `token_budget` tokens.
+    """
     # Prepare the data for analysis
     analysis_data = []
-    for entry in entries:
+    for entry in sorted(entries, key=lambda e: e.get('timestamp', '')):
         # Use meal_time if available, otherwise fall back to timestamp
         if 'meal_time' in entry and entry['meal_time']:
             meal_time = entry['meal_time']
         else:
             meal_time = datetime.fromisoformat(entry['timestamp']).strftime('%H:%M')
         
-        analysis_entry = {
+        analysis_entry = drop_empty({
             'date': datetime.fromisoformat(entry['timestamp']).strftime('%Y-%m-%d'),
             'time': meal_time,
             'meal_type': entry.get('meal_type', 'Unknown'),
             'food_items': entry.get('food_items', []),
             'supplements': entry.get('supplements', []),
             'symptoms': entry.get('symptoms', [])
-        }
+        })
         analysis_data.append(analysis_entry)
     
-    # Create prompt for GROQ
-    prompt = f"""
-    Analyze the following food journal entries and provide insights about potential patterns, triggers, and recommendations:
-
-    {json.dumps(analysis_data, indent=2)}
-
-    Note: The 'time' field represents when the meal was actually consumed (not when it was logged).
+    # Aggregates are computed locally so the model interprets exact numbers
+    data = build_budgeted_data(summarize_food_entries(entries), analysis_data, token_budget)
+    
+    return render_prompt('food', [('FOOD JOURNAL DATA', data)])
 
-    Please provide insights on:
-    1. Potential food triggers for symptoms (especially bloating, digestive issues)
-    2. Meal timing patterns and their effects (analyze if meal times are realistic and well-spaced)
-    3. Supplement effectiveness
-    4. Dietary patterns and recommendations
-    5. Any correlations between food choices and symptoms
-    6. Meal timing recommendations (optimal spacing between meals)
+def generate_ai_insights(entries: List[Dict[str, Any]], structured: bool = False) -> Union[str, Dict[str, Any]]:
+    """Generate AI insights using GROQ based on food journal entries.
 
-    Format your response in a clear, actionable way with specific recommendations.
+    With `structured`, returns the validated findings, triggers, recommendations
+    and confidence (rendered markdown in 'content') instead of free text.
     """
+    if not entries:
+        return "No entries found to analyze."
     
-    try:
-        response = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[
-                {"role": "system", "content": "You are a nutrition and health expert analyzing food journal data to identify patterns and provide actionable insights."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=1000,
-            temperature=0.7
-        )
-        
-        return response.choices[0].message.content
+    return generate_insight('food', lambda: build_ai_insight_prompt(entries), {'entries': entries}, structured=structured)
+
+def stream_ai_insights(entries: List[Dict[str, Any]]) -> Iterator[str]:
+    """Stream food journal insights as they are generated (same request as generate_ai_insights)."""
+    if not entries:
+        yield "No entries found to analyze."
+        return
     
-    except Exception as e:
-        return f"Error generating insights: {str(e)}"
+    yield from stream_insight('food', lambda: build_ai_insight_prompt(entries), {'entries': entries})
 
 def format_insight_for_display(insight: Dict[str, Any]) -> str:
     """Format an insight for display."""
@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+
+import openai
+
+# Circuit breaker settings (overridable through environment variables)
+LLM_BREAKER_FAILURES = int(os.getenv('LLM_BREAKER_FAILURES', '3'))
+LLM_BREAKER_SLOW_SECONDS = float(os.getenv('LLM_BREAKER_SLOW_SECONDS', '20'))
+LLM_BREAKER_OPEN_SECONDS = float(os.getenv('LLM_BREAKER_OPEN_SECONDS', '30'))
+LLM_BREAKER_DISABLED = os.getenv('LLM_BREAKER_DISABLED', '0') == '1'
+
+class LLMUnavailableError(RuntimeError):
+    """Raised instead of calling the provider while the circuit breaker is open."""
+
+# One breaker per process: 'closed' lets calls through, 'open' rejects them
+# until the cool-down ends, 'half_open' lets a single probe call through
+_lock = threading.Lock()
+_state = {
+    'state': 'closed',
+    'failures': 0,
+    'opened_at': 0.0,
+    'probing': False
+}
+_metrics = {'trips': 0, 'rejected': 0, 'slow_calls': 0}
+
+def is_provider_failure(error: Exception) -> bool:
+    """Whether an error means the provider is degraded (not a bad request)."""
+    return isinstance(error, (openai.APIConnectionError, openai.InternalServerError, openai.RateLimitError))
+
+def allow_llm_call() -> bool:
+    """Whether a call may go to the provider now.
+
+    Every allowed call must be followed by record_llm_result, which also
+    ends a half-open probe.
+    """
+    if LLM_BREAKER_DISABLED:
+        return True
+
+    with _lock:
+        if _state['state'] == 'open':
+            if time.monotonic() - _state['opened_at'] < LLM_BREAKER_OPEN_SECONDS:
+                _metrics['rejected'] += 1
+                return False
+            _state['state'] = 'half_open'
+            _state['probing'] = False
+
+        if _state['state'] == 'half_open':
+            if _state['probing']:
+                _metrics['rejected'] += 1
+                return False
+            _state['probing'] = True
+        return True
+
+def record_llm_result(seconds: float, error: Optional[Exception] = None) -> None:
+    """Record how a call that allow_llm_call let through went.
+
+    Provider failures and calls slower than LLM_BREAKER_SLOW_SECONDS count
+    against the breaker; LLM_BREAKER_FAILURES of them in a row, or a failed
+    half-open probe, open it. Anything else closes it again.
+    """
+    if LLM_BREAKER_DISABLED:
+        return
+
+    slow = error is None and seconds > LLM_BREAKER_SLOW_SECONDS
+    failed = slow or (error is not None and is_provider_failure(error))
+
+    with _lock:
+        probe = _state['state'] == 'half_open'
+        _state['probing'] = False
+        if slow:
+            _metrics['slow_calls'] += 1
+
+        if not failed:
+            _state['state'] = 'closed'
+            _state['failures'] = 0
+            return
+
+        _state['failures'] += 1
+        if probe or _state['failures'] >= LLM_BREAKER_FAILURES:
+            if _state['state'] != 'open':
+                _metrics['trips'] += 1
+            _state['state'] = 'open'
+            _state['opened_at'] = time.monotonic()
+
+def check_llm_available() -> None:
+    """Raise LLMUnavailableError unless allow_llm_call lets this call through."""
+    if not allow_llm_call():
+        raise LLMUnavailableError(
+            f"The AI provider is failing, so AI calls are paused for up to {LLM_BREAKER_OPEN_SECONDS:.0f}s."
+        )
+
+def get_breaker_state() -> Dict[str, Any]:
+    """Get the breaker state, consecutive failures and trip/reject counters."""
+    with _lock:
+        retry_in = None
+        if _state['state'] == 'open':
+            retry_in = max(0.0, LLM_BREAKER_OPEN_SECONDS - (time.monotonic() - _state['opened_at']))
+        return {
+            'state': _state['state'],
+            'failures': _state['failures'],
+            'retry_in_seconds': retry_in,
+            'trips': _metrics['trips'],
+            'rejected': _metrics['rejected'],
+            'slow_calls': _metrics['slow_calls']
+        }
+
+def reset_breaker() -> None:
+    """Close the breaker and forget past failures."""
+    with _lock:
+        _state.update(state='closed', failures=0, opened_at=0.0, probing=False)
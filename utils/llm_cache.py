@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Dict, Any, Optional
+
+from utils.user_utils import USER_DATA_DIR, ensure_user_data_dir
+
+# Cache settings (overridable through environment variables)
+LLM_CACHE_FILE = os.path.join(USER_DATA_DIR, "llm_cache.sqlite")
+LLM_CACHE_TTL_SECONDS = float(os.getenv('LLM_CACHE_TTL_SECONDS', str(24 * 3600)))
+LLM_CACHE_MAX_BYTES = int(os.getenv('LLM_CACHE_MAX_BYTES', str(50 * 1024 * 1024)))
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+def is_llm_cache_enabled() -> bool:
+    """Check whether response caching is on (set LLM_CACHE_DISABLED=1 to turn it off)."""
+    return os.getenv('LLM_CACHE_DISABLED', '').lower() not in ('1', 'true', 'yes')
+
+def _connect() -> sqlite3.Connection:
+    """Open a connection to the cache database, creating the schema once."""
+    global _schema_ready
+
+    ensure_user_data_dir()
+    conn = sqlite3.connect(LLM_CACHE_FILE, timeout=10)
+
+    if not _schema_ready:
+        with _schema_lock:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    request_bytes INTEGER NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS metrics (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.commit()
+            _schema_ready = True
+
+    return conn
+
+def _bump_metrics(conn: sqlite3.Connection, **increments: int) -> None:
+    """Add to persistent cache counters."""
+    for name, value in increments.items():
+        conn.execute(
+            "INSERT INTO metrics (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, value)
+        )
+
+def make_cache_key(model: str, system_prompt: str, user_prompt: str,
+                   temperature: float, max_tokens: int, json_mode: bool = False) -> str:
+    """Hash everything that determines a response into a cache key."""
+    payload = json.dumps([model, system_prompt, user_prompt, temperature, max_tokens, json_mode],
+                         ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def get_cached_response(key: str) -> Optional[str]:
+    """Get a cached response, or None on a miss, an expired entry or a cache error."""
+    if not is_llm_cache_enabled():
+        return None
+
+    now = time.time()
+    try:
+        with closing(_connect()) as conn:
+            row = conn.execute(
+                "SELECT response, request_bytes, size_bytes, created_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+            if row is None or now - row[3] > LLM_CACHE_TTL_SECONDS:
+                if row is not None:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                _bump_metrics(conn, misses=1)
+                conn.commit()
+                return None
+
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            _bump_metrics(conn, hits=1, bytes_saved=row[1] + row[2])
+            conn.commit()
+            return row[0]
+    except sqlite3.Error:
+        # A locked or broken cache is a miss, not a failed LLM call
+        return None
+
+def set_cached_response(key: str, response: str, request_bytes: int = 0) -> None:
+    """Store a response, then evict expired and least recently used entries over the size cap.
+
+    Database errors (locked, disk full) are ignored; the response just isn't cached.
+    """
+    if not is_llm_cache_enabled():
+        return
+
+    now = time.time()
+    size_bytes = len(response.encode('utf-8'))
+
+    try:
+        with closing(_connect()) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, request_bytes, size_bytes, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, response, request_bytes, size_bytes, now, now)
+            )
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (now - LLM_CACHE_TTL_SECONDS,))
+
+            total_bytes = conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM responses").fetchone()[0]
+            if total_bytes > LLM_CACHE_MAX_BYTES:
+                # Walk from least recently used until back under the cap
+                evicted = 0
+                for old_key, old_size in conn.execute(
+                    "SELECT key, size_bytes FROM responses ORDER BY last_access ASC"
+                ).fetchall():
+                    if total_bytes <= LLM_CACHE_MAX_BYTES:
+                        break
+                    conn.execute("DELETE FROM responses WHERE key = ?", (old_key,))
+                    total_bytes -= old_size
+                    evicted += 1
+                _bump_metrics(conn, evictions=evicted)
+
+            conn.commit()
+    except sqlite3.Error:
+        # Not caching this response is fine; failing the call that produced it is not
+        pass
+
+def get_cache_metrics() -> Dict[str, Any]:
+    """Get cache hit rate, bytes saved and current size."""
+    with closing(_connect()) as conn:
+        counters = dict(conn.execute("SELECT name, value FROM metrics").fetchall())
+        entries, total_bytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM responses"
+        ).fetchone()
+
+    hits = counters.get('hits', 0)
+    misses = counters.get('misses', 0)
+    lookups = hits + misses
+
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': (hits / lookups) * 100 if lookups else 0.0,
+        'bytes_saved': counters.get('bytes_saved', 0),
+        'evictions': counters.get('evictions', 0),
+        'entries': entries,
+        'total_bytes': total_bytes
+    }
+
+def clear_llm_cache() -> None:
+    """Remove all cached responses (metrics are kept)."""
+    with closing(_connect()) as conn:
+        conn.execute("DELETE FROM responses")
+        conn.commit()
@@ -0,0 +1,412 @@
+import asyncio
+import os
+import threading
+import time
+from typing import List, Dict, Any, Optional, Iterator, Callable, Union
+
+import httpx
+import openai
+from dotenv import load_dotenv
+
+from utils.llm_cache import make_cache_key, get_cached_response, set_cached_response
+from utils.llm_scheduler import acquire_llm_slot, get_retry_delay, call_with_retries, acall_with_retries
+from utils.llm_telemetry import start_llm_call, finish_llm_call
+from utils.llm_breaker import LLMUnavailableError, check_llm_available, record_llm_result
+from utils.llm_routing import resolve_route, should_fall_back
+
+# Load environment variables
+load_dotenv()
+
+# Connection settings (overridable through environment variables)
+DEFAULT_BASE_URL = "https://api.groq.com/openai/v1"
+LLM_TIMEOUT_SECONDS = float(os.getenv('LLM_TIMEOUT_SECONDS', '60'))
+LLM_CONNECT_TIMEOUT_SECONDS = float(os.getenv('LLM_CONNECT_TIMEOUT_SECONDS', '10'))
+LLM_MAX_CONNECTIONS = int(os.getenv('LLM_MAX_CONNECTIONS', '20'))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('LLM_MAX_KEEPALIVE_CONNECTIONS', '10'))
+LLM_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv('LLM_KEEPALIVE_EXPIRY_SECONDS', '120'))
+# Retries are done by the scheduler (utils/llm_scheduler.py), not the SDK
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '0'))
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '6'))
+
+MISSING_KEY_MESSAGE = "GROQ API key not found. Please set GROQ_API_KEY environment variable."
+
+# Process-wide client, recreated only if the API key or base URL changes
+_client: Optional[openai.OpenAI] = None
+_client_config: Optional[tuple] = None
+_client_lock = threading.Lock()
+
+def get_llm_base_url() -> str:
+    """Get the OpenAI-compatible base URL (GROQ unless LLM_BASE_URL is set)."""
+    return os.getenv('LLM_BASE_URL', DEFAULT_BASE_URL)
+
+def get_llm_timeout() -> httpx.Timeout:
+    """Get the request timeout used by the shared client."""
+    return httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=LLM_CONNECT_TIMEOUT_SECONDS)
+
+def get_llm_client() -> Optional[openai.OpenAI]:
+    """Get the shared LLM client, creating it on first use.
+
+    Returns None if GROQ_API_KEY is not set. The client keeps a pool of
+    keep-alive connections so repeated calls skip TCP/TLS setup.
+    """
+    global _client, _client_config
+
+    api_key = os.getenv('GROQ_API_KEY')
+    if not api_key:
+        return None
+
+    config = (api_key, get_llm_base_url())
+    if _client is not None and _client_config == config:
+        return _client
+
+    with _client_lock:
+        if _client is None or _client_config != config:
+            # A replaced client is left to the garbage collector since other
+            # threads may still be mid-request on it
+            http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=LLM_KEEPALIVE_EXPIRY_SECONDS
+                ),
+                timeout=get_llm_timeout()
+            )
+            _client = openai.OpenAI(
+                api_key=api_key,
+                base_url=config[1],
+                timeout=get_llm_timeout(),
+                max_retries=LLM_MAX_RETRIES,
+                http_client=http_client
+            )
+            _client_config = config
+
+    return _client
+
+def close_llm_client() -> None:
+    """Close the shared client and its connection pool."""
+    global _client, _client_config
+
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _client_config = None
+
+def _messages(system_prompt: str, user_prompt: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+
+def complete_chat(system_prompt: str, user_prompt: str, max_tokens: int = 1000,
+                  temperature: float = 0.7, model: Optional[str] = None, domain: str = 'general',
+                  route: Optional[str] = None, json_mode: bool = False,
+                  prompt_version: Optional[str] = None) -> str:
+    """Run a chat completion through the shared client and the response cache.
+
+    The model comes from the route for `domain` (or the named `route`) unless
+    `model` is given; when a model times out or is unavailable the route's
+    fallback models are tried in turn. Each attempt goes through the
+    scheduler (concurrency, rate limit, per-user fairness, retries) and the
+    call is recorded in the telemetry log with its `prompt_version` (the
+    template it was built from). `json_mode` asks the provider for
+    a JSON object response. Only the primary model's responses are cached,
+    keyed on it. Raises RuntimeError if no API key is configured
+    and LLMUnavailableError, without calling the provider, while the circuit
+    breaker is open; provider errors that survive the retries propagate.
+    """
+    selected = resolve_route(domain, route, model)
+    models = selected['models']
+    call = start_llm_call(domain, models[0], system_prompt, user_prompt, route=selected['name'],
+                          prompt_version=prompt_version)
+    key = make_cache_key(models[0], system_prompt, user_prompt, temperature, max_tokens, json_mode)
+    cached = get_cached_response(key)
+    if cached is not None:
+        finish_llm_call(call, cache_hit=True)
+        return cached
+
+    client = get_llm_client()
+    if client is None:
+        raise RuntimeError(MISSING_KEY_MESSAGE)
+
+    try:
+        check_llm_available()
+    except LLMUnavailableError as e:
+        finish_llm_call(call, error=e)
+        raise
+
+    # The breaker is given the provider time of the last attempt only; queueing
+    # and backoff stay in the call's end-to-end telemetry
+    timing = {'seconds': 0.0}
+    for index, model_name in enumerate(models):
+        has_fallback = index < len(models) - 1
+        try:
+            response = call_with_retries(lambda: client.chat.completions.create(
+                model=model_name,
+                messages=_messages(system_prompt, user_prompt),
+                max_tokens=max_tokens,
+                temperature=temperature,
+                timeout=selected['timeout'],
+                response_format={"type": "json_object"} if json_mode else openai.NOT_GIVEN
+            ), retry_timeouts=not has_fallback, timing=timing)
+            break
+        except Exception as e:
+            if has_fallback and should_fall_back(e):
+                continue
+            record_llm_result(timing['seconds'], e)
+            finish_llm_call(call, error=e)
+            raise
+
+    record_llm_result(timing['seconds'])
+    call.update(model=model_name, fallback=index > 0)
+    finish_llm_call(call, usage=response.usage)
+    content = response.choices[0].message.content
+
+    # The key is the primary model's; a fallback model's answer is not cached under it
+    if index == 0:
+        request_bytes = len(system_prompt.encode('utf-8')) + len(user_prompt.encode('utf-8'))
+        set_cached_response(key, content, request_bytes)
+    return content
+
+def stream_chat(system_prompt: str, user_prompt: str, max_tokens: int = 1000,
+                temperature: float = 0.7, model: Optional[str] = None, domain: str = 'general',
+                route: Optional[str] = None, prompt_version: Optional[str] = None) -> Iterator[str]:
+    """Stream a chat completion as text chunks through the shared client.
+
+    A cache hit is yielded as a single chunk; a completed stream from the
+    primary model is cached.
+    The scheduler slot is held until the stream ends; only opening the stream
+    is retried or moved to a fallback model. Telemetry records the time to
+    the first token.
+    """
+    selected = resolve_route(domain, route, model)
+    models = selected['models']
+    call = start_llm_call(domain, models[0], system_prompt, user_prompt, route=selected['name'],
+                          prompt_version=prompt_version)
+    key = make_cache_key(models[0], system_prompt, user_prompt, temperature, max_tokens)
+    cached = get_cached_response(key)
+    if cached is not None:
+        finish_llm_call(call, cache_hit=True, first_token_at=time.perf_counter())
+        yield cached
+        return
+
+    client = get_llm_client()
+    if client is None:
+        raise RuntimeError(MISSING_KEY_MESSAGE)
+
+    try:
+        check_llm_available()
+    except LLMUnavailableError as e:
+        finish_llm_call(call, error=e)
+        raise
+
+    index = 0
+    attempt = 0
+    while True:
+        has_fallback = index < len(models) - 1
+        release = acquire_llm_slot()
+        started = time.perf_counter()
+        try:
+            stream = client.chat.completions.create(
+                model=models[index],
+                messages=_messages(system_prompt, user_prompt),
+                max_tokens=max_tokens,
+                temperature=temperature,
+                timeout=selected['timeout'],
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            break
+        except Exception as e:
+            elapsed = time.perf_counter() - started
+            release()
+            if has_fallback and should_fall_back(e):
+                index += 1
+                attempt = 0
+                continue
+            delay = get_retry_delay(e, attempt, retry_timeouts=not has_fallback)
+            if delay is None:
+                record_llm_result(elapsed, e)
+                finish_llm_call(call, error=e)
+                raise
+            time.sleep(delay)
+            attempt += 1
+
+    # The breaker judges the stream by the provider time to open it on the
+    # last attempt; a stream that fails part-way counts as one more failure
+    record_llm_result(time.perf_counter() - started)
+    call.update(model=models[index], fallback=index > 0)
+    chunks = []
+    usage = None
+    first_token_at = None
+    error = None
+    try:
+        for chunk in stream:
+            # Usage arrives on a final chunk without choices (GROQ also sends it as x_groq)
+            extra = (chunk.model_extra or {}).get('x_groq') or {}
+            usage = chunk.usage or extra.get('usage') or usage
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content
+            if text:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                chunks.append(text)
+                yield text
+    except Exception as e:
+        error = e
+        record_llm_result(0.0, e)
+        raise
+    finally:
+        stream.close()
+        release()
+        finish_llm_call(call, usage=usage, first_token_at=first_token_at, error=error)
+
+    if index == 0:
+        request_bytes = len(system_prompt.encode('utf-8')) + len(user_prompt.encode('utf-8'))
+        set_cached_response(key, ''.join(chunks), request_bytes)
+
+def _fallback_insight(domain: str, data: Dict[str, Any]) -> str:
+    # Imported here: local_insights imports the insight modules, which import this one
+    from utils.local_insights import build_fallback_insight
+    return build_fallback_insight(domain, data)
+
+def generate_insight(domain: str, build_request: Callable[[], Dict[str, Any]], data: Dict[str, Any],
+                     what: str = "insights", structured: bool = False) -> Union[str, Dict[str, Any]]:
+    """Run a domain's insight request; the shared body of the generate_* functions.
+
+    `data` is the domain's data as load_domain_data returns it, used for
+    the local summary served while the circuit breaker is open. Other
+    failures come back as text starting with "Error generating {what}".
+    With `structured`, a successful call returns the validated insight
+    fields with the rendered markdown in 'content'; the messages above
+    are still returned as text.
+    """
+    if get_llm_client() is None:
+        return MISSING_KEY_MESSAGE
+
+    try:
+        if structured:
+            # Imported here: structured_insights imports this module
+            from utils.structured_insights import complete_structured_insight
+            return complete_structured_insight(build_request())
+        return complete_chat(**build_request())
+
+    except LLMUnavailableError:
+        return _fallback_insight(domain, data)
+
+    except Exception as e:
+        return f"Error generating {what}: {str(e)}"
+
+class InsightStreamError(RuntimeError):
+    """Raised by stream_insight when a stream fails after part of the text was yielded."""
+
+def stream_insight(domain: str, build_request: Callable[[], Dict[str, Any]], data: Dict[str, Any],
+                   what: str = "insights") -> Iterator[str]:
+    """Streaming counterpart of generate_insight, shared by the stream_* functions.
+
+    A failure before the first chunk is yielded as error text, like
+    generate_insight returns it. Once text has been yielded, an error
+    text appended to it would read as part of the insight, so
+    InsightStreamError is raised instead.
+    """
+    if get_llm_client() is None:
+        yield MISSING_KEY_MESSAGE
+        return
+
+    started = False
+    try:
+        for chunk in stream_chat(**build_request()):
+            started = True
+            yield chunk
+
+    except LLMUnavailableError as e:
+        if started:
+            raise InsightStreamError(f"Error generating {what}: the response was cut off ({e})") from e
+        yield _fallback_insight(domain, data)
+
+    except Exception as e:
+        if started:
+            raise InsightStreamError(f"Error generating {what}: the response was cut off ({e})") from e
+        yield f"Error generating {what}: {str(e)}"
+
+def create_async_llm_client() -> Optional[openai.AsyncOpenAI]:
+    """Create an async LLM client with its own connection pool.
+
+    Async connections belong to the event loop that opened them, so create one
+    client per loop and close it when done. Returns None if GROQ_API_KEY is not set.
+    """
+    api_key = os.getenv('GROQ_API_KEY')
+    if not api_key:
+        return None
+
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=LLM_KEEPALIVE_EXPIRY_SECONDS
+        ),
+        timeout=get_llm_timeout()
+    )
+    return openai.AsyncOpenAI(
+        api_key=api_key,
+        base_url=get_llm_base_url(),
+        timeout=get_llm_timeout(),
+        max_retries=LLM_MAX_RETRIES,
+        http_client=http_client
+    )
+
+async def acomplete_chat(client: openai.AsyncOpenAI, system_prompt: str, user_prompt: str,
+                         max_tokens: int = 1000, temperature: float = 0.7,
+                         model: Optional[str] = None, domain: str = 'general',
+                         route: Optional[str] = None, json_mode: bool = False,
+                         prompt_version: Optional[str] = None) -> str:
+    """Async version of complete_chat on a client from create_async_llm_client."""
+    selected = resolve_route(domain, route, model)
+    models = selected['models']
+    call = start_llm_call(domain, models[0], system_prompt, user_prompt, route=selected['name'],
+                          prompt_version=prompt_version)
+    key = make_cache_key(models[0], system_prompt, user_prompt, temperature, max_tokens, json_mode)
+    # The cache is SQLite; keep its I/O off the event loop
+    cached = await asyncio.to_thread(get_cached_response, key)
+    if cached is not None:
+        finish_llm_call(call, cache_hit=True)
+        return cached
+
+    try:
+        check_llm_available()
+    except LLMUnavailableError as e:
+        finish_llm_call(call, error=e)
+        raise
+
+    # The breaker is given the provider time of the last attempt only; queueing
+    # and backoff stay in the call's end-to-end telemetry
+    timing = {'seconds': 0.0}
+    for index, model_name in enumerate(models):
+        has_fallback = index < len(models) - 1
+        try:
+            response = await acall_with_retries(lambda: client.chat.completions.create(
+                model=model_name,
+                messages=_messages(system_prompt, user_prompt),
+                max_tokens=max_tokens,
+                temperature=temperature,
+                timeout=selected['timeout'],
+                response_format={"type": "json_object"} if json_mode else openai.NOT_GIVEN
+            ), retry_timeouts=not has_fallback, timing=timing)
+            break
+        except Exception as e:
+            if has_fallback and should_fall_back(e):
+                continue
+            record_llm_result(timing['seconds'], e)
+            finish_llm_call(call, error=e)
+            raise
+
+    record_llm_result(timing['seconds'])
+    call.update(model=model_name, fallback=index > 0)
+    finish_llm_call(call, usage=response.usage)
+    content = response.choices[0].message.content
+
+    if index == 0:
+        request_bytes = len(system_prompt.encode('utf-8')) + len(user_prompt.encode('utf-8'))
+        await asyncio.to_thread(set_cached_response, key, content, request_bytes)
+    return content
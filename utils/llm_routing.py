@@ -0,0 +1,71 @@
+import os
+from typing import List, Dict, Any, Optional
+
+import openai
+
+# Models (overridable through environment variables)
+LLM_SMALL_MODEL = os.getenv('LLM_SMALL_MODEL', 'llama3-8b-8192')
+LLM_LARGE_MODEL = os.getenv('LLM_LARGE_MODEL', 'llama3-70b-8192')
+
+# Route table: the model tried first, the models tried in order when it
+# times out or is unavailable, and the per-attempt request timeout
+MODEL_ROUTES: Dict[str, Dict[str, Any]] = {
+    'summary': {
+        'model': LLM_SMALL_MODEL,
+        'fallbacks': [LLM_LARGE_MODEL],
+        'timeout': float(os.getenv('LLM_SUMMARY_TIMEOUT_SECONDS', '15'))
+    },
+    'analysis': {
+        'model': LLM_LARGE_MODEL,
+        'fallbacks': [LLM_SMALL_MODEL],
+        'timeout': float(os.getenv('LLM_ANALYSIS_TIMEOUT_SECONDS', '45'))
+    }
+}
+
+# Route used for each request type when the request does not name one.
+# Statistics-driven task, goal and routine reviews are short summaries;
+# food, sleep and meal analyses reason over patterns and get the large model.
+REQUEST_ROUTES: Dict[str, str] = {
+    'tasks': 'summary',
+    'goals': 'summary',
+    'selfcare': 'summary',
+    'food': 'analysis',
+    'oura': 'analysis',
+    'meals': 'analysis',
+    'general': 'analysis'
+}
+
+def resolve_route(domain: str = 'general', route: Optional[str] = None,
+                  model: Optional[str] = None) -> Dict[str, Any]:
+    """Pick the route for a request.
+
+    Returns {'name', 'models', 'timeout'}: `models` is the primary model
+    followed by its fallbacks. An explicit `model` is used alone, with the
+    route's timeout.
+    """
+    name = route or REQUEST_ROUTES.get(domain, 'analysis')
+    config = MODEL_ROUTES.get(name, MODEL_ROUTES['analysis'])
+
+    if model:
+        models = [model]
+    else:
+        models = [config['model']] + [m for m in config['fallbacks'] if m != config['model']]
+
+    return {'name': name, 'models': models, 'timeout': config['timeout']}
+
+def should_fall_back(error: Exception) -> bool:
+    """Whether a failed call should move on to the route's next model."""
+    return isinstance(error, (openai.APITimeoutError, openai.NotFoundError))
+
+def get_route_table() -> List[Dict[str, Any]]:
+    """Describe the route table (request types, models, timeouts) for display."""
+    return [
+        {
+            'route': name,
+            'model': config['model'],
+            'fallbacks': ', '.join(config['fallbacks']),
+            'timeout_seconds': config['timeout'],
+            'request_types': ', '.join(sorted(t for t, r in REQUEST_ROUTES.items() if r == name))
+        }
+        for name, config in MODEL_ROUTES.items()
+    ]
@@ -0,0 +1,316 @@
+import asyncio
+import contextvars
+import os
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Callable, Awaitable, TypeVar
+
+import openai
+
+# Scheduler settings (overridable through environment variables)
+LLM_MAX_INFLIGHT = int(os.getenv('LLM_MAX_INFLIGHT', '8'))
+LLM_RATE_LIMIT_RPM = float(os.getenv('LLM_RATE_LIMIT_RPM', '30'))
+LLM_RATE_LIMIT_BURST = int(os.getenv('LLM_RATE_LIMIT_BURST', '10'))
+LLM_SCHEDULER_RETRIES = int(os.getenv('LLM_SCHEDULER_RETRIES', '4'))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv('LLM_BACKOFF_BASE_SECONDS', '1'))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv('LLM_BACKOFF_MAX_SECONDS', '30'))
+
+T = TypeVar('T')
+
+# Who the current LLM call is for; set per Streamlit session or worker
+_current_user: contextvars.ContextVar[str] = contextvars.ContextVar('llm_user', default='anonymous')
+
+_condition = threading.Condition()
+_user_queues: Dict[str, deque] = {}
+_user_ring: deque = deque()
+_state = {
+    'inflight': 0,
+    'tokens': float(LLM_RATE_LIMIT_BURST),
+    'refilled_at': time.monotonic(),
+    'blocked_until': 0.0
+}
+_metrics = {'calls': 0, 'retries': 0, 'rate_limited': 0, 'failures': 0, 'wait_seconds': 0.0}
+
+def set_llm_user(username: Optional[str]) -> None:
+    """Set the user that LLM calls in this context are queued under."""
+    _current_user.set(username or 'anonymous')
+
+def get_llm_user() -> str:
+    """Get the user that LLM calls in this context are queued under."""
+    return _current_user.get()
+
+def _refill_tokens(now: float) -> None:
+    """Add rate-limit tokens for the time since the last refill."""
+    if LLM_RATE_LIMIT_RPM <= 0:
+        _state['tokens'] = float(LLM_RATE_LIMIT_BURST)
+        return
+    elapsed = now - _state['refilled_at']
+    _state['tokens'] = min(float(LLM_RATE_LIMIT_BURST), _state['tokens'] + elapsed * LLM_RATE_LIMIT_RPM / 60)
+    _state['refilled_at'] = now
+
+def _next_grant_delay(now: float) -> Optional[float]:
+    """Seconds until a waiter could be granted, or None to wait for a release."""
+    if now < _state['blocked_until']:
+        return _state['blocked_until'] - now
+    if _state['inflight'] >= LLM_MAX_INFLIGHT:
+        return None
+    # RPM <= 0 means no rate limit: the token bucket is skipped entirely
+    if LLM_RATE_LIMIT_RPM > 0 and _state['tokens'] < 1:
+        return (1 - _state['tokens']) * 60 / LLM_RATE_LIMIT_RPM
+    return 0.0
+
+def _grant_locked() -> None:
+    """Hand free slots to waiting users in round-robin order (caller holds the lock)."""
+    now = time.monotonic()
+    _refill_tokens(now)
+
+    granted = False
+    while _user_ring and _next_grant_delay(now) == 0.0:
+        user = _user_ring.popleft()
+        ticket = _user_queues[user].popleft()
+        if _user_queues[user]:
+            # Back of the ring: every other waiting user goes first
+            _user_ring.append(user)
+        else:
+            del _user_queues[user]
+
+        ticket['granted'] = True
+        _state['inflight'] += 1
+        _state['tokens'] -= 1
+        granted = True
+        if 'wake' in ticket:
+            # An async waiter: wake its event loop
+            ticket['wake']()
+
+    if granted:
+        _condition.notify_all()
+
+def _enqueue_locked(user: str, ticket: Dict[str, Any]) -> None:
+    """Queue a ticket behind the user's earlier calls (caller holds the lock)."""
+    if user not in _user_queues:
+        _user_queues[user] = deque()
+        _user_ring.append(user)
+    _user_queues[user].append(ticket)
+
+def _make_release() -> Callable[[], None]:
+    """Get the function that gives a granted slot back (idempotent)."""
+    released = []
+
+    def release() -> None:
+        if released:
+            return
+        released.append(True)
+        with _condition:
+            _state['inflight'] -= 1
+            _grant_locked()
+            _condition.notify_all()
+
+    return release
+
+def acquire_llm_slot(user: Optional[str] = None) -> Callable[[], None]:
+    """Block until this call may go out; returns the function that releases the slot.
+
+    Calls are admitted under the global concurrency limit and the request-rate
+    token bucket, taking turns between users so one user's burst cannot
+    starve others.
+    """
+    user = user or get_llm_user()
+    ticket = {'granted': False}
+    start = time.monotonic()
+
+    with _condition:
+        _enqueue_locked(user, ticket)
+        while True:
+            _grant_locked()
+            if ticket['granted']:
+                break
+            _condition.wait(timeout=_next_grant_delay(time.monotonic()))
+
+        _metrics['calls'] += 1
+        _metrics['wait_seconds'] += time.monotonic() - start
+
+    return _make_release()
+
+async def aacquire_llm_slot(user: Optional[str] = None) -> Callable[[], None]:
+    """Async version of acquire_llm_slot; waits on the event loop, not in a thread.
+
+    If the waiting task is cancelled its ticket is withdrawn, or the slot
+    given back if it was granted meanwhile, so cancelled calls never hold a slot.
+    """
+    user = user or get_llm_user()
+    loop = asyncio.get_running_loop()
+    event = asyncio.Event()
+
+    def wake() -> None:
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:
+            # The loop has closed; its task can no longer use the slot
+            pass
+
+    ticket = {'granted': False, 'wake': wake}
+    start = time.monotonic()
+
+    with _condition:
+        _enqueue_locked(user, ticket)
+    try:
+        while True:
+            with _condition:
+                _grant_locked()
+                if ticket['granted']:
+                    _metrics['calls'] += 1
+                    _metrics['wait_seconds'] += time.monotonic() - start
+                    break
+                delay = _next_grant_delay(time.monotonic())
+            try:
+                # Granted by a release (which sets the event) or a slot frees up with time
+                await asyncio.wait_for(event.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+    except asyncio.CancelledError:
+        with _condition:
+            if ticket['granted']:
+                _state['inflight'] -= 1
+                _grant_locked()
+                _condition.notify_all()
+            else:
+                queue = _user_queues.get(user, deque())
+                for position, queued in enumerate(queue):
+                    if queued is ticket:
+                        del queue[position]
+                        break
+                if user in _user_queues and not queue:
+                    del _user_queues[user]
+                    _user_ring.remove(user)
+        raise
+
+    return _make_release()
+
+def _parse_retry_after(error: Exception) -> Optional[float]:
+    """Read Retry-After (seconds or HTTP date) or retry-after-ms from an error response."""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+
+    headers = response.headers
+    if headers.get('retry-after-ms'):
+        try:
+            return float(headers['retry-after-ms']) / 1000
+        except ValueError:
+            pass
+
+    value = headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+def get_retry_delay(error: Exception, attempt: int, retry_timeouts: bool = True) -> Optional[float]:
+    """Get how long to wait before retrying a failed call, or None if it should not be retried.
+
+    Rate limits, timeouts, connection errors and 5xx responses are retried
+    with full-jitter exponential backoff; a Retry-After header takes
+    precedence and also pauses every other call until it has passed.
+    Timeouts are not retried with `retry_timeouts` off (the caller has a
+    fallback model instead).
+    """
+    if attempt >= LLM_SCHEDULER_RETRIES:
+        return None
+    if not retry_timeouts and isinstance(error, openai.APITimeoutError):
+        return None
+
+    retryable = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)
+    if not isinstance(error, retryable):
+        return None
+
+    retry_after = _parse_retry_after(error)
+    if isinstance(error, openai.RateLimitError):
+        with _condition:
+            _metrics['rate_limited'] += 1
+            if retry_after is not None:
+                _state['blocked_until'] = max(_state['blocked_until'], time.monotonic() + retry_after)
+
+    if retry_after is not None:
+        return min(retry_after, LLM_BACKOFF_MAX_SECONDS)
+
+    cap = min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * (2 ** attempt))
+    return random.uniform(0, cap)
+
+def _record_retry(failed: bool = False) -> None:
+    with _condition:
+        _metrics['failures' if failed else 'retries'] += 1
+
+def call_with_retries(call: Callable[[], T], user: Optional[str] = None, retry_timeouts: bool = True,
+                      timing: Optional[Dict[str, float]] = None) -> T:
+    """Run an LLM call through the scheduler, retrying transient failures.
+
+    If given, `timing['seconds']` is set to the provider time of the last
+    attempt (queueing and backoff excluded), for the circuit breaker.
+    """
+    attempt = 0
+    while True:
+        release = acquire_llm_slot(user)
+        started = time.perf_counter()
+        try:
+            return call()
+        except Exception as e:
+            delay = get_retry_delay(e, attempt, retry_timeouts)
+            if delay is None:
+                _record_retry(failed=True)
+                raise
+        finally:
+            if timing is not None:
+                timing['seconds'] = time.perf_counter() - started
+            release()
+
+        _record_retry()
+        time.sleep(delay)
+        attempt += 1
+
+async def acall_with_retries(call: Callable[[], Awaitable[T]], user: Optional[str] = None,
+                             retry_timeouts: bool = True, timing: Optional[Dict[str, float]] = None) -> T:
+    """Async version of call_with_retries."""
+    attempt = 0
+    while True:
+        release = await aacquire_llm_slot(user)
+        started = time.perf_counter()
+        try:
+            return await call()
+        except Exception as e:
+            delay = get_retry_delay(e, attempt, retry_timeouts)
+            if delay is None:
+                _record_retry(failed=True)
+                raise
+        finally:
+            if timing is not None:
+                timing['seconds'] = time.perf_counter() - started
+            release()
+
+        _record_retry()
+        await asyncio.sleep(delay)
+        attempt += 1
+
+def get_scheduler_metrics() -> Dict[str, Any]:
+    """Get in-flight and waiting calls, retries and rate-limit counters."""
+    with _condition:
+        _refill_tokens(time.monotonic())
+        return {
+            'inflight': _state['inflight'],
+            'max_inflight': LLM_MAX_INFLIGHT,
+            'waiting': sum(len(queue) for queue in _user_queues.values()),
+            'waiting_users': len(_user_queues),
+            'tokens_available': round(_state['tokens'], 2),
+            'calls': _metrics['calls'],
+            'retries': _metrics['retries'],
+            'rate_limited': _metrics['rate_limited'],
+            'failures': _metrics['failures'],
+            'avg_wait_seconds': _metrics['wait_seconds'] / _metrics['calls'] if _metrics['calls'] else 0.0
+        }
@@ -0,0 +1,211 @@
+import argparse
+import atexit
+import glob
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from utils.user_utils import USER_DATA_DIR, ensure_user_data_dir
+from utils.llm_scheduler import get_llm_user
+
+# Telemetry settings (overridable through environment variables)
+LLM_TELEMETRY_FILE = os.getenv('LLM_TELEMETRY_FILE', os.path.join(USER_DATA_DIR, "llm_telemetry.jsonl"))
+LLM_TELEMETRY_MAX_BYTES = int(os.getenv('LLM_TELEMETRY_MAX_BYTES', str(10 * 1024 * 1024)))
+LLM_TELEMETRY_BACKUPS = int(os.getenv('LLM_TELEMETRY_BACKUPS', '5'))
+LLM_TELEMETRY_DISABLED = os.getenv('LLM_TELEMETRY_DISABLED', '0') == '1'
+
+# Callers only put records on a queue; a listener thread does the file writes
+_logger = logging.getLogger('llm_telemetry')
+_listener: Optional[QueueListener] = None
+_listener_lock = threading.Lock()
+
+def _get_logger() -> logging.Logger:
+    """Get the telemetry logger, starting the background writer on first use."""
+    global _listener
+
+    if _listener is None:
+        with _listener_lock:
+            if _listener is None:
+                directory = os.path.dirname(LLM_TELEMETRY_FILE)
+                if directory == USER_DATA_DIR:
+                    ensure_user_data_dir()
+                elif directory:
+                    os.makedirs(directory, exist_ok=True)
+
+                file_handler = RotatingFileHandler(
+                    LLM_TELEMETRY_FILE,
+                    maxBytes=LLM_TELEMETRY_MAX_BYTES,
+                    backupCount=LLM_TELEMETRY_BACKUPS,
+                    encoding='utf-8'
+                )
+                file_handler.setFormatter(logging.Formatter('%(message)s'))
+
+                records = queue.SimpleQueue()
+                _logger.addHandler(QueueHandler(records))
+                _logger.setLevel(logging.INFO)
+                _logger.propagate = False
+
+                _listener = QueueListener(records, file_handler)
+                _listener.start()
+    return _logger
+
+def flush_telemetry() -> None:
+    """Write out queued records and stop the writer (it restarts on the next call)."""
+    global _listener
+
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in list(_logger.handlers):
+                _logger.removeHandler(handler)
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+
+atexit.register(flush_telemetry)
+
+def hash_user(username: str) -> str:
+    """Pseudonymize a username for the telemetry log."""
+    return hashlib.sha256(username.encode('utf-8')).hexdigest()[:12]
+
+def start_llm_call(domain: str, model: str, system_prompt: str, user_prompt: str,
+                   route: Optional[str] = None, prompt_version: Optional[str] = None) -> Dict[str, Any]:
+    """Start a telemetry record for one LLM call.
+
+    Set 'model' on the record again if another model ends up serving the call.
+    """
+    return {
+        'domain': domain,
+        'user': hash_user(get_llm_user()),
+        'route': route,
+        'prompt_version': prompt_version,
+        'model': model,
+        'fallback': False,
+        'prompt_bytes': len(system_prompt.encode('utf-8')) + len(user_prompt.encode('utf-8')),
+        'started': time.perf_counter()
+    }
+
+def finish_llm_call(call: Dict[str, Any], usage: Any = None, cache_hit: bool = False,
+                    first_token_at: Optional[float] = None, error: Optional[Exception] = None) -> None:
+    """Complete a record from start_llm_call and queue it for writing.
+
+    `usage` is the response's usage object (or dict); `first_token_at` is the
+    perf_counter time of the first streamed token.
+    """
+    if LLM_TELEMETRY_DISABLED:
+        return
+
+    if usage is not None and not isinstance(usage, dict):
+        usage = usage.model_dump() if hasattr(usage, 'model_dump') else vars(usage)
+    usage = usage or {}
+
+    started = call.pop('started')
+    record = dict(
+        call,
+        ts=datetime.now().isoformat(timespec='milliseconds'),
+        prompt_tokens=usage.get('prompt_tokens'),
+        completion_tokens=usage.get('completion_tokens'),
+        latency_ms=round((time.perf_counter() - started) * 1000, 1),
+        ttft_ms=round((first_token_at - started) * 1000, 1) if first_token_at is not None else None,
+        cache_hit=cache_hit,
+        error=type(error).__name__ if error is not None else None
+    )
+    _get_logger().info(json.dumps(record, separators=(',', ':')))
+
+def load_telemetry(path: str = LLM_TELEMETRY_FILE, since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Read telemetry records from the log and its rotated backups, oldest first."""
+    # Backups are path.1 (newest) to path.N (oldest)
+    backups = [name for name in glob.glob(f"{glob.escape(path)}.*") if name.rsplit('.', 1)[1].isdigit()]
+    files = sorted(backups, key=lambda name: -int(name.rsplit('.', 1)[1]))
+    if os.path.exists(path):
+        files.append(path)
+
+    cutoff = since.isoformat() if since else ''
+    records = []
+    for name in files:
+        with open(name, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get('ts', '') >= cutoff:
+                    records.append(record)
+    return records
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {'p50': None, 'p95': None}
+    return {'p50': float(np.percentile(values, 50)), 'p95': float(np.percentile(values, 95))}
+
+def summarize_telemetry(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Aggregate latency percentiles and token usage per domain.
+
+    Latency and TTFT percentiles cover calls that reached the provider;
+    cache hits, errors and fallbacks to another model are counted separately.
+    """
+    by_domain: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        by_domain.setdefault(record.get('domain') or 'general', []).append(record)
+
+    summary = {}
+    for domain, calls in sorted(by_domain.items()):
+        remote = [c for c in calls if not c.get('cache_hit') and not c.get('error')]
+        latency = _percentiles([c['latency_ms'] for c in remote])
+        ttft = _percentiles([c['ttft_ms'] for c in remote if c.get('ttft_ms') is not None])
+        prompt_tokens = [c['prompt_tokens'] for c in remote if c.get('prompt_tokens') is not None]
+        completion_tokens = [c['completion_tokens'] for c in remote if c.get('completion_tokens') is not None]
+
+        summary[domain] = {
+            'calls': len(calls),
+            'cache_hits': sum(1 for c in calls if c.get('cache_hit')),
+            'errors': sum(1 for c in calls if c.get('error')),
+            'fallbacks': sum(1 for c in calls if c.get('fallback')),
+            'models': ', '.join(sorted({c['model'] for c in remote if c.get('model')})),
+            'prompt_versions': ', '.join(sorted({c['prompt_version'] for c in calls if c.get('prompt_version')})),
+            'latency_p50_ms': latency['p50'],
+            'latency_p95_ms': latency['p95'],
+            'ttft_p50_ms': ttft['p50'],
+            'ttft_p95_ms': ttft['p95'],
+            'avg_prompt_bytes': float(np.mean([c['prompt_bytes'] for c in calls])),
+            'prompt_tokens': int(sum(prompt_tokens)),
+            'completion_tokens': int(sum(completion_tokens))
+        }
+    return summary
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Report command: python -m utils.llm_telemetry [--hours 24]"""
+    parser = argparse.ArgumentParser(description="Per-domain LLM latency and token usage from the telemetry log.")
+    parser.add_argument("--file", default=LLM_TELEMETRY_FILE)
+    parser.add_argument("--hours", type=float, help="only calls from the last N hours")
+    args = parser.parse_args(argv)
+
+    since = datetime.now() - timedelta(hours=args.hours) if args.hours else None
+    summary = summarize_telemetry(load_telemetry(args.file, since))
+    if not summary:
+        print(f"No telemetry records in {args.file}")
+        return
+
+    def ms(value: Optional[float]) -> str:
+        return f"{value:,.0f}" if value is not None else "-"
+
+    print(f"{'domain':<12}{'calls':>7}{'cached':>8}{'errors':>8}{'fallback':>10}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'ttft p50':>10}{'ttft p95':>10}{'prompt B':>10}{'prompt tok':>12}{'compl tok':>11}  models")
+    for domain, row in summary.items():
+        print(f"{domain:<12}{row['calls']:>7}{row['cache_hits']:>8}{row['errors']:>8}{row['fallbacks']:>10}"
+              f"{ms(row['latency_p50_ms']):>9}{ms(row['latency_p95_ms']):>9}"
+              f"{ms(row['ttft_p50_ms']):>10}{ms(row['ttft_p95_ms']):>10}"
+              f"{row['avg_prompt_bytes']:>10,.0f}{row['prompt_tokens']:>12,}{row['completion_tokens']:>11,}"
+              f"  {row['models']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+import time
+from typing import List, Dict, Any, Optional
+
+import pandas as pd
+
+from utils.data_utils import build_journal_frame
+from utils.symptom_utils import build_symptom_index, get_symptom_counts, get_foods_before_symptom
+from utils.timing_utils import compute_daily_meal_timing, get_meal_timing_summary
+from utils.oura_utils import get_oura_summary_stats
+from utils.oura_trends import compute_oura_trends, get_anomalous_nights
+from utils.task_utils import summarize_tasks, suggest_priority_tasks
+from utils.goal_utils import summarize_goals, detect_missing_goals
+from utils.selfcare_utils import summarize_selfcare_tasks, detect_missed_routines
+from utils.structured_insights import render_structured_insight
+
+# A food is reported as a likely trigger when it preceded at least this many
+# occurrences of a symptom and at least this share of them
+TRIGGER_MIN_OCCURRENCES = 2
+TRIGGER_MIN_SHARE = 0.5
+TOP_SYMPTOMS = 3
+
+# Thresholds for the rule-based recommendations
+MIN_OVERNIGHT_FAST_HOURS = 12
+LATE_MEAL_DAY_SHARE = 0.3
+MIN_SLEEP_HOURS = 7
+LOW_COMPLETION_RATE = 50
+
+# Days of history behind a fully confident local report
+CONFIDENT_DAYS = 30
+
+# Shown above a local insight served in place of an AI one
+FALLBACK_NOTE = "⚡ AI analysis is unavailable right now, so this is the instant summary from your data.\n\n"
+
+def _confidence(days: float) -> float:
+    """Scale confidence with how much history the rules saw (capped below an LLM review)."""
+    return round(min(0.8, 0.2 + 0.6 * days / CONFIDENT_DAYS), 2)
+
+def _food_triggers(index: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Foods that preceded most occurrences of the most common symptoms."""
+    triggers = []
+    for symptom, count in get_symptom_counts(index)[:TOP_SYMPTOMS]:
+        for food in get_foods_before_symptom(index, symptom, top_k=3):
+            if food['occurrences'] >= TRIGGER_MIN_OCCURRENCES and food['share'] >= TRIGGER_MIN_SHARE:
+                triggers.append({
+                    'food': food['food'].lower(),
+                    'symptom': symptom.lower(),
+                    'evidence': f"before {food['occurrences']} of {count} {symptom.lower()} episodes"
+                })
+    return triggers
+
+def _food_insight(entries: List[Dict[str, Any]], symptoms: Optional[List[str]] = None) -> Dict[str, Any]:
+    dated = [entry for entry in entries if entry.get('timestamp')]
+    if not dated:
+        return {'findings': [], 'triggers': [], 'recommendations': [], 'confidence': 0.0}
+
+    timing = get_meal_timing_summary(dated)
+    index = build_symptom_index(dated)
+    symptom_counts = get_symptom_counts(index)
+    triggers = _food_triggers(index)
+    days = timing.get('days_analyzed', 0)
+
+    findings = [{
+        'title': "Journal coverage",
+        'detail': f"{len(dated)} entries over {days} days, about {timing.get('avg_meals_per_day', 0)} meals a day."
+    }]
+    if symptom_counts:
+        top = ", ".join(f"{label} ({count})" for label, count in symptom_counts[:TOP_SYMPTOMS])
+        findings.append({'title': "Most reported symptoms", 'detail': top})
+    if timing.get('avg_overnight_fast_hours') is not None:
+        findings.append({
+            'title': "Meal timing",
+            'detail': f"First meal around {timing['avg_first_meal']}, last around {timing['avg_last_meal']}; "
+                      f"average overnight fast {timing['avg_overnight_fast_hours']}h."
+        })
+
+    recommendations = []
+    for trigger in triggers[:2]:
+        recommendations.append({
+            'type': 'diet',
+            'text': f"Try leaving out {trigger['food']} for two weeks (Elimination Diet page) to see if {trigger['symptom']} eases."
+        })
+    fast = timing.get('avg_overnight_fast_hours')
+    if fast is not None and fast < MIN_OVERNIGHT_FAST_HOURS:
+        recommendations.append({
+            'type': 'meal_timing',
+            'text': f"Your overnight fast averages {fast}h; aim for {MIN_OVERNIGHT_FAST_HOURS}h by finishing dinner earlier."
+        })
+    if days and timing.get('days_with_late_meals', 0) / days >= LATE_MEAL_DAY_SHARE:
+        recommendations.append({
+            'type': 'meal_timing',
+            'text': f"Late meals on {timing['days_with_late_meals']} of {days} days; move the last meal before 8pm."
+        })
+    if symptoms:
+        current = {s.strip().lower() for s in symptoms if s.strip()}
+        avoid = sorted({t['food'] for t in triggers if t['symptom'] in current})
+        if avoid:
+            recommendations.append({
+                'type': 'diet',
+                'text': f"For your current symptoms, plan meals without {', '.join(avoid)}."
+            })
+
+    return {'findings': findings, 'triggers': triggers, 'recommendations': recommendations,
+            'confidence': _confidence(days)}
+
+def _oura_insight(oura_data: pd.DataFrame, food_entries: List[Dict[str, Any]],
+                  trends: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    if oura_data is None or oura_data.empty:
+        return {'findings': [], 'triggers': [], 'recommendations': [], 'confidence': 0.0}
+
+    stats = get_oura_summary_stats(oura_data)
+    findings = []
+    recommendations = []
+
+    if 'avg_sleep_score' in stats:
+        recent = oura_data.sort_values('date').tail(7)['sleep_score'].mean()
+        change = recent - stats['avg_sleep_score']
+        direction = "up" if change >= 0 else "down"
+        findings.append({
+            'title': "Sleep score",
+            'detail': f"Average {stats['avg_sleep_score']:.0f} (range {stats['worst_sleep_score']:.0f}-"
+                      f"{stats['best_sleep_score']:.0f}); last 7 nights {recent:.0f}, {direction} {abs(change):.0f}."
+        })
+    if 'avg_sleep_hours' in stats:
+        findings.append({'title': "Sleep duration", 'detail': f"Average {stats['avg_sleep_hours']:.1f}h a night."})
+        if stats['avg_sleep_hours'] < MIN_SLEEP_HOURS:
+            recommendations.append({
+                'type': 'sleep',
+                'text': f"You average {stats['avg_sleep_hours']:.1f}h; an earlier, fixed bedtime would get you to {MIN_SLEEP_HOURS}h."
+            })
+    if 'avg_readiness' in stats:
+        findings.append({'title': "Readiness", 'detail': f"Average readiness {stats['avg_readiness']:.0f}."})
+
+    # Nights far from their previous 30 days
+    anomalies = get_anomalous_nights(trends if trends is not None else compute_oura_trends(oura_data), limit=3)
+    if anomalies:
+        nights = []
+        for night in anomalies:
+            metrics = ", ".join(f"{metric} z {values['z']:+.1f}" for metric, values in night['metrics'].items())
+            nights.append(f"{night['date']} ({metrics})")
+        findings.append({'title': "Unusual nights", 'detail': f"Last 30 days: {'; '.join(nights)}."})
+
+    # Sleep after days with and without late meals
+    daily = compute_daily_meal_timing(build_journal_frame(food_entries or []))
+    if 'sleep_score' in oura_data.columns and not daily.empty:
+        nights = pd.DataFrame({
+            'date': pd.to_datetime(oura_data['date']).dt.normalize(),
+            'sleep_score': oura_data['sleep_score']
+        })
+        joined = nights.merge(daily[['date', 'late_meals']], on='date', how='inner')
+        late = joined.loc[joined['late_meals'] > 0, 'sleep_score']
+        other = joined.loc[joined['late_meals'] == 0, 'sleep_score']
+        if len(late) >= 2 and len(other) >= 2:
+            gap = other.mean() - late.mean()
+            findings.append({
+                'title': "Late meals and sleep",
+                'detail': f"Sleep score {late.mean():.0f} after late-meal days vs {other.mean():.0f} otherwise."
+            })
+            if gap > 3:
+                recommendations.append({
+                    'type': 'meal_timing',
+                    'text': f"Nights after late meals score {gap:.0f} points lower; finish eating 3h before bed."
+                })
+
+    return {'findings': findings, 'triggers': [], 'recommendations': recommendations,
+            'confidence': _confidence(len(oura_data))}
+
+def _task_insight(tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    summary = summarize_tasks(tasks)
+    findings = [{
+        'title': "Completion",
+        'detail': f"{summary['completed_tasks']} of {summary['total_tasks']} tasks done ({summary['completion_rate']}%), "
+                  f"{summary['overdue_tasks']} overdue."
+    }]
+    if summary['completed_by_priority']:
+        by_priority = ", ".join(f"{p} {done}" for p, done in summary['completed_by_priority'].items())
+        findings.append({'title': "By priority", 'detail': by_priority})
+
+    recommendations = []
+    next_up = suggest_priority_tasks(tasks)[:3]
+    if next_up:
+        titles = ", ".join(task.get('title', 'Untitled') for task in next_up)
+        recommendations.append({'type': 'productivity', 'text': f"Do these next: {titles}."})
+    if summary['overdue_tasks']:
+        recommendations.append({
+            'type': 'productivity',
+            'text': f"Reschedule or drop {summary['overdue_tasks']} overdue tasks so the list reflects what you will do."
+        })
+    if summary['total_tasks'] and summary['completion_rate'] < LOW_COMPLETION_RATE:
+        recommendations.append({'type': 'productivity', 'text': "Fewer open tasks per day would raise your completion rate."})
+
+    return {'findings': findings, 'triggers': [], 'recommendations': recommendations,
+            'confidence': _confidence(min(summary['total_tasks'], CONFIDENT_DAYS))}
+
+def _goal_insight(goals: List[Dict[str, Any]]) -> Dict[str, Any]:
+    summary = summarize_goals(goals)
+    findings = [{
+        'title': "Progress",
+        'detail': f"{summary['completed_goals']} of {summary['total_goals']} goals met ({summary['completion_rate']}%), "
+                  f"{summary['overdue_goals']} past their deadline."
+    }]
+    if summary['completed_by_timeframe']:
+        by_timeframe = ", ".join(f"{t} {done}" for t, done in summary['completed_by_timeframe'].items())
+        findings.append({'title': "By timeframe", 'detail': by_timeframe})
+
+    recommendations = [{'type': 'productivity', 'text': f"{suggestion}."} for suggestion in detect_missing_goals(goals)]
+    return {'findings': findings, 'triggers': [], 'recommendations': recommendations,
+            'confidence': _confidence(min(summary['total_goals'], CONFIDENT_DAYS))}
+
+def _selfcare_insight(tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    summary = summarize_selfcare_tasks(tasks)
+    findings = [{
+        'title': "Routines",
+        'detail': f"{summary['total_routines']} routines with {summary['total_completions']} completions logged."
+    }]
+    if summary['completions_by_category']:
+        by_category = ", ".join(f"{c} {n}" for c, n in summary['completions_by_category'].items())
+        findings.append({'title': "Completions by category", 'detail': by_category})
+
+    missed = detect_missed_routines(tasks)
+    recommendations = [
+        {'type': 'routine', 'text': f"{item['task'].get('title', 'A routine')} is {item['days_overdue']} days overdue."}
+        for item in missed[:3]
+    ]
+    never_done = [t.get('title', 'Untitled') for t in tasks if not t.get('completions')]
+    if never_done:
+        recommendations.append({'type': 'routine', 'text': f"Not started yet: {', '.join(never_done[:3])}."})
+
+    return {'findings': findings, 'triggers': [], 'recommendations': recommendations,
+            'confidence': _confidence(min(summary['total_completions'], CONFIDENT_DAYS))}
+
+def build_local_insight(domain: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build an instant rule-based insight from a domain's data, with no LLM call.
+
+    `data` is shaped like load_domain_data's result. Returns the structured
+    insight fields (findings, triggers, recommendations, confidence) plus the
+    rendered markdown as 'content' and the build time in 'seconds'.
+    """
+    start = time.perf_counter()
+    if domain == 'food':
+        insight = _food_insight(data['entries'])
+    elif domain == 'meals':
+        insight = _food_insight(data['food_entries'], data.get('symptoms'))
+    elif domain == 'oura':
+        insight = _oura_insight(data['oura_data'], data.get('food_entries'), data.get('oura_trends'))
+    elif domain == 'tasks':
+        insight = _task_insight(data['tasks'])
+    elif domain == 'goals':
+        insight = _goal_insight(data['goals'])
+    elif domain == 'selfcare':
+        insight = _selfcare_insight(data['tasks'])
+    else:
+        raise ValueError(f"Unknown insight domain: {domain}")
+
+    return dict(insight, content=render_structured_insight(insight), seconds=time.perf_counter() - start)
+
+def build_fallback_insight(domain: str, data: Dict[str, Any]) -> str:
+    """The local insight (markdown) returned by generate_* and stream_* while the LLM is unavailable."""
+    return FALLBACK_NOTE + build_local_insight(domain, data)['content']
+
+def is_fallback_insight(content: str) -> bool:
+    """Whether text came from build_fallback_insight (and should not be saved as an AI insight)."""
+    return content.startswith(FALLBACK_NOTE)
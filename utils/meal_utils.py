@@ -1,10 +1,13 @@
 import json
 import os
 from datetime import datetime, date, timedelta
-from typing import List, Dict, Any, Optional
-import openai
+from typing import List, Dict, Any, Optional, Iterator, Union
 from dotenv import load_dotenv
 
+from utils.llm_client import generate_insight, stream_insight
+from utils.prompt_utils import PROMPT_DATA_TOKEN_BUDGET, build_budgeted_data, drop_empty, summarize_food_entries
+from utils.prompt_templates import render_prompt
+
 # Load environment variables
 load_dotenv()
 
@@ -217,24 +220,16 @@ def generate_grocery_list(meal_plan: Dict[str, Any], recipes: List[Dict[str, Any
     
     return unique_items
 
-def generate_meal_recommendations(food_entries: List[Dict[str, Any]], symptoms: List[str] = None) -> str:
-    """Generate AI-powered meal recommendations using GROQ."""
-    if not food_entries:
-        return "No food journal data available for recommendations."
-    
-    # Set up GROQ client
-    api_key = os.getenv('GROQ_API_KEY')
-    if not api_key:
-        return "GROQ API key not found. Please set GROQ_API_KEY environment variable."
-    
-    client = openai.OpenAI(
-        api_key=api_key,
-        base_url="https://api.groq.com/openai/v1"
-    )
-    
+def build_meal_recommendation_prompt(food_entries: List[Dict[str, Any]], symptoms: List[str] = None,
+                                     token_budget: int = PROMPT_DATA_TOKEN_BUDGET) -> Dict[str, Any]:
+    """Build the chat request (prompts and sampling settings) for meal recommendations.
+
+    The data section is aggregates over the whole journal plus as many recent
+    entries as fit in `token_budget` tokens.
+    """
     # Prepare food data for analysis
     food_analysis = []
-    for entry in food_entries[-20:]:  # Last 20 entries
+    for entry in sorted(food_entries, key=lambda e: e.get('timestamp', '')):
         food_entry = {
             'meal_type': entry.get('meal_type', 'Unknown'),
             'food_items': entry.get('food_items', []),
@@ -243,59 +238,43 @@ def generate_meal_recommendations(food_entries: List[Dict[str, Any]], symptoms:
             'meal_time': entry.get('meal_time', 'Unknown'),
             'notes': entry.get('notes', '')
         }
-        food_analysis.append(food_entry)
+        food_analysis.append(drop_empty(food_entry))
     
-    # Create prompt for GROQ
-    symptoms_context = ""
-    if symptoms:
-        symptoms_context = f"\nCurrent symptoms to consider: {', '.join(symptoms)}"
+    data = build_budgeted_data(summarize_food_entries(food_entries), food_analysis, token_budget)
     
-    prompt = f"""
-    Analyze the following food journal data and provide personalized meal recommendations for a weekly meal plan:
-
-    FOOD JOURNAL DATA:
-    {json.dumps(food_analysis, indent=2)}
-    {symptoms_context}
+    return render_prompt('meals', [
+        ('FOOD JOURNAL DATA', data),
+        ('CURRENT SYMPTOMS TO CONSIDER', ', '.join(symptoms) if symptoms else None)
+    ])
 
-    Please provide:
-    1. **Breakfast Recommendations** (7 days) - Consider energy levels and morning routines
-    2. **Lunch Recommendations** (7 days) - Focus on balanced nutrition and productivity
-    3. **Dinner Recommendations** (7 days) - Consider evening comfort and sleep quality
-    4. **Snack Suggestions** - Healthy options for between meals
-    5. **Recipe Ideas** - Simple recipes that align with the user's food preferences
-    6. **Grocery List Suggestions** - Essential ingredients for the recommended meals
-    7. **Nutritional Considerations** - Based on symptoms and food reactions
-    8. **Meal Prep Tips** - How to prepare these meals efficiently
+def generate_meal_recommendations(food_entries: List[Dict[str, Any]], symptoms: List[str] = None,
+                                  structured: bool = False) -> Union[str, Dict[str, Any]]:
+    """Generate AI-powered meal recommendations using GROQ.
 
-    Focus on:
-    - Foods that work well for the user (based on their journal)
-    - Avoiding foods that cause symptoms
-    - Balanced nutrition and variety
-    - Practical, easy-to-prepare meals
-    - Seasonal and accessible ingredients
-
-    Format your response in a clear, structured way with specific meal suggestions for each day.
-    Include recipe ideas and grocery shopping recommendations.
+    With `structured`, returns the validated findings, triggers, recommendations
+    and confidence (rendered markdown in 'content') instead of free text.
     """
+    if not food_entries:
+        return "No food journal data available for recommendations."
     
-    try:
-        response = client.chat.completions.create(
-            model="llama3-70b-8192",  # Using GROQ's Llama model
-            messages=[
-                {"role": "system", "content": "You are a nutritionist and meal planning expert analyzing food journal data to provide personalized meal recommendations that consider the user's food preferences, symptoms, and nutritional needs."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=1500,
-            temperature=0.8
-        )
-        
-        return response.choices[0].message.content
+    return generate_insight('meals', lambda: build_meal_recommendation_prompt(food_entries, symptoms),
+                            {'food_entries': food_entries, 'symptoms': symptoms}, what="meal recommendations",
+                            structured=structured)
+
+def stream_meal_recommendations(food_entries: List[Dict[str, Any]], symptoms: List[str] = None) -> Iterator[str]:
+    """Stream meal recommendations as they are generated (same request as generate_meal_recommendations)."""
+    if not food_entries:
+        yield "No food journal data available for recommendations."
+        return
     
-    except Exception as e:
-        return f"Error generating meal recommendations: {str(e)}"
+    yield from stream_insight('meals', lambda: build_meal_recommendation_prompt(food_entries, symptoms),
+                              {'food_entries': food_entries, 'symptoms': symptoms}, what="meal recommendations")
 
-def save_meal_insight(insight_content: str, meals_analyzed: int) -> None:
-    """Save meal planning insight to JSON file."""
+def save_meal_insight(insight_content: str, meals_analyzed: int, metadata: Optional[Dict[str, Any]] = None) -> None:
+    """Save meal planning insight to JSON file.
+
+    `metadata` (e.g. the username and incremental-analysis state) is stored with the insight.
+    """
     insight = {
         'content': insight_content,
         'source': 'meal_planning',
@@ -303,6 +282,8 @@ def save_meal_insight(insight_content: str, meals_analyzed: int) -> None:
         'meals_analyzed': meals_analyzed,
         'analysis_type': 'Meal Planning & Recommendations'
     }
+    if metadata:
+        insight.update(metadata)
     
     # Load existing insights
     insights_file = "insights.json"
@@ -0,0 +1,166 @@
+import functools
+import os
+import re
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Bundled nutrient table (values per typical serving, USDA FoodData Central reference)
+NUTRIENT_TABLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "nutrients.csv")
+NUTRIENT_COLUMNS = ['calories', 'protein_g', 'carbs_g', 'fat_g', 'fiber_g']
+
+# Leading quantities such as "2 eggs", "1/2 avocado" or "2x toast"
+_QUANTITY_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?(?:/\d+)?)\s*x?\s+')
+_PARENS_PATTERN = re.compile(r'\([^)]*\)')
+_NON_ALNUM_PATTERN = re.compile(r'[^a-z0-9 ]+')
+
+# Distinct food names whose table row is cached (free text makes the set of
+# names unbounded, so the least recently used are dropped)
+NUTRITION_FOOD_CACHE_SIZE = int(os.getenv('NUTRITION_FOOD_CACHE_SIZE', '4096'))
+
+# Lazily loaded table
+_table_lock = threading.RLock()
+_nutrient_matrix: Optional[np.ndarray] = None
+_name_index: Dict[str, int] = {}
+_food_names: List[str] = []
+
+def normalize_food_name(name: str) -> str:
+    """Normalize a food name for lookup (lowercase, no punctuation or notes)."""
+    name = _PARENS_PATTERN.sub(' ', name.lower())
+    name = _NON_ALNUM_PATTERN.sub(' ', name)
+    return ' '.join(name.split())
+
+def parse_food_quantity(food_item: str) -> Tuple[float, str]:
+    """Split a journal food item into (servings, normalized name)."""
+    quantity = 1.0
+    match = _QUANTITY_PATTERN.match(food_item)
+    if match:
+        number = match.group(1)
+        if '/' in number:
+            numerator, denominator = number.split('/')
+            quantity = float(numerator) / float(denominator) if float(denominator) else 1.0
+        else:
+            quantity = float(number)
+        food_item = food_item[match.end():]
+    return quantity, normalize_food_name(food_item)
+
+def load_nutrient_table() -> Tuple[np.ndarray, Dict[str, int]]:
+    """Load the bundled nutrient table as a float32 matrix plus a normalized-name index."""
+    global _nutrient_matrix, _name_index, _food_names
+
+    if _nutrient_matrix is not None:
+        return _nutrient_matrix, _name_index
+
+    with _table_lock:
+        if _nutrient_matrix is None:
+            df = pd.read_csv(
+                NUTRIENT_TABLE_FILE,
+                dtype={col: 'float32' for col in NUTRIENT_COLUMNS},
+                keep_default_na=False
+            )
+
+            # Index both the canonical name and every alias
+            name_index = {}
+            for row, (name, aliases) in enumerate(zip(df['name'], df['aliases'])):
+                name_index[normalize_food_name(name)] = row
+                for alias in aliases.split('|'):
+                    if alias.strip():
+                        name_index.setdefault(normalize_food_name(alias), row)
+
+            _food_names = df['name'].tolist()
+            _name_index = name_index
+            _nutrient_matrix = df[NUTRIENT_COLUMNS].to_numpy(dtype=np.float32)
+
+    return _nutrient_matrix, _name_index
+
+@functools.lru_cache(maxsize=NUTRITION_FOOD_CACHE_SIZE)
+def _match_food_row(normalized_name: str) -> int:
+    """Resolve a normalized food name to a table row, or -1 if unknown (cached per name)."""
+    _, name_index = load_nutrient_table()
+
+    if normalized_name in name_index:
+        return name_index[normalized_name]
+
+    words = normalized_name.split()
+
+    # Try the longest trailing phrase first ("grilled salmon" -> "salmon")
+    for start in range(len(words)):
+        phrase = ' '.join(words[start:])
+        for candidate in (phrase, phrase[:-1] if phrase.endswith('s') else None,
+                          phrase[:-2] if phrase.endswith('es') else None):
+            if candidate and candidate in name_index:
+                return name_index[candidate]
+
+    return -1
+
+def lookup_food(food_item: str) -> Optional[Dict[str, Any]]:
+    """Look up nutrition for a single food item (scaled by any leading quantity)."""
+    matrix, _ = load_nutrient_table()
+    quantity, name = parse_food_quantity(food_item)
+    row = _match_food_row(name)
+
+    if row < 0:
+        return None
+
+    nutrition = {col: float(value) * quantity for col, value in zip(NUTRIENT_COLUMNS, matrix[row])}
+    nutrition['name'] = _food_names[row]
+    nutrition['servings'] = quantity
+    return nutrition
+
+def compute_entries_nutrition(entries: List[Dict[str, Any]]) -> np.ndarray:
+    """Compute calories and macros for many entries in one vectorized pass.
+
+    Returns an array of shape (len(entries), len(NUTRIENT_COLUMNS)).
+    """
+    matrix, _ = load_nutrient_table()
+
+    # Flatten every food item into parallel arrays (entry index, table row, servings)
+    entry_index = []
+    row_index = []
+    quantities = []
+    for i, entry in enumerate(entries):
+        for food_item in entry.get('food_items', []):
+            quantity, name = parse_food_quantity(food_item)
+            entry_index.append(i)
+            row_index.append(_match_food_row(name))
+            quantities.append(quantity)
+
+    totals = np.zeros((len(entries), len(NUTRIENT_COLUMNS)), dtype=np.float32)
+    if not entry_index:
+        return totals
+
+    rows = np.asarray(row_index, dtype=np.int64)
+    known = rows >= 0
+
+    # Scale each matched row by its servings and sum per entry
+    values = matrix[rows[known]] * np.asarray(quantities, dtype=np.float32)[known, None]
+    np.add.at(totals, np.asarray(entry_index, dtype=np.int64)[known], values)
+
+    return totals
+
+def get_unmatched_foods(entries: List[Dict[str, Any]]) -> List[str]:
+    """Get the distinct food names that are not in the nutrient table."""
+    load_nutrient_table()
+    unmatched = set()
+    for entry in entries:
+        for food_item in entry.get('food_items', []):
+            _, name = parse_food_quantity(food_item)
+            if _match_food_row(name) < 0:
+                unmatched.add(name)
+    return sorted(unmatched)
+
+def get_daily_nutrition_totals(entries: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Get calories and macro totals per day (one row per date with entries)."""
+    if not entries:
+        return pd.DataFrame(columns=['date'] + NUTRIENT_COLUMNS)
+
+    dated_entries = [entry for entry in entries if 'timestamp' in entry]
+    totals = compute_entries_nutrition(dated_entries)
+
+    df = pd.DataFrame(totals, columns=NUTRIENT_COLUMNS)
+    df['date'] = [datetime.fromisoformat(entry['timestamp']).date() for entry in dated_entries]
+
+    return df.groupby('date', as_index=False)[NUTRIENT_COLUMNS].sum()
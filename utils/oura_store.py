@@ -0,0 +1,177 @@
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.user_utils import USER_DATA_DIR, ensure_user_data_dir
+from utils.oura_trends import compute_oura_trends, update_oura_trends
+
+# Parsed frames of stored OURA histories, shared by every session in the
+# process: path -> (file mtime, frame). A write by any process changes the
+# mtime, so a stale frame is never served.
+_cache: Dict[str, Tuple[int, pd.DataFrame]] = {}
+# Rolling trends of those frames, same keys; an upsert updates them
+# incrementally, otherwise they are computed on first use
+_trend_cache: Dict[str, Tuple[int, pd.DataFrame]] = {}
+_cache_lock = threading.Lock()
+
+# One lock per store path, serializing read-merge-write of the same user's
+# store while different users write in parallel
+_write_locks: Dict[str, threading.Lock] = {}
+
+def get_oura_store_path(username: str) -> str:
+    """Path of a user's OURA store, a NumPy archive with one array per column."""
+    return os.path.join(USER_DATA_DIR, f"{username}_oura.npz")
+
+def _get_write_lock(path: str) -> threading.Lock:
+    with _cache_lock:
+        return _write_locks.setdefault(path, threading.Lock())
+
+def _read_store(path: str) -> pd.DataFrame:
+    with np.load(path, allow_pickle=False) as archive:
+        columns = {name: archive[name] for name in archive.files}
+    df = pd.DataFrame(columns)
+    df['date'] = pd.to_datetime(df['date'].astype('datetime64[ns]'))
+    return df
+
+def _write_store(path: str, df: pd.DataFrame) -> int:
+    """Write the frame atomically; returns the new file's mtime."""
+    ensure_user_data_dir()
+    columns = {column: df[column].to_numpy() for column in df.columns if column != 'date'}
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+    np.savez(temp_path, date=df['date'].to_numpy().astype('datetime64[D]'), **columns)
+    os.replace(temp_path, path)
+    return os.stat(path).st_mtime_ns
+
+def _load(path: str) -> Optional[Tuple[int, pd.DataFrame]]:
+    """The stored frame and the file mtime it was read at, or None."""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    with _cache_lock:
+        cached = _cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached
+
+    loaded = (mtime, _read_store(path))
+    with _cache_lock:
+        _cache[path] = loaded
+    return loaded
+
+def load_oura_data(username: str) -> Optional[pd.DataFrame]:
+    """Load a user's stored OURA history (one row per date, sorted), or None if there is none.
+
+    The frame comes from a process-wide cache and is shared between
+    sessions; copy it before modifying it.
+    """
+    loaded = _load(get_oura_store_path(username))
+    return loaded[1] if loaded is not None else None
+
+def load_oura_trends(username: str) -> Optional[pd.DataFrame]:
+    """Rolling statistics (see compute_oura_trends) of a user's stored OURA history, or None.
+
+    Shared between sessions like load_oura_data.
+    """
+    path = get_oura_store_path(username)
+    loaded = _load(path)
+    if loaded is None:
+        return None
+
+    mtime, df = loaded
+    with _cache_lock:
+        cached = _trend_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    trends = compute_oura_trends(df)
+    with _cache_lock:
+        _trend_cache[path] = (mtime, trends)
+    return trends
+
+def upsert_oura_data(username: str, oura_data: pd.DataFrame) -> Dict[str, int]:
+    """Merge a parsed OURA export into the user's store, keyed by date.
+
+    Only dates that are new, or whose values differ from the stored ones,
+    change the store; a value missing from the upload keeps the stored one.
+    The file is rewritten only when something changed. Returns counts of
+    'added', 'updated' and 'unchanged' days.
+    """
+    incoming = oura_data.assign(date=pd.to_datetime(oura_data['date']).dt.normalize().astype('datetime64[ns]'))
+    incoming = incoming.dropna(subset=['date']).drop_duplicates('date', keep='last').set_index('date').sort_index()
+
+    path = get_oura_store_path(username)
+    with _get_write_lock(path):
+        loaded = _load(path)
+        trends = since = None
+        if loaded is None:
+            merged = incoming
+            counts = {'added': len(incoming), 'updated': 0, 'unchanged': 0}
+        else:
+            stored_mtime, stored = loaded
+            stored = stored.set_index('date')
+            new_dates = incoming.index.difference(stored.index)
+            common = incoming.index.intersection(stored.index)
+
+            # A stored day changes when the upload has a different, non-missing value
+            shared_columns = incoming.columns.intersection(stored.columns)
+            before = stored.loc[common, shared_columns]
+            after = incoming.loc[common, shared_columns]
+            changed = (after.notna() & (after != before)).any(axis=1)
+            new_columns = incoming.columns.difference(stored.columns)
+            if len(new_columns):
+                changed |= incoming.loc[common, new_columns].notna().any(axis=1)
+
+            counts = {'added': len(new_dates), 'updated': int(changed.sum()),
+                      'unchanged': len(common) - int(changed.sum())}
+            if not counts['added'] and not counts['updated']:
+                return counts
+
+            # Trends only change from the first added or updated night on
+            with _cache_lock:
+                cached_trends = _trend_cache.get(path)
+            if cached_trends is not None and cached_trends[0] == stored_mtime:
+                trends = cached_trends[1]
+                since = min(new_dates.union(changed.index[changed.to_numpy()]))
+
+            # Stored rows on the union of dates, overwritten column by column with
+            # the upload's non-missing values (keeps the stored float32 dtypes)
+            merged = stored.reindex(index=stored.index.union(incoming.index),
+                                    columns=list(stored.columns) + list(new_columns))
+            positions = merged.index.get_indexer(incoming.index)
+            data = {}
+            for column in merged.columns:
+                values = merged[column].to_numpy(copy=True)
+                if column in incoming.columns:
+                    present = incoming[column].notna().to_numpy()
+                    values[positions[present]] = incoming[column].to_numpy()[present]
+                data[column] = values
+            merged = pd.DataFrame(data, index=merged.index)
+
+        merged = merged.reset_index()
+        mtime = _write_store(path, merged)
+        if trends is not None:
+            trends = update_oura_trends(trends, merged, since)
+        with _cache_lock:
+            _cache[path] = (mtime, merged)
+            if trends is not None:
+                _trend_cache[path] = (mtime, trends)
+            else:
+                _trend_cache.pop(path, None)
+    return counts
+
+def delete_oura_data(username: str) -> bool:
+    """Delete a user's OURA store; returns False if there was none."""
+    path = get_oura_store_path(username)
+    with _get_write_lock(path):
+        with _cache_lock:
+            _cache.pop(path, None)
+            _trend_cache.pop(path, None)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+    return True
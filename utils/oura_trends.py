@@ -0,0 +1,121 @@
+import os
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+# Rolling windows in calendar days (gaps in the export shrink a window, they
+# don't stretch it over older nights)
+OURA_SHORT_WINDOW_DAYS = 7
+OURA_LONG_WINDOW_DAYS = 30
+# A night is anomalous when a metric is this many standard deviations from
+# its previous 30 days; the z-score needs this many nights in that window
+OURA_ANOMALY_Z = float(os.getenv('OURA_ANOMALY_Z', '2.5'))
+OURA_ANOMALY_MIN_NIGHTS = int(os.getenv('OURA_ANOMALY_MIN_NIGHTS', '14'))
+
+# Metrics trends are computed for (those present in the frame)
+TREND_METRICS = ['sleep_score', 'sleep_hours', 'sleep_efficiency', 'readiness_score', 'hrv', 'avg_heart_rate']
+TREND_STATS = ['7d', '30d', 'z', 'delta']
+
+def _dates(oura_data: pd.DataFrame) -> pd.Series:
+    dates = oura_data['date']
+    # to_datetime is slow on a column that already holds datetimes
+    return dates if pd.api.types.is_datetime64_any_dtype(dates) else pd.to_datetime(dates)
+
+def compute_oura_trends(oura_data: pd.DataFrame) -> pd.DataFrame:
+    """Rolling statistics for each night of an OURA frame, one row per date.
+
+    Per metric: `<metric>_7d` and `<metric>_30d` rolling means, `<metric>_z`,
+    the night's z-score against the previous 30 days (the night itself is
+    left out of its baseline), and `<metric>_delta`, the change from the
+    night before (NaN after a gap). `anomaly` flags nights where any
+    |z| >= OURA_ANOMALY_Z.
+    """
+    metrics = [metric for metric in TREND_METRICS if metric in oura_data.columns]
+    dates = _dates(oura_data).dt.normalize()
+    values = oura_data[metrics].astype('float64').set_axis(pd.DatetimeIndex(dates, name='date'))
+    values = values[values.index.notna() & ~values.index.duplicated(keep='last')].sort_index()
+
+    short = values.rolling(f"{OURA_SHORT_WINDOW_DAYS}D").mean()
+    long = values.rolling(f"{OURA_LONG_WINDOW_DAYS}D").mean()
+    baseline = values.rolling(f"{OURA_LONG_WINDOW_DAYS}D", closed='left', min_periods=OURA_ANOMALY_MIN_NIGHTS)
+    std = baseline.std().to_numpy()
+    z = (values.to_numpy() - baseline.mean().to_numpy()) / np.where(std > 0, std, np.nan)
+    delta = values.diff().to_numpy(copy=True)
+    delta[np.diff(values.index.to_numpy(), prepend=values.index[:1].to_numpy()) != np.timedelta64(1, 'D')] = np.nan
+
+    # One float32 block with the four statistics of each metric side by side
+    stats = np.stack([short.to_numpy(), long.to_numpy(), z, delta], axis=2)
+    columns = [f"{metric}_{stat}" for metric in metrics for stat in TREND_STATS]
+    trends = pd.DataFrame(stats.reshape(len(values), len(columns)).astype('float32'), index=values.index, columns=columns)
+    trends['anomaly'] = (np.abs(z) >= OURA_ANOMALY_Z).any(axis=1)
+    return trends.reset_index()
+
+def update_oura_trends(trends: pd.DataFrame, oura_data: pd.DataFrame, since: Any) -> pd.DataFrame:
+    """Recompute trends for the nights from `since` on after those changed.
+
+    Only the changed nights and the 30 days before them are read; earlier
+    rows of `trends` are kept. The result equals compute_oura_trends(oura_data).
+    """
+    since = pd.Timestamp(since).normalize()
+    dates = _dates(oura_data)
+    context = oura_data[dates >= since - pd.Timedelta(days=OURA_LONG_WINDOW_DAYS)]
+    fresh = compute_oura_trends(context)
+    fresh = fresh[fresh['date'] >= since]
+    kept = trends[trends['date'] < since]
+    if list(kept.columns) != list(fresh.columns):
+        # The set of metrics changed, so every row needs new columns
+        return compute_oura_trends(oura_data)
+    return pd.concat([kept, fresh], ignore_index=True)
+
+def get_latest_trends(trends: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+    """Per metric, its rolling means, change and z-score on the latest night."""
+    latest = {}
+    if trends is None or trends.empty:
+        return latest
+    last = trends.iloc[-1]
+    for metric in TREND_METRICS:
+        if f"{metric}_7d" not in trends.columns:
+            continue
+        values = {
+            'avg_7d': last[f"{metric}_7d"],
+            'avg_30d': last[f"{metric}_30d"],
+            'change': last[f"{metric}_delta"],
+            'z': last[f"{metric}_z"]
+        }
+        values = {key: round(float(value), 2) for key, value in values.items() if pd.notna(value)}
+        if values:
+            latest[metric] = values
+    return latest
+
+def get_anomalous_nights(trends: pd.DataFrame, days: Optional[int] = OURA_LONG_WINDOW_DAYS,
+                         limit: int = 10) -> List[Dict[str, Any]]:
+    """Flagged nights of the last `days` days (all if None), most recent first.
+
+    Each lists the metrics beyond the threshold with their z-score and
+    change from the night before.
+    """
+    if trends is None or trends.empty:
+        return []
+    flagged = trends[trends['anomaly']]
+    if days is not None:
+        flagged = flagged[flagged['date'] > trends['date'].iloc[-1] - pd.Timedelta(days=days)]
+
+    nights = []
+    for _, row in flagged.iloc[::-1].head(limit).iterrows():
+        metrics = {}
+        for metric in TREND_METRICS:
+            z = row.get(f"{metric}_z")
+            if pd.notna(z) and abs(z) >= OURA_ANOMALY_Z:
+                change = row[f"{metric}_delta"]
+                metrics[metric] = {'z': round(float(z), 1),
+                                   'change': round(float(change), 2) if pd.notna(change) else None}
+        nights.append({'date': row['date'].date().isoformat(), 'metrics': metrics})
+    return nights
+
+def summarize_oura_trends(trends: pd.DataFrame) -> Dict[str, Any]:
+    """Latest rolling statistics and recent anomalous nights, for prompts."""
+    return {
+        'latest': get_latest_trends(trends),
+        'anomalous_nights_30d': get_anomalous_nights(trends)
+    }
@@ -1,69 +1,122 @@
 import pandas as pd
+import csv
+import importlib.util
+import io
 import json
 import os
 from datetime import datetime, date, timedelta
-from typing import List, Dict, Any, Optional
-import openai
+from typing import List, Dict, Any, Optional, Iterator, Union, IO
 from dotenv import load_dotenv
 
+from utils.llm_client import generate_insight, stream_insight
+from utils.prompt_utils import PROMPT_DATA_TOKEN_BUDGET, build_budgeted_data, compact_json, drop_empty, summarize_food_entries
+from utils.prompt_templates import render_prompt
+from utils.data_utils import build_journal_frame
+from utils.timing_utils import LATE_MEAL_MINUTES
+from utils.oura_trends import compute_oura_trends, summarize_oura_trends
+
 # Load environment variables
 load_dotenv()
 
-def parse_oura_csv(file_path: str) -> pd.DataFrame:
-    """Parse OURA CSV file and return a cleaned DataFrame."""
+# OURA export column names mapped to ours (exports can have different formats)
+OURA_COLUMN_MAPPING = {
+    'Date': 'date',
+    'Sleep Score': 'sleep_score',
+    'Sleep Duration': 'sleep_duration',
+    'Sleep Efficiency': 'sleep_efficiency',
+    'Sleep Latency': 'sleep_latency',
+    'Sleep Timing': 'sleep_timing',
+    'Sleep Timing Score': 'sleep_timing_score',
+    'Sleep Regularity': 'sleep_regularity',
+    'Sleep Regularity Score': 'sleep_regularity_score',
+    'Sleep Restfulness': 'sleep_restfulness',
+    'Sleep Restfulness Score': 'sleep_restfulness_score',
+    'Sleep Rem Sleep': 'rem_sleep',
+    'Sleep Deep Sleep': 'deep_sleep',
+    'Sleep Light Sleep': 'light_sleep',
+    'Sleep Awake': 'awake',
+    'Sleep In Bed': 'in_bed',
+    'Sleep Out Of Bed': 'out_of_bed',
+    'Readiness Score': 'readiness_score',
+    'Activity Score': 'activity_score',
+    'Activity Calories': 'activity_calories',
+    'Activity Steps': 'activity_steps',
+    'Activity Rest': 'activity_rest',
+    'Activity Low': 'activity_low',
+    'Activity Medium': 'activity_medium',
+    'Activity High': 'activity_high',
+    'Activity Target': 'activity_target',
+    'Activity Average Heart Rate': 'avg_heart_rate',
+    'Activity Heart Rate Variability': 'hrv'
+}
+
+# Every mapped column but the date is numeric. Scores, percentages and
+# durations fit float32; step and calorie counts stay float64 so sums over
+# years of data are exact.
+OURA_FLOAT64_COLUMNS = {'Activity Calories', 'Activity Steps'}
+OURA_DTYPES = {
+    column: 'float64' if column in OURA_FLOAT64_COLUMNS else 'float32'
+    for column in OURA_COLUMN_MAPPING if column != 'Date'
+}
+
+# (summary key, label, unit) of the KEY METRICS prompt section
+KEY_METRICS = [
+    ('avg_sleep_hours', 'Average Sleep Duration', ' hours'),
+    ('avg_sleep_score', 'Average Sleep Score', ''),
+    ('avg_readiness', 'Average Readiness Score', ''),
+    ('avg_activity', 'Average Activity Level', '')
+]
+
+# pyarrow parses CSV multi-threaded; fall back to pandas' C parser without it
+OURA_CSV_ENGINE = 'pyarrow' if importlib.util.find_spec('pyarrow') else 'c'
+
+def _open_oura_source(source: Union[str, bytes, bytearray, memoryview, IO[bytes]]) -> Union[str, IO[bytes]]:
+    """A path or a rewindable binary file for read_csv."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    return source
+
+def _read_oura_header(source: Union[str, IO[bytes]]) -> List[str]:
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            first_line = f.readline()
+    else:
+        # Streamlit keeps the same upload object across reruns; start from the top
+        source.seek(0)
+        first_line = source.readline()
+        source.seek(0)
+    return next(csv.reader([first_line.decode('utf-8-sig')]), [])
+
+def parse_oura_csv(source: Union[str, bytes, bytearray, memoryview, IO[bytes]]) -> pd.DataFrame:
+    """Parse an OURA CSV export and return a cleaned DataFrame.
+
+    `source` is a file path, raw bytes or a binary file-like object such as
+    a Streamlit upload (read in place, without the copy getbuffer() bytes
+    need). Only mapped columns are read, with fixed
+    dtypes; a numeric column holding non-numeric values is read as text and
+    coerced to NaN instead.
+    """
     try:
-        # Read CSV file
-        df = pd.read_csv(file_path)
+        source = _open_oura_source(source)
+        usecols = [column for column in _read_oura_header(source) if column in OURA_COLUMN_MAPPING]
+        dtypes = {column: OURA_DTYPES[column] for column in usecols if column in OURA_DTYPES}
         
-        # Standardize column names (OURA exports can have different formats)
-        column_mapping = {
-            'Date': 'date',
-            'Sleep Score': 'sleep_score',
-            'Sleep Duration': 'sleep_duration',
-            'Sleep Efficiency': 'sleep_efficiency',
-            'Sleep Latency': 'sleep_latency',
-            'Sleep Timing': 'sleep_timing',
-            'Sleep Timing Score': 'sleep_timing_score',
-            'Sleep Regularity': 'sleep_regularity',
-            'Sleep Regularity Score': 'sleep_regularity_score',
-            'Sleep Restfulness': 'sleep_restfulness',
-            'Sleep Restfulness Score': 'sleep_restfulness_score',
-            'Sleep Rem Sleep': 'rem_sleep',
-            'Sleep Deep Sleep': 'deep_sleep',
-            'Sleep Light Sleep': 'light_sleep',
-            'Sleep Awake': 'awake',
-            'Sleep In Bed': 'in_bed',
-            'Sleep Out Of Bed': 'out_of_bed',
-            'Readiness Score': 'readiness_score',
-            'Activity Score': 'activity_score',
-            'Activity Calories': 'activity_calories',
-            'Activity Steps': 'activity_steps',
-            'Activity Rest': 'activity_rest',
-            'Activity Low': 'activity_low',
-            'Activity Medium': 'activity_medium',
-            'Activity High': 'activity_high',
-            'Activity Target': 'activity_target',
-            'Activity Average Heart Rate': 'avg_heart_rate',
-            'Activity Heart Rate Variability': 'hrv'
-        }
+        try:
+            df = pd.read_csv(source, usecols=usecols, dtype=dtypes, engine=OURA_CSV_ENGINE)
+        except (ValueError, TypeError):
+            # Placeholders such as '-' in a numeric column; parse it untyped
+            if not isinstance(source, str):
+                source.seek(0)
+            df = pd.read_csv(source, usecols=usecols)
+            for column, dtype in dtypes.items():
+                df[column] = pd.to_numeric(df[column], errors='coerce').astype(dtype)
         
-        # Rename columns if they exist
-        existing_columns = {col: column_mapping[col] for col in df.columns if col in column_mapping}
-        df = df.rename(columns=existing_columns)
+        df = df.rename(columns=OURA_COLUMN_MAPPING)
         
         # Convert date column to datetime
         if 'date' in df.columns:
             df['date'] = pd.to_datetime(df['date'])
         
-        # Convert numeric columns
-        numeric_columns = ['sleep_score', 'sleep_duration', 'sleep_efficiency', 'sleep_latency',
-                          'readiness_score', 'activity_score', 'activity_calories', 'activity_steps',
-                          'avg_heart_rate', 'hrv']
-        
-        for col in numeric_columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-        
         # Calculate sleep hours from duration (if in minutes)
         if 'sleep_duration' in df.columns:
             # Convert minutes to hours
@@ -79,98 +132,99 @@ def get_oura_summary_stats(df: pd.DataFrame) -> Dict[str, Any]:
     stats = {}
     
     if 'sleep_score' in df.columns:
-        stats['avg_sleep_score'] = df['sleep_score'].mean()
-        stats['best_sleep_score'] = df['sleep_score'].max()
-        stats['worst_sleep_score'] = df['sleep_score'].min()
+        stats['avg_sleep_score'] = float(df['sleep_score'].mean())
+        stats['best_sleep_score'] = float(df['sleep_score'].max())
+        stats['worst_sleep_score'] = float(df['sleep_score'].min())
     
     if 'sleep_hours' in df.columns:
-        stats['avg_sleep_hours'] = df['sleep_hours'].mean()
-        stats['total_sleep_hours'] = df['sleep_hours'].sum()
+        stats['avg_sleep_hours'] = float(df['sleep_hours'].mean())
+        stats['total_sleep_hours'] = float(df['sleep_hours'].sum())
         stats['best_sleep_night'] = df.loc[df['sleep_hours'].idxmax(), 'date'] if not df.empty else None
     
     if 'readiness_score' in df.columns:
-        stats['avg_readiness'] = df['readiness_score'].mean()
-        stats['best_readiness'] = df['readiness_score'].max()
+        stats['avg_readiness'] = float(df['readiness_score'].mean())
+        stats['best_readiness'] = float(df['readiness_score'].max())
     
     if 'activity_score' in df.columns:
-        stats['avg_activity'] = df['activity_score'].mean()
-        stats['total_steps'] = df['activity_steps'].sum() if 'activity_steps' in df.columns else 0
+        stats['avg_activity'] = float(df['activity_score'].mean())
+        stats['total_steps'] = float(df['activity_steps'].sum()) if 'activity_steps' in df.columns else 0
     
     return stats
 
-def generate_oura_insights(oura_data: pd.DataFrame, food_entries: List[Dict[str, Any]] = None) -> str:
-    """Generate AI insights using GROQ based on OURA data and optionally food journal entries."""
-    if oura_data.empty:
-        return "No OURA data found to analyze."
-    
-    # Set up GROQ client
-    api_key = os.getenv('GROQ_API_KEY')
-    if not api_key:
-        return "GROQ API key not found. Please set GROQ_API_KEY environment variable."
+def build_oura_insight_prompt(oura_data: pd.DataFrame, food_entries: List[Dict[str, Any]] = None,
+                              token_budget: int = PROMPT_DATA_TOKEN_BUDGET,
+                              trends: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    """Build the chat request (prompts and sampling settings) for OURA insights.
 
-    client = openai.OpenAI(
-        api_key=api_key,
-        base_url="https://api.groq.com/openai/v1"
-    )
-    
+    Food entries are sent as journal aggregates plus as many recent entries
+    as fit in `token_budget` tokens. `trends` (see compute_oura_trends) are
+    computed from `oura_data` when not passed in, e.g. from the OURA store.
+    """
     # Prepare OURA data for analysis
     oura_summary = get_oura_summary_stats(oura_data)
     
-    # Create analysis prompt
-    prompt = f"""
-    Analyze the following OURA sleep and activity data and provide insights about sleep quality, activity patterns, and health recommendations:
-
-    OURA Data Summary:
-    {json.dumps(oura_summary, indent=2)}
-
-    Key Metrics:
-    - Average Sleep Duration: {oura_summary.get('avg_sleep_duration', 'N/A')} hours
-    - Average Sleep Efficiency: {oura_summary.get('avg_sleep_efficiency', 'N/A')}%
-    - Average Readiness Score: {oura_summary.get('avg_readiness', 'N/A')}
-    - Average Activity Level: {oura_summary.get('avg_activity', 'N/A')}
-    - Average Steps: {oura_summary.get('avg_steps', 'N/A')}
-
-    Please provide insights on:
-    1. Sleep quality patterns and potential improvements
-    2. Activity level recommendations
-    3. Readiness score interpretation
-    4. Sleep hygiene suggestions
-    5. Overall health optimization tips
-
-    Format your response in a clear, actionable way with specific recommendations.
-    """
+    # Only metrics the export has; a line of "N/A" is wasted prompt
+    key_metrics = "\n".join(
+        f"- {label}: {oura_summary[key]:.1f}{unit}"
+        for key, label, unit in KEY_METRICS
+        if oura_summary.get(key) is not None and not pd.isna(oura_summary[key])
+    )
+    
+    if trends is None:
+        trends = compute_oura_trends(oura_data)
+    trend_data = summarize_oura_trends(trends)
     
     # Add food journal correlation if available
+    food_data = None
     if food_entries:
-        prompt += f"""
+        food_rows = [
+            drop_empty({
+                'timestamp': entry.get('timestamp'),
+                'meal_time': entry.get('meal_time'),
+                'food_items': entry.get('food_items', []),
+                'symptoms': entry.get('symptoms', [])
+            })
+            for entry in sorted(food_entries, key=lambda e: e.get('timestamp', ''))
+        ]
+        food_data = build_budgeted_data(summarize_food_entries(food_entries), food_rows, token_budget)
+    
+    return render_prompt('oura', [
+        ('OURA DATA SUMMARY', compact_json(oura_summary)),
+        ('KEY METRICS', key_metrics or None),
+        ('SLEEP TRENDS', compact_json(trend_data) if trend_data['latest'] else None),
+        ('FOOD JOURNAL DATA', food_data)
+    ])
 
-    Additionally, analyze correlations with food journal entries:
-    {json.dumps(food_entries[:10], indent=2)}  # Show last 10 entries
+def generate_oura_insights(oura_data: pd.DataFrame, food_entries: List[Dict[str, Any]] = None,
+                           trends: Optional[pd.DataFrame] = None,
+                           structured: bool = False) -> Union[str, Dict[str, Any]]:
+    """Generate AI insights using GROQ based on OURA data and optionally food journal entries.
 
-    Please also consider:
-    6. How meal timing might affect sleep quality
-    7. Food choices that could impact sleep
-    8. Recommendations for better sleep through diet
+    With `structured`, returns the validated findings, triggers, recommendations
+    and confidence (rendered markdown in 'content') instead of free text.
     """
+    if oura_data.empty:
+        return "No OURA data found to analyze."
     
-    try:
-        response = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[
-                {"role": "system", "content": "You are a sleep and health expert analyzing OURA ring data to provide actionable insights for better sleep and overall health."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=1000,
-            temperature=0.7
-        )
-        
-        return response.choices[0].message.content
+    return generate_insight('oura', lambda: build_oura_insight_prompt(oura_data, food_entries, trends=trends),
+                            {'oura_data': oura_data, 'food_entries': food_entries, 'oura_trends': trends}, what="OURA insights",
+                            structured=structured)
+
+def stream_oura_insights(oura_data: pd.DataFrame, food_entries: List[Dict[str, Any]] = None,
+                         trends: Optional[pd.DataFrame] = None) -> Iterator[str]:
+    """Stream OURA insights as they are generated (same request as generate_oura_insights)."""
+    if oura_data.empty:
+        yield "No OURA data found to analyze."
+        return
     
-    except Exception as e:
-        return f"Error generating OURA insights: {str(e)}"
+    yield from stream_insight('oura', lambda: build_oura_insight_prompt(oura_data, food_entries, trends=trends),
+                              {'oura_data': oura_data, 'food_entries': food_entries, 'oura_trends': trends}, what="OURA insights")
+
+def save_oura_insight(insight_content: str, oura_data_points: int, food_entries_count: int, metadata: Optional[Dict[str, Any]] = None) -> None:
+    """Save OURA insight to JSON file.
 
-def save_oura_insight(insight_content: str, oura_data_points: int, food_entries_count: int) -> None:
-    """Save OURA insight to JSON file."""
+    `metadata` (e.g. the username and incremental-analysis state) is stored with the insight.
+    """
     insight = {
         'content': insight_content,
         'source': 'oura_sleep',
@@ -179,6 +233,8 @@ def save_oura_insight(insight_content: str, oura_data_points: int, food_entries_
         'food_entries_analyzed': food_entries_count,
         'analysis_type': 'OURA Sleep & Food Correlation'
     }
+    if metadata:
+        insight.update(metadata)
     
     # Load existing insights
     insights_file = "insights.json"
@@ -223,33 +279,36 @@ def format_oura_insight_for_display(insight: Dict[str, Any]) -> str:
     return f"📊 OURA Analysis - {date_str}\n{insight.get('content', 'No content')}"
 
 def create_sleep_food_correlation_data(oura_data: pd.DataFrame, food_entries: List[Dict[str, Any]]) -> pd.DataFrame:
-    """Create a DataFrame for correlation analysis between sleep and food data."""
-    correlation_data = []
+    """Create a DataFrame for correlation analysis between sleep and food data.
+
+    One row per dated night: its OURA scores joined with that day's meal
+    count, late meals (after 20:00) and whether symptoms or supplements were
+    logged, all computed in one groupby over the journal frame.
+    """
+    columns = ['date', 'sleep_score', 'sleep_hours', 'readiness_score', 'activity_score',
+               'meals_count', 'late_meals', 'symptoms_reported', 'supplements_taken']
+    if 'date' not in oura_data.columns:
+        return pd.DataFrame(columns=columns)
     
-    for _, oura_row in oura_data.iterrows():
-        oura_date = oura_row['date'].date() if pd.notna(oura_row['date']) else None
-        
-        if oura_date:
-            # Find food entries for the same date
-            day_food_entries = []
-            for food_entry in food_entries:
-                food_date = datetime.fromisoformat(food_entry['timestamp']).date()
-                if food_date == oura_date:
-                    day_food_entries.append(food_entry)
-            
-            # Create correlation entry
-            correlation_entry = {
-                'date': oura_date,
-                'sleep_score': oura_row.get('sleep_score'),
-                'sleep_hours': oura_row.get('sleep_hours'),
-                'readiness_score': oura_row.get('readiness_score'),
-                'activity_score': oura_row.get('activity_score'),
-                'meals_count': len(day_food_entries),
-                'late_meals': len([e for e in day_food_entries if e.get('meal_time', '') > '20:00']),
-                'symptoms_reported': any(e.get('symptoms') for e in day_food_entries),
-                'supplements_taken': any(e.get('supplements') for e in day_food_entries)
-            }
-            
-            correlation_data.append(correlation_entry)
-    
-    return pd.DataFrame(correlation_data) 
\ No newline at end of file
+    nights = oura_data.reindex(columns=['date', 'sleep_score', 'sleep_hours', 'readiness_score', 'activity_score'])
+    nights = nights.assign(date=pd.to_datetime(nights['date']).dt.normalize().astype('datetime64[ns]'))
+    nights = nights.dropna(subset=['date'])
+    
+    # Daily food features: count and sum per journal day in one groupby
+    frame = build_journal_frame(food_entries)
+    daily = pd.DataFrame({
+        'date': frame['date'].astype('datetime64[ns]'),
+        'meals_count': 1,
+        'late_meals': (frame['meal_minutes'] > LATE_MEAL_MINUTES).astype(int),
+        'symptoms_reported': frame['symptoms'].map(bool).astype(int),
+        'supplements_taken': frame['supplements'].map(bool).astype(int)
+    }).groupby('date', sort=False).sum()
+    
+    correlation_data = nights.join(daily, on='date').fillna(
+        {'meals_count': 0, 'late_meals': 0, 'symptoms_reported': 0, 'supplements_taken': 0}
+    ).astype({'meals_count': int, 'late_meals': int})
+    correlation_data['symptoms_reported'] = correlation_data['symptoms_reported'] > 0
+    correlation_data['supplements_taken'] = correlation_data['supplements_taken'] > 0
+    correlation_data['date'] = correlation_data['date'].dt.date
+    
+    return correlation_data[columns].reset_index(drop=True)
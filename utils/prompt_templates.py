@@ -0,0 +1,213 @@
+from typing import List, Dict, Any, Optional, Tuple
+
+# Insight prompt templates. Every prompt is laid out static text first:
+# the system prompt, then the template's fixed instructions, then the
+# variable data sections. Requests for the same template therefore share a
+# byte-identical prefix that providers with prefix caching can reuse.
+# Bump a template's version whenever its text changes; the version is
+# recorded with each call in the telemetry log.
+PROMPT_TEMPLATES: Dict[str, Dict[str, Any]] = {
+    'food': {
+        'version': 2,
+        'system': "You are a nutrition and health expert analyzing food journal data to identify patterns and provide actionable insights.",
+        'instructions': """Analyze the food journal data below and provide insights about potential patterns, triggers, and recommendations.
+The data has exact aggregates over all entries (food, supplement and symptom counts, foods eaten in the
+24 hours before each symptom with occurrence count and share, meal timing statistics) and a sample of the most recent entries.
+The 'time' field represents when the meal was actually consumed (not when it was logged).
+
+Please provide insights on:
+1. Potential food triggers for symptoms (especially bloating, digestive issues)
+2. Meal timing patterns and their effects (interpret the precomputed meal_timing statistics)
+3. Supplement effectiveness
+4. Dietary patterns and recommendations
+5. Any correlations between food choices and symptoms
+6. Meal timing recommendations (compare the eating window, overnight fast and meal gaps to healthy ranges)
+
+Format your response in a clear, actionable way with specific recommendations.""",
+        'max_tokens': 1000,
+        'temperature': 0.7
+    },
+    'oura': {
+        'version': 3,
+        'system': "You are a sleep and health expert analyzing OURA ring data to provide actionable insights for better sleep and overall health.",
+        'instructions': """Analyze the OURA sleep and activity data below and provide insights about sleep quality, activity patterns, and health recommendations.
+The SLEEP TRENDS section has, per metric, the 7- and 30-day averages, the change from the night before and the
+latest night's z-score against the previous 30 days, plus the nights of the last 30 days flagged as anomalous.
+
+Please provide insights on:
+1. Sleep quality patterns and potential improvements (compare the 7-day and 30-day averages)
+2. Activity level recommendations
+3. Readiness score interpretation
+4. Sleep hygiene suggestions
+5. Overall health optimization tips
+6. Likely causes of any anomalous nights
+
+When food journal data (aggregates and the most recent entries) is included, also consider:
+7. How meal timing might affect sleep quality
+8. Food choices that could impact sleep
+9. Recommendations for better sleep through diet
+
+Format your response in a clear, actionable way with specific recommendations.""",
+        'max_tokens': 1000,
+        'temperature': 0.7
+    },
+    'tasks': {
+        'version': 2,
+        'system': "You are a productivity and task management expert analyzing task data to provide actionable insights for better time management and productivity.",
+        'instructions': """Analyze the task management data below and provide insights about productivity patterns and recommendations.
+The data has exact aggregates over all tasks (completed/total per category and priority) and a sample of the most recent tasks.
+
+Please provide insights on:
+1. Task completion patterns and productivity trends
+2. Category-wise performance analysis (Work, Health, Personal)
+3. Priority management effectiveness
+4. Time management patterns and suggestions
+5. Recommendations for improving task completion rates
+6. Suggestions for better task organization and prioritization
+7. Work-life balance insights based on task categories
+
+Focus on actionable insights and specific recommendations for better productivity.
+Format your response in a clear, structured way with bullet points for key findings.""",
+        'max_tokens': 1000,
+        'temperature': 0.7
+    },
+    'goals': {
+        'version': 2,
+        'system': "You are a motivational coach and goal-setting expert analyzing goal data to provide encouraging insights and actionable advice for better goal achievement.",
+        'instructions': """Analyze the goal management data below and provide motivational insights and recommendations.
+The data has exact aggregates over all goals (completed/total per timeframe) and a sample of the most recent goals.
+
+Please provide insights on:
+1. Goal completion patterns and success rates
+2. Timeframe effectiveness (Daily, Weekly, Monthly goals)
+3. Motivational analysis based on goal types and completion
+4. Detection of missing or recurring goals
+5. Recommendations for better goal setting and achievement
+6. Strategies for improving goal completion rates
+7. Work-life balance insights based on goal distribution
+8. Motivational messages and encouragement
+
+Focus on actionable insights, motivational content, and specific recommendations.
+Format your response in a clear, structured way with bullet points for key findings.
+Include encouraging and motivational language.""",
+        'max_tokens': 1200,
+        'temperature': 0.8
+    },
+    'meals': {
+        'version': 2,
+        'system': "You are a nutritionist and meal planning expert analyzing food journal data to provide personalized meal recommendations that consider the user's food preferences, symptoms, and nutritional needs.",
+        'instructions': """Analyze the food journal data below and provide personalized meal recommendations for a weekly meal plan.
+The data has exact aggregates over the whole journal (food and symptom counts, foods eaten before each symptom)
+and a sample of the most recent entries. Take any current symptoms listed after it into account.
+
+Please provide:
+1. **Breakfast Recommendations** (7 days) - Consider energy levels and morning routines
+2. **Lunch Recommendations** (7 days) - Focus on balanced nutrition and productivity
+3. **Dinner Recommendations** (7 days) - Consider evening comfort and sleep quality
+4. **Snack Suggestions** - Healthy options for between meals
+5. **Recipe Ideas** - Simple recipes that align with the user's food preferences
+6. **Grocery List Suggestions** - Essential ingredients for the recommended meals
+7. **Nutritional Considerations** - Based on symptoms and food reactions
+8. **Meal Prep Tips** - How to prepare these meals efficiently
+
+Focus on:
+- Foods that work well for the user (based on their journal)
+- Avoiding foods that cause symptoms
+- Balanced nutrition and variety
+- Practical, easy-to-prepare meals
+- Seasonal and accessible ingredients
+
+Format your response in a clear, structured way with specific meal suggestions for each day.
+Include recipe ideas and grocery shopping recommendations.""",
+        'max_tokens': 1500,
+        'temperature': 0.8
+    },
+    'selfcare': {
+        'version': 2,
+        'system': "You are a wellness coach and self-care expert analyzing routine data to provide insights and recommendations for maintaining consistent self-care habits.",
+        'instructions': """Analyze the self-care routine data below and provide insights and recommendations.
+The data has exact aggregates over all routines and a sample of the most recent routines.
+
+Please provide insights on:
+1. **Routine Patterns**: Analysis of completion patterns and consistency
+2. **Frequency Optimization**: Whether daily, weekly, or monthly frequencies are working well
+3. **Time Management**: Analysis of scheduled times and completion timing
+4. **Category Balance**: Distribution across grooming, cleaning, health, and wellness
+5. **Missed Routines**: Identification of potentially missed or inconsistent routines
+6. **Recommendations**: Suggestions for improving self-care routine consistency
+7. **Wellness Insights**: How the routine contributes to overall wellness
+8. **Motivational Tips**: Encouragement for maintaining self-care habits
+
+Focus on:
+- Identifying patterns in completion rates
+- Suggesting optimal frequencies for different activities
+- Detecting potential gaps in self-care routines
+- Providing actionable recommendations for improvement
+- Encouraging consistent self-care habits
+
+Format your response in a clear, structured way with specific recommendations.
+Include motivational content and practical tips for maintaining routines.""",
+        'max_tokens': 1200,
+        'temperature': 0.8
+    }
+}
+
+# Added to the system prompt of incremental updates, so those requests also
+# keep a static prefix; the previous summary is sent as a data section
+INCREMENTAL_INSTRUCTIONS = """
+
+This is an incremental update. A previous analysis covered all data up to the watermark given in the
+PREVIOUS ANALYSIS SUMMARY section (its aggregates at that point and its main findings). The other data
+sections only hold records added or changed since then. Keep conclusions that still hold, revise any that
+the new records contradict and point out what is new."""
+
+# Static user-prompt prefix per template, built once at import
+_PREFIXES: Dict[str, str] = {
+    domain: template['instructions'] + "\n" for domain, template in PROMPT_TEMPLATES.items()
+}
+
+def get_prompt_version(domain: str) -> str:
+    """Version label of a template, e.g. 'food@2'."""
+    return f"{domain}@{PROMPT_TEMPLATES[domain]['version']}"
+
+def render_prompt(domain: str, sections: List[Tuple[str, Optional[str]]]) -> Dict[str, Any]:
+    """Build a chat request from a template and its (label, text) data sections.
+
+    Sections whose text is empty are left out. Returns the same request dict
+    as the build_*_prompt functions.
+    """
+    template = PROMPT_TEMPLATES[domain]
+    parts = [_PREFIXES[domain]]
+    for label, text in sections:
+        if text:
+            parts.append(f"\n{label}:\n{text}\n")
+
+    return {
+        'system_prompt': template['system'],
+        'user_prompt': "".join(parts),
+        'max_tokens': template['max_tokens'],
+        'temperature': template['temperature'],
+        'domain': domain,
+        'prompt_version': get_prompt_version(domain)
+    }
+
+def add_prompt_section(request: Dict[str, Any], label: str, text: str) -> Dict[str, Any]:
+    """Return a copy of a rendered request with another data section at the end."""
+    return dict(request, user_prompt=request['user_prompt'] + f"\n{label}:\n{text}\n")
+
+def get_static_prefix(domain: str) -> str:
+    """The part of every prompt built from a template that never changes."""
+    return PROMPT_TEMPLATES[domain]['system'] + _PREFIXES[domain]
+
+def get_template_table() -> List[Dict[str, Any]]:
+    """Describe the registered templates (version, static prefix size) for display."""
+    return [
+        {
+            'domain': domain,
+            'version': template['version'],
+            'static_prefix_bytes': len(get_static_prefix(domain).encode('utf-8')),
+            'max_tokens': template['max_tokens'],
+            'temperature': template['temperature']
+        }
+        for domain, template in PROMPT_TEMPLATES.items()
+    ]
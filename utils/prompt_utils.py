@@ -0,0 +1,138 @@
+import json
+import os
+import re
+from collections import Counter
+from datetime import datetime, date
+from typing import List, Dict, Any, Iterable
+
+from utils.timing_utils import get_meal_timing_summary
+from utils.symptom_utils import build_symptom_index, get_symptom_counts, get_foods_before_symptom
+
+# Token budget for the data section of each insight prompt (instructions not included)
+PROMPT_DATA_TOKEN_BUDGET = int(os.getenv('PROMPT_DATA_TOKEN_BUDGET', '1500'))
+
+# Sizes of the ranked lists sent as aggregates
+TOP_FOODS = 25
+TOP_SYMPTOMS = 8
+FOODS_PER_SYMPTOM = 5
+
+# Newline runs, words, digit groups and punctuation runs, roughly how BPE
+# tokenizers split text (leading spaces merge into the following token)
+_TOKEN_PATTERN = re.compile(r"\s*\n\s*|[^\W\d_]+|\d{1,3}|[^\w\s]+|_+")
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of LLM tokens in text without a tokenizer.
+
+    Accurate to roughly +/-15% for English and JSON, which is enough for
+    budgeting prompts.
+    """
+    tokens = 0
+    for piece in _TOKEN_PATTERN.findall(text):
+        first = piece[0]
+        if first.isalpha():
+            tokens += 1 + (len(piece) - 1) // 6
+        elif first.isdigit() or first.isspace():
+            tokens += 1
+        else:
+            tokens += (len(piece) + 1) // 2
+    return tokens
+
+def compact_json(data: Any) -> str:
+    """Serialize to JSON without indentation or padding."""
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=str)
+
+def drop_empty(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Remove empty, None and placeholder values from a prompt row."""
+    return {key: value for key, value in row.items() if value not in (None, '', [], {}, 'Unknown')}
+
+def count_values(lists: Iterable[Iterable[str]], top_n: int) -> Dict[str, int]:
+    """Count case-insensitive values across lists, keeping the top_n."""
+    counts = Counter()
+    labels = {}
+    for values in lists:
+        for value in values or []:
+            key = str(value).strip().lower()
+            if key:
+                counts[key] += 1
+                labels.setdefault(key, str(value).strip())
+    return {labels[key]: count for key, count in counts.most_common(top_n)}
+
+def fit_recent_rows(rows: List[Dict[str, Any]], token_budget: int) -> List[Dict[str, Any]]:
+    """Get the newest rows (rows are ordered oldest first) that fit in the budget."""
+    selected = []
+    used = 0
+    for row in reversed(rows):
+        cost = estimate_tokens(compact_json(row)) + 1
+        if used + cost > token_budget:
+            break
+        selected.append(row)
+        used += cost
+    selected.reverse()
+    return selected
+
+def build_budgeted_data(aggregates: Dict[str, Any], rows: List[Dict[str, Any]],
+                        token_budget: int = PROMPT_DATA_TOKEN_BUDGET) -> str:
+    """Compact JSON of aggregates plus as many recent rows as fit in the token budget."""
+    payload = dict(aggregates)
+    payload['recent_sample_size'] = f"0 of {len(rows)}"
+    remaining = token_budget - estimate_tokens(compact_json(payload)) - 4
+
+    sample = fit_recent_rows(rows, remaining) if remaining > 0 else []
+    payload['recent_sample_size'] = f"{len(sample)} of {len(rows)}"
+    payload['recent_sample'] = sample
+    return compact_json(payload)
+
+def completion_by(items: List[Dict[str, Any]], field: str) -> Dict[str, str]:
+    """Count completed/total items for each value of a field."""
+    totals = Counter()
+    completed = Counter()
+    for item in items:
+        value = item.get(field) or 'Unknown'
+        totals[value] += 1
+        completed[value] += int(bool(item.get('completed', False)))
+    return {value: f"{completed[value]}/{total}" for value, total in totals.most_common()}
+
+def count_overdue(items: List[Dict[str, Any]], date_field: str) -> int:
+    """Count incomplete items whose date field is before today."""
+    today = date.today()
+    overdue = 0
+    for item in items:
+        if item.get(date_field) and not item.get('completed', False):
+            try:
+                if datetime.fromisoformat(item[date_field]).date() < today:
+                    overdue += 1
+            except (ValueError, TypeError):
+                continue
+    return overdue
+
+def summarize_food_entries(entries: List[Dict[str, Any]], top_foods: int = TOP_FOODS) -> Dict[str, Any]:
+    """Aggregate journal entries for a prompt.
+
+    Includes per-food, supplement, symptom and meal-type counts, the foods
+    most often eaten before each symptom, and meal timing statistics.
+    """
+    dated = [entry for entry in entries if 'timestamp' in entry]
+    if not dated:
+        return {'entries': 0}
+
+    timestamps = sorted(entry['timestamp'] for entry in dated)
+    index = build_symptom_index(dated)
+
+    symptom_triggers = {}
+    for symptom, _ in get_symptom_counts(index)[:TOP_SYMPTOMS]:
+        symptom_triggers[symptom] = [
+            f"{food['food']} ({food['occurrences']}, {food['share']:.0%})"
+            for food in get_foods_before_symptom(index, symptom, top_k=FOODS_PER_SYMPTOM)
+        ]
+
+    return {
+        'entries': len(dated),
+        'days_logged': len({timestamp[:10] for timestamp in timestamps}),
+        'date_range': f"{timestamps[0][:10]} to {timestamps[-1][:10]}",
+        'food_counts': count_values((entry.get('food_items') for entry in dated), top_foods),
+        'supplement_counts': count_values((entry.get('supplements') for entry in dated), top_foods),
+        'symptom_counts': dict(get_symptom_counts(index)[:TOP_SYMPTOMS]),
+        'meal_type_counts': count_values(([entry.get('meal_type')] for entry in dated if entry.get('meal_type')), 10),
+        'foods_eaten_before_symptom': symptom_triggers,
+        'meal_timing': get_meal_timing_summary(dated)
+    }
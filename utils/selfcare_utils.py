@@ -1,10 +1,13 @@
 import json
 import os
 from datetime import datetime, date, timedelta
-from typing import List, Dict, Any, Optional
-import openai
+from typing import List, Dict, Any, Optional, Iterator, Union
 from dotenv import load_dotenv
 
+from utils.llm_client import generate_insight, stream_insight
+from utils.prompt_utils import PROMPT_DATA_TOKEN_BUDGET, build_budgeted_data, drop_empty, count_values
+from utils.prompt_templates import render_prompt
+
 # Load environment variables
 load_dotenv()
 
@@ -239,81 +242,71 @@ def get_selfcare_statistics() -> Dict[str, Any]:
         'total_completions': total_completions
     }
 
-def generate_selfcare_insights(tasks: List[Dict[str, Any]]) -> str:
-    """Generate AI insights for self-care routines using GROQ."""
-    if not tasks:
-        return "No self-care tasks found to analyze."
-    
-    # Set up GROQ client
-    api_key = os.getenv('GROQ_API_KEY')
-    if not api_key:
-        return "GROQ API key not found. Please set GROQ_API_KEY environment variable."
-    
-    client = openai.OpenAI(
-        api_key=api_key,
-        base_url="https://api.groq.com/openai/v1"
-    )
+def summarize_selfcare_tasks(tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregate self-care routines for a prompt: counts by frequency and category, completions."""
+    completions_by_category = {}
+    for task in tasks:
+        category = task.get('category') or 'Unknown'
+        completions_by_category[category] = completions_by_category.get(category, 0) + len(task.get('completions', []))
     
+    return {
+        'total_routines': len(tasks),
+        'routines_by_frequency': count_values(([t.get('frequency')] for t in tasks if t.get('frequency')), 10),
+        'routines_by_category': count_values(([t.get('category')] for t in tasks if t.get('category')), 20),
+        'total_completions': sum(completions_by_category.values()),
+        'completions_by_category': completions_by_category
+    }
+
+def build_selfcare_insight_prompt(tasks: List[Dict[str, Any]], token_budget: int = PROMPT_DATA_TOKEN_BUDGET) -> Dict[str, Any]:
+    """Build the chat request (prompts and sampling settings) for self-care insights.
+
+    The data section is aggregates over all routines plus as many recently
+    created routines as fit in `token_budget` tokens.
+    """
     # Prepare task data for analysis
     task_analysis = []
-    for task in tasks:
+    for task in sorted(tasks, key=lambda t: t.get('created_at', '')):
+        last_completion = get_last_completion(task)
+        next_occurrence = get_next_occurrence(task)
         task_entry = {
             'title': task.get('title', 'Unknown'),
             'category': task.get('category', 'Unknown'),
             'frequency': task.get('frequency', 'Unknown'),
             'scheduled_time': task.get('scheduled_time', 'No time set'),
             'completions_count': len(task.get('completions', [])),
-            'last_completion': get_last_completion(task),
-            'next_occurrence': get_next_occurrence(task)
+            'last_completion': last_completion.isoformat() if last_completion else None,
+            'next_occurrence': next_occurrence.isoformat() if next_occurrence else None
         }
-        task_analysis.append(task_entry)
+        task_analysis.append(drop_empty(task_entry))
     
-    # Create prompt for GROQ
-    prompt = f"""
-    Analyze the following self-care routine data and provide insights and recommendations:
-
-    SELF-CARE TASKS DATA:
-    {json.dumps(task_analysis, indent=2)}
-
-    Please provide insights on:
-    1. **Routine Patterns**: Analysis of completion patterns and consistency
-    2. **Frequency Optimization**: Whether daily, weekly, or monthly frequencies are working well
-    3. **Time Management**: Analysis of scheduled times and completion timing
-    4. **Category Balance**: Distribution across grooming, cleaning, health, and wellness
-    5. **Missed Routines**: Identification of potentially missed or inconsistent routines
-    6. **Recommendations**: Suggestions for improving self-care routine consistency
-    7. **Wellness Insights**: How the routine contributes to overall wellness
-    8. **Motivational Tips**: Encouragement for maintaining self-care habits
+    data = build_budgeted_data(summarize_selfcare_tasks(tasks), task_analysis, token_budget)
+    
+    return render_prompt('selfcare', [('SELF-CARE TASKS DATA', data)])
 
-    Focus on:
-    - Identifying patterns in completion rates
-    - Suggesting optimal frequencies for different activities
-    - Detecting potential gaps in self-care routines
-    - Providing actionable recommendations for improvement
-    - Encouraging consistent self-care habits
+def generate_selfcare_insights(tasks: List[Dict[str, Any]], structured: bool = False) -> Union[str, Dict[str, Any]]:
+    """Generate AI insights for self-care routines using GROQ.
 
-    Format your response in a clear, structured way with specific recommendations.
-    Include motivational content and practical tips for maintaining routines.
+    With `structured`, returns the validated findings, triggers, recommendations
+    and confidence (rendered markdown in 'content') instead of free text.
     """
+    if not tasks:
+        return "No self-care tasks found to analyze."
     
-    try:
-        response = client.chat.completions.create(
-            model="llama3-70b-8192",  # Using GROQ's Llama model
-            messages=[
-                {"role": "system", "content": "You are a wellness coach and self-care expert analyzing routine data to provide insights and recommendations for maintaining consistent self-care habits."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=1200,
-            temperature=0.8
-        )
-        
-        return response.choices[0].message.content
+    return generate_insight('selfcare', lambda: build_selfcare_insight_prompt(tasks), {'tasks': tasks}, structured=structured)
+
+def stream_selfcare_insights(tasks: List[Dict[str, Any]]) -> Iterator[str]:
+    """Stream self-care insights as they are generated (same request as generate_selfcare_insights)."""
+    if not tasks:
+        yield "No self-care tasks found to analyze."
+        return
     
-    except Exception as e:
-        return f"Error generating insights: {str(e)}"
+    yield from stream_insight('selfcare', lambda: build_selfcare_insight_prompt(tasks), {'tasks': tasks})
+
+def save_selfcare_insight(insight_content: str, tasks_analyzed: int, metadata: Optional[Dict[str, Any]] = None) -> None:
+    """Save self-care insight to JSON file.
 
-def save_selfcare_insight(insight_content: str, tasks_analyzed: int) -> None:
-    """Save self-care insight to JSON file."""
+    `metadata` (e.g. the username and incremental-analysis state) is stored with the insight.
+    """
     insight = {
         'content': insight_content,
         'source': 'selfcare_routines',
@@ -321,6 +314,8 @@ def save_selfcare_insight(insight_content: str, tasks_analyzed: int) -> None:
         'tasks_analyzed': tasks_analyzed,
         'analysis_type': 'Self-Care Routine Analysis'
     }
+    if metadata:
+        insight.update(metadata)
     
     # Load existing insights
     insights_file = "insights.json"
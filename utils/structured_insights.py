@@ -0,0 +1,338 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from contextlib import closing
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+import openai
+
+from utils.user_utils import USER_DATA_DIR, ensure_user_data_dir
+from utils.llm_client import complete_chat, acomplete_chat
+
+INSIGHT_INDEX_FILE = os.path.join(USER_DATA_DIR, "insight_index.sqlite")
+
+RECOMMENDATION_TYPES = ['diet', 'meal_timing', 'sleep', 'supplement', 'activity', 'productivity', 'routine', 'other']
+
+# JSON schema the model is asked to follow (validated locally by validate_structured_insight)
+INSIGHT_SCHEMA = {
+    'type': 'object',
+    'required': ['findings', 'triggers', 'recommendations', 'confidence'],
+    'properties': {
+        'findings': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'required': ['title', 'detail'],
+                'properties': {'title': {'type': 'string'}, 'detail': {'type': 'string'}}
+            }
+        },
+        'triggers': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'required': ['food', 'symptom'],
+                'properties': {
+                    'food': {'type': 'string'},
+                    'symptom': {'type': 'string'},
+                    'evidence': {'type': 'string'}
+                }
+            }
+        },
+        'recommendations': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'required': ['type', 'text'],
+                'properties': {'type': {'type': 'string', 'enum': RECOMMENDATION_TYPES}, 'text': {'type': 'string'}}
+            }
+        },
+        'confidence': {'type': 'number', 'minimum': 0, 'maximum': 1}
+    }
+}
+
+STRUCTURED_INSTRUCTIONS = f"""
+Reply with one JSON object and nothing else (no markdown, no code fences) matching this JSON schema:
+{json.dumps(INSIGHT_SCHEMA, separators=(',', ':'))}
+Put each pattern or observation you would have written in "findings", every food linked to a symptom
+in "triggers" (an empty list if the data has no food/symptom links) and each actionable suggestion in
+"recommendations". "confidence" (0 to 1) is how well the data supports the analysis as a whole."""
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+def _connect() -> sqlite3.Connection:
+    """Open a connection to the insight index, creating the schema once."""
+    global _schema_ready
+
+    ensure_user_data_dir()
+    conn = sqlite3.connect(INSIGHT_INDEX_FILE, timeout=10)
+    conn.row_factory = sqlite3.Row
+
+    if not _schema_ready:
+        with _schema_lock:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS insights (
+                    id TEXT PRIMARY KEY,
+                    username TEXT NOT NULL,
+                    domain TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    confidence REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS findings (
+                    insight_id TEXT NOT NULL REFERENCES insights (id),
+                    username TEXT NOT NULL,
+                    domain TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    detail TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS triggers (
+                    insight_id TEXT NOT NULL REFERENCES insights (id),
+                    username TEXT NOT NULL,
+                    domain TEXT NOT NULL,
+                    food TEXT NOT NULL,
+                    symptom TEXT NOT NULL,
+                    evidence TEXT,
+                    created_at TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS recommendations (
+                    insight_id TEXT NOT NULL REFERENCES insights (id),
+                    username TEXT NOT NULL,
+                    domain TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_insights_user ON insights (username, domain, created_at);
+                CREATE INDEX IF NOT EXISTS idx_findings_user ON findings (username, domain);
+                CREATE INDEX IF NOT EXISTS idx_triggers_food ON triggers (username, food);
+                CREATE INDEX IF NOT EXISTS idx_recommendations_type ON recommendations (username, type);
+            """)
+            conn.commit()
+            _schema_ready = True
+
+    return conn
+
+def make_structured_request(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a build_*_prompt request into one that asks for schema-conforming JSON."""
+    return dict(request, system_prompt=request['system_prompt'] + STRUCTURED_INSTRUCTIONS, json_mode=True)
+
+def _clean(value: Any) -> str:
+    return str(value).strip() if value is not None else ''
+
+def validate_structured_insight(payload: Any) -> Dict[str, Any]:
+    """Check a parsed response against INSIGHT_SCHEMA and normalize it.
+
+    Foods and symptoms are lowercased, unknown recommendation types become
+    'other' and a 0-100 confidence is rescaled. Raises ValueError listing
+    every problem found.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Structured insight must be a JSON object")
+
+    errors = []
+    for key in INSIGHT_SCHEMA['required']:
+        if key not in payload:
+            errors.append(f"missing '{key}'")
+        elif key != 'confidence' and not isinstance(payload[key], list):
+            errors.append(f"'{key}' must be a list")
+    if errors:
+        raise ValueError("Invalid structured insight: " + "; ".join(errors))
+
+    findings = []
+    for i, item in enumerate(payload['findings']):
+        if not isinstance(item, dict) or not _clean(item.get('title')) and not _clean(item.get('detail')):
+            errors.append(f"findings[{i}] needs a title or detail")
+            continue
+        findings.append({'title': _clean(item.get('title')), 'detail': _clean(item.get('detail'))})
+
+    triggers = []
+    for i, item in enumerate(payload['triggers']):
+        if not isinstance(item, dict) or not _clean(item.get('food')) or not _clean(item.get('symptom')):
+            errors.append(f"triggers[{i}] needs a food and a symptom")
+            continue
+        triggers.append({
+            'food': _clean(item['food']).lower(),
+            'symptom': _clean(item['symptom']).lower(),
+            'evidence': _clean(item.get('evidence'))
+        })
+
+    recommendations = []
+    for i, item in enumerate(payload['recommendations']):
+        if not isinstance(item, dict) or not _clean(item.get('text')):
+            errors.append(f"recommendations[{i}] needs text")
+            continue
+        rec_type = _clean(item.get('type')).lower().replace(' ', '_')
+        recommendations.append({
+            'type': rec_type if rec_type in RECOMMENDATION_TYPES else 'other',
+            'text': _clean(item['text'])
+        })
+
+    confidence = payload['confidence']
+    if isinstance(confidence, bool) or not isinstance(confidence, (int, float)):
+        errors.append("'confidence' must be a number")
+    elif 1 < confidence <= 100:
+        confidence = confidence / 100
+    if isinstance(confidence, (int, float)) and not 0 <= confidence <= 1:
+        errors.append("'confidence' must be between 0 and 1")
+
+    if errors:
+        raise ValueError("Invalid structured insight: " + "; ".join(errors))
+
+    return {
+        'findings': findings,
+        'triggers': triggers,
+        'recommendations': recommendations,
+        'confidence': round(float(confidence), 3)
+    }
+
+def parse_structured_insight(text: str) -> Dict[str, Any]:
+    """Parse and validate a structured-output response (code fences are tolerated)."""
+    text = text.strip()
+    fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    try:
+        payload = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Structured insight is not valid JSON: {e}") from e
+    return validate_structured_insight(payload)
+
+def render_structured_insight(insight: Dict[str, Any]) -> str:
+    """Render a structured insight as markdown."""
+    lines = [f"**Confidence:** {insight['confidence']:.0%}", ""]
+
+    if insight['findings']:
+        lines.append("### Key Findings")
+        for finding in insight['findings']:
+            title = f"**{finding['title']}**" if finding['title'] else ""
+            separator = ": " if finding['title'] and finding['detail'] else ""
+            lines.append(f"- {title}{separator}{finding['detail']}")
+        lines.append("")
+
+    if insight['triggers']:
+        lines.append("### Possible Triggers")
+        for trigger in insight['triggers']:
+            evidence = f" ({trigger['evidence']})" if trigger['evidence'] else ""
+            lines.append(f"- **{trigger['food']}** → {trigger['symptom']}{evidence}")
+        lines.append("")
+
+    if insight['recommendations']:
+        lines.append("### Recommendations")
+        for recommendation in insight['recommendations']:
+            label = recommendation['type'].replace('_', ' ').capitalize()
+            lines.append(f"- *{label}:* {recommendation['text']}")
+
+    return "\n".join(lines).strip()
+
+def complete_structured_insight(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a build_*_prompt request in structured-output mode.
+
+    Returns the validated insight plus its rendered markdown as 'content';
+    raises ValueError if the response does not match the schema.
+    """
+    insight = parse_structured_insight(complete_chat(**make_structured_request(request)))
+    return dict(insight, content=render_structured_insight(insight))
+
+async def acomplete_structured_insight(client: openai.AsyncOpenAI, request: Dict[str, Any]) -> Dict[str, Any]:
+    """Async version of complete_structured_insight."""
+    insight = parse_structured_insight(await acomplete_chat(client, **make_structured_request(request)))
+    return dict(insight, content=render_structured_insight(insight))
+
+def index_structured_insight(username: str, domain: str, insight: Dict[str, Any],
+                             created_at: Optional[str] = None) -> str:
+    """Store a structured insight's fields in the queryable index; returns its id."""
+    insight_id = uuid.uuid4().hex
+    created_at = created_at or datetime.now().isoformat()
+
+    with closing(_connect()) as conn:
+        conn.execute(
+            "INSERT INTO insights (id, username, domain, created_at, confidence) VALUES (?, ?, ?, ?, ?)",
+            (insight_id, username, domain, created_at, insight['confidence'])
+        )
+        conn.executemany(
+            "INSERT INTO findings (insight_id, username, domain, title, detail, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            [(insight_id, username, domain, f['title'], f['detail'], created_at) for f in insight['findings']]
+        )
+        conn.executemany(
+            "INSERT INTO triggers (insight_id, username, domain, food, symptom, evidence, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(insight_id, username, domain, t['food'], t['symptom'], t['evidence'], created_at)
+             for t in insight['triggers']]
+        )
+        conn.executemany(
+            "INSERT INTO recommendations (insight_id, username, domain, type, text, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            [(insight_id, username, domain, r['type'], r['text'], created_at) for r in insight['recommendations']]
+        )
+        conn.commit()
+
+    return insight_id
+
+def get_trigger_foods(username: str, food: Optional[str] = None, domain: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Get the foods past insights named as triggers, most often named first.
+
+    Each row has the food, how many insights named it, the symptoms it was
+    linked to and when it was last named.
+    """
+    where = " WHERE username = ?"
+    params: List[Any] = [username]
+    if food:
+        where += " AND food = ?"
+        params.append(food.strip().lower())
+    if domain:
+        where += " AND domain = ?"
+        params.append(domain)
+
+    with closing(_connect()) as conn:
+        rows = conn.execute(
+            "SELECT food, COUNT(DISTINCT insight_id) AS mentions, MAX(created_at) AS last_seen FROM triggers"
+            + where + " GROUP BY food ORDER BY mentions DESC, last_seen DESC", params
+        ).fetchall()
+        # Symptoms as rows, not GROUP_CONCAT: a symptom name can contain the separator
+        pairs = conn.execute("SELECT DISTINCT food, symptom FROM triggers" + where, params).fetchall()
+
+    symptoms: Dict[str, List[str]] = {}
+    for pair in pairs:
+        symptoms.setdefault(pair['food'], []).append(pair['symptom'])
+    return [dict(row, symptoms=sorted(symptoms[row['food']])) for row in rows]
+
+def get_recommendations(username: str, rec_type: Optional[str] = None, domain: Optional[str] = None,
+                        limit: int = 50) -> List[Dict[str, Any]]:
+    """Get past recommendations, deduplicated by type and text, most recent first."""
+    query = ("SELECT type, text, COUNT(*) AS times_given, GROUP_CONCAT(DISTINCT domain) AS domains, "
+             "MAX(created_at) AS last_given FROM recommendations WHERE username = ?")
+    params: List[Any] = [username]
+    if rec_type:
+        query += " AND type = ?"
+        params.append(rec_type)
+    if domain:
+        query += " AND domain = ?"
+        params.append(domain)
+    query += " GROUP BY type, LOWER(text) ORDER BY last_given DESC LIMIT ?"
+    params.append(limit)
+
+    with closing(_connect()) as conn:
+        rows = conn.execute(query, params).fetchall()
+    return [dict(row) for row in rows]
+
+def get_findings(username: str, domain: Optional[str] = None, search: Optional[str] = None,
+                 limit: int = 50) -> List[Dict[str, Any]]:
+    """Get past findings, most recent first, optionally matching `search` in the title or detail."""
+    query = "SELECT domain, title, detail, created_at FROM findings WHERE username = ?"
+    params: List[Any] = [username]
+    if domain:
+        query += " AND domain = ?"
+        params.append(domain)
+    if search:
+        query += " AND (title LIKE ? OR detail LIKE ?)"
+        params.extend([f"%{search}%"] * 2)
+    query += " ORDER BY created_at DESC LIMIT ?"
+    params.append(limit)
+
+    with closing(_connect()) as conn:
+        rows = conn.execute(query, params).fetchall()
+    return [dict(row) for row in rows]
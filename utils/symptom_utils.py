@@ -0,0 +1,134 @@
+import bisect
+import os
+import threading
+from collections import Counter
+from datetime import timedelta
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.data_utils import build_journal_frame
+from utils.nutrition_utils import parse_food_quantity
+from utils.user_utils import get_user_file_path
+
+DEFAULT_LOOKBACK_HOURS = 24
+
+# Per-user symptom indexes: {username: (journal version, index)}
+_indexes: Dict[str, Tuple[Tuple, Dict[str, Any]]] = {}
+_index_lock = threading.Lock()
+
+def build_symptom_index(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build a time-sorted journal plus a per-symptom event index.
+
+    Entries are ordered by actual meal time (date + meal_time). 'events' maps each
+    normalized symptom to the positions (in that order) of entries reporting it.
+    """
+    frame = build_journal_frame(entries)
+
+    if frame.empty:
+        return {'times': [], 'entries': [], 'events': {}, 'labels': {}}
+
+    meal_times = frame['date'] + pd.to_timedelta(frame['meal_minutes'], unit='m')
+    order = np.argsort(meal_times.to_numpy(), kind='stable')
+
+    sorted_times = list(meal_times.iloc[order].dt.to_pydatetime())
+    sorted_entries = [entries[i] for i in frame['entry_index'].to_numpy()[order]]
+
+    events = {}
+    labels = {}
+    for position, entry in enumerate(sorted_entries):
+        for symptom in entry.get('symptoms', []):
+            key = symptom.strip().lower()
+            if not key:
+                continue
+            # Record each symptom at most once per entry
+            positions = events.setdefault(key, [])
+            if not positions or positions[-1] != position:
+                positions.append(position)
+            labels.setdefault(key, symptom.strip())
+
+    return {
+        'times': sorted_times,
+        'entries': sorted_entries,
+        'events': events,
+        'labels': labels
+    }
+
+def get_symptom_index(username: str, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Get a user's symptom index, rebuilt only when their journal changes.
+
+    `entries` is the user's loaded journal; the index is keyed on the journal
+    file's mtime and size and the number of entries.
+    """
+    try:
+        stat = os.stat(get_user_file_path(username, "food_journal.json"))
+        version = (stat.st_mtime_ns, stat.st_size, len(entries))
+    except OSError:
+        version = (None, None, len(entries))
+
+    cached = _indexes.get(username)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    index = build_symptom_index(entries)
+    with _index_lock:
+        _indexes[username] = (version, index)
+    return index
+
+def get_symptom_counts(index: Dict[str, Any]) -> List[Tuple[str, int]]:
+    """Get (symptom label, occurrences) pairs, most frequent first."""
+    counts = [(index['labels'][key], len(positions)) for key, positions in index['events'].items()]
+    return sorted(counts, key=lambda x: x[1], reverse=True)
+
+def get_symptom_occurrences(index: Dict[str, Any], symptom: str) -> List[Dict[str, Any]]:
+    """Get every occurrence of a symptom as {'position', 'time', 'entry'}, newest first."""
+    positions = index['events'].get(symptom.strip().lower(), [])
+    return [
+        {'position': position, 'time': index['times'][position], 'entry': index['entries'][position]}
+        for position in reversed(positions)
+    ]
+
+def get_entries_before(index: Dict[str, Any], position: int,
+                       lookback_hours: float = DEFAULT_LOOKBACK_HOURS) -> List[Dict[str, Any]]:
+    """Get all entries in the look-back window ending at (and including) an entry."""
+    end_time = index['times'][position]
+    start = bisect.bisect_left(index['times'], end_time - timedelta(hours=lookback_hours))
+    return index['entries'][start:position + 1]
+
+def get_entries_before_symptom(index: Dict[str, Any], symptom: str,
+                               lookback_hours: float = DEFAULT_LOOKBACK_HOURS) -> List[Dict[str, Any]]:
+    """Get the look-back window for every occurrence of a symptom, newest first."""
+    results = []
+    for occurrence in get_symptom_occurrences(index, symptom):
+        occurrence['window'] = get_entries_before(index, occurrence['position'], lookback_hours)
+        results.append(occurrence)
+    return results
+
+def get_foods_before_symptom(index: Dict[str, Any], symptom: str,
+                             lookback_hours: float = DEFAULT_LOOKBACK_HOURS,
+                             top_k: int = 10) -> List[Dict[str, Any]]:
+    """Rank foods by how many occurrences of a symptom they preceded.
+
+    Foods are matched by normalized name without quantities ("2 eggs" and
+    "Eggs" are one food). Each food counts once per occurrence; 'share' is the
+    fraction of occurrences with that food in the look-back window.
+    """
+    occurrences = get_entries_before_symptom(index, symptom, lookback_hours)
+    if not occurrences:
+        return []
+
+    counts = Counter()
+    for occurrence in occurrences:
+        foods = set()
+        for entry in occurrence['window']:
+            for food in entry.get('food_items', []):
+                name = parse_food_quantity(food)[1]
+                if name:
+                    foods.add(name)
+        counts.update(foods)
+
+    return [
+        {'food': food, 'occurrences': count, 'share': count / len(occurrences)}
+        for food, count in counts.most_common(top_k)
+    ]
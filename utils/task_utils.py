@@ -1,10 +1,13 @@
 import json
 import os
 from datetime import datetime, date, timedelta
-from typing import List, Dict, Any, Optional
-import openai
+from typing import List, Dict, Any, Optional, Iterator, Union
 from dotenv import load_dotenv
 
+from utils.llm_client import generate_insight, stream_insight
+from utils.prompt_utils import PROMPT_DATA_TOKEN_BUDGET, build_budgeted_data, drop_empty, completion_by, count_overdue
+from utils.prompt_templates import render_prompt
+
 # Load environment variables
 load_dotenv()
 
@@ -151,24 +154,27 @@ def get_task_statistics() -> Dict[str, Any]:
         'completion_rate': completion_rate
     }
 
-def generate_task_insights(tasks: List[Dict[str, Any]]) -> str:
-    """Generate AI insights for task management using GROQ."""
-    if not tasks:
-        return "No tasks found to analyze."
-    
-    # Set up GROQ client
-    api_key = os.getenv('GROQ_API_KEY')
-    if not api_key:
-        return "GROQ API key not found. Please set GROQ_API_KEY environment variable."
-    
-    client = openai.OpenAI(
-        api_key=api_key,
-        base_url="https://api.groq.com/openai/v1"
-    )
-    
+def summarize_tasks(tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregate tasks for a prompt: completion overall, by category and by priority."""
+    completed = len([t for t in tasks if t.get('completed', False)])
+    return {
+        'total_tasks': len(tasks),
+        'completed_tasks': completed,
+        'completion_rate': round(completed / len(tasks) * 100, 1) if tasks else 0.0,
+        'overdue_tasks': count_overdue(tasks, 'due_date'),
+        'completed_by_category': completion_by(tasks, 'category'),
+        'completed_by_priority': completion_by(tasks, 'priority')
+    }
+
+def build_task_insight_prompt(tasks: List[Dict[str, Any]], token_budget: int = PROMPT_DATA_TOKEN_BUDGET) -> Dict[str, Any]:
+    """Build the chat request (prompts and sampling settings) for task insights.
+
+    The data section is aggregates over all tasks plus as many recently
+    created tasks as fit in `token_budget` tokens.
+    """
     # Prepare task data for analysis
     task_analysis = []
-    for task in tasks:
+    for task in sorted(tasks, key=lambda t: t.get('created_at', '')):
         task_entry = {
             'title': task.get('title', 'Unknown'),
             'category': task.get('category', 'Unknown'),
@@ -177,46 +183,36 @@ def generate_task_insights(tasks: List[Dict[str, Any]]) -> str:
             'completed': task.get('completed', False),
             'created_at': task.get('created_at', 'Unknown')
         }
-        task_analysis.append(task_entry)
+        task_analysis.append(drop_empty(task_entry))
     
-    # Create prompt for GROQ
-    prompt = f"""
-    Analyze the following task management data and provide insights about productivity patterns and recommendations:
-
-    TASK DATA:
-    {json.dumps(task_analysis, indent=2)}
+    data = build_budgeted_data(summarize_tasks(tasks), task_analysis, token_budget)
+    
+    return render_prompt('tasks', [('TASK DATA', data)])
 
-    Please provide insights on:
-    1. Task completion patterns and productivity trends
-    2. Category-wise performance analysis (Work, Health, Personal)
-    3. Priority management effectiveness
-    4. Time management patterns and suggestions
-    5. Recommendations for improving task completion rates
-    6. Suggestions for better task organization and prioritization
-    7. Work-life balance insights based on task categories
+def generate_task_insights(tasks: List[Dict[str, Any]], structured: bool = False) -> Union[str, Dict[str, Any]]:
+    """Generate AI insights for task management using GROQ.
 
-    Focus on actionable insights and specific recommendations for better productivity.
-    Format your response in a clear, structured way with bullet points for key findings.
+    With `structured`, returns the validated findings, triggers, recommendations
+    and confidence (rendered markdown in 'content') instead of free text.
     """
+    if not tasks:
+        return "No tasks found to analyze."
     
-    try:
-        response = client.chat.completions.create(
-            model="llama3-70b-8192",  # Using GROQ's Llama model
-            messages=[
-                {"role": "system", "content": "You are a productivity and task management expert analyzing task data to provide actionable insights for better time management and productivity."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=1000,
-            temperature=0.7
-        )
-        
-        return response.choices[0].message.content
+    return generate_insight('tasks', lambda: build_task_insight_prompt(tasks), {'tasks': tasks}, structured=structured)
+
+def stream_task_insights(tasks: List[Dict[str, Any]]) -> Iterator[str]:
+    """Stream task insights as they are generated (same request as generate_task_insights)."""
+    if not tasks:
+        yield "No tasks found to analyze."
+        return
     
-    except Exception as e:
-        return f"Error generating insights: {str(e)}"
+    yield from stream_insight('tasks', lambda: build_task_insight_prompt(tasks), {'tasks': tasks})
 
-def save_task_insight(insight_content: str, tasks_analyzed: int) -> None:
-    """Save task insight to JSON file."""
+def save_task_insight(insight_content: str, tasks_analyzed: int, metadata: Optional[Dict[str, Any]] = None) -> None:
+    """Save task insight to JSON file.
+
+    `metadata` (e.g. the username and incremental-analysis state) is stored with the insight.
+    """
     insight = {
         'content': insight_content,
         'source': 'task_management',
@@ -224,6 +220,8 @@ def save_task_insight(insight_content: str, tasks_analyzed: int) -> None:
         'tasks_analyzed': tasks_analyzed,
         'analysis_type': 'Task Management & Productivity'
     }
+    if metadata:
+        insight.update(metadata)
     
     # Load existing insights
     insights_file = "insights.json"
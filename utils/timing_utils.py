@@ -0,0 +1,100 @@
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.data_utils import build_journal_frame
+
+# Meals eaten after this time (minutes after midnight) count as late meals
+LATE_MEAL_MINUTES = 20 * 60
+
+def format_minutes(minutes: Optional[float]) -> str:
+    """Format minutes after midnight as HH:MM."""
+    if minutes is None or pd.isna(minutes):
+        return 'N/A'
+    minutes = int(round(minutes)) % (24 * 60)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def compute_daily_meal_timing(frame: pd.DataFrame) -> pd.DataFrame:
+    """Compute per-day meal timing from a journal frame.
+
+    Returns one row per day with meals, first_meal and last_meal (minutes after
+    midnight), eating_window_hours, overnight_fast_hours (since the previous
+    day's last meal, NaN if the previous day has no entries) and late_meals.
+    """
+    columns = ['date', 'meals', 'first_meal', 'last_meal', 'eating_window_hours',
+               'overnight_fast_hours', 'late_meals']
+    if frame.empty:
+        return pd.DataFrame(columns=columns)
+
+    daily = frame.assign(is_late=frame['meal_minutes'] > LATE_MEAL_MINUTES).groupby('date').agg(
+        meals=('meal_minutes', 'size'),
+        first_meal=('meal_minutes', 'min'),
+        last_meal=('meal_minutes', 'max'),
+        late_meals=('is_late', 'sum')
+    ).reset_index().sort_values('date')
+
+    daily['eating_window_hours'] = (daily['last_meal'] - daily['first_meal']) / 60
+
+    # Overnight fast only spans consecutive calendar days
+    previous_last = daily['last_meal'].shift(1)
+    consecutive = daily['date'].diff() == pd.Timedelta(days=1)
+    daily['overnight_fast_hours'] = np.where(
+        consecutive,
+        (24 * 60 - previous_last + daily['first_meal']) / 60,
+        np.nan
+    )
+
+    daily['late_meals'] = daily['late_meals'].astype(int)
+    return daily[columns].reset_index(drop=True)
+
+def compute_meal_gaps(frame: pd.DataFrame) -> np.ndarray:
+    """Get the gaps in hours between consecutive meals on the same day."""
+    if len(frame) < 2:
+        return np.array([], dtype=float)
+
+    ordered = frame.sort_values(['date', 'meal_minutes'])
+    minutes = ordered['meal_minutes'].to_numpy(dtype=float)
+    days = ordered['date'].to_numpy()
+
+    same_day = days[1:] == days[:-1]
+    return np.diff(minutes)[same_day] / 60
+
+def get_meal_timing_summary(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Summarize meal timing and fasting windows for a list of entries."""
+    frame = build_journal_frame(entries)
+    daily = compute_daily_meal_timing(frame)
+    gaps = compute_meal_gaps(frame)
+
+    if daily.empty:
+        return {'days_analyzed': 0}
+
+    fasts = daily['overnight_fast_hours'].dropna()
+
+    return {
+        'days_analyzed': int(len(daily)),
+        'avg_meals_per_day': round(float(daily['meals'].mean()), 1),
+        'avg_first_meal': format_minutes(daily['first_meal'].mean()),
+        'avg_last_meal': format_minutes(daily['last_meal'].mean()),
+        'avg_eating_window_hours': round(float(daily['eating_window_hours'].mean()), 1),
+        'avg_overnight_fast_hours': round(float(fasts.mean()), 1) if not fasts.empty else None,
+        'min_overnight_fast_hours': round(float(fasts.min()), 1) if not fasts.empty else None,
+        'median_meal_gap_hours': round(float(np.median(gaps)), 1) if gaps.size else None,
+        'short_meal_gaps': int((gaps < 2).sum()),
+        'late_meals_total': int(daily['late_meals'].sum()),
+        'days_with_late_meals': int((daily['late_meals'] > 0).sum())
+    }
+
+def get_timing_distribution(values: np.ndarray, bin_hours: float = 1.0) -> pd.DataFrame:
+    """Bucket hour values into a histogram DataFrame for charting."""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+
+    if values.size == 0:
+        return pd.DataFrame(columns=['hours', 'count'])
+
+    start = np.floor(values.min() / bin_hours) * bin_hours
+    stop = np.ceil(values.max() / bin_hours) * bin_hours + bin_hours
+    counts, edges = np.histogram(values, bins=np.arange(start, stop + bin_hours / 2, bin_hours))
+
+    return pd.DataFrame({'hours': edges[:-1], 'count': counts})
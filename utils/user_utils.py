@@ -84,7 +84,8 @@ def create_user_data_files(username: str):
         "goals.json",
         "meal_plans.json",
         "recipes.json",
-        "selfcare_tasks.json"
+        "selfcare_tasks.json",
+        "experiments.json"
     ]
     
     for filename in user_files:
@@ -160,7 +161,8 @@ def delete_user_data(username: str) -> bool:
             "goals.json",
             "meal_plans.json",
             "recipes.json",
-            "selfcare_tasks.json"
+            "selfcare_tasks.json",
+            "experiments.json"
         ]
         
         for filename in user_files:
@@ -168,6 +170,10 @@ def delete_user_data(username: str) -> bool:
             if os.path.exists(file_path):
                 os.remove(file_path)
         
+        # Stored OURA history (imported here: oura_store imports this module)
+        from utils.oura_store import delete_oura_data
+        delete_oura_data(username)
+        
         return True
     except:
         return False 
\ No newline at end of file